@@ -13,6 +13,9 @@ from schema.category import Category
 from schema.movement import Movement
 from schema.planned_expense import PlannedExpense
 from schema.activity_log import ActivityLog
+from schema.fx_rate import FxRate
+from schema.idempotency import IdempotencyRecord
+from schema.change_log import ChangeLog
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,72 @@
+"""Add change_log table for delta sync
+
+Revision ID: 0b6d4f9e2c17
+Revises: f1b7d3e8a265
+Create Date: 2026-10-19 15:48:26.093451
+
+Existing rows are logged as created, so the first sync of an
+existing client (since=0) downloads the whole account.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0b6d4f9e2c17"
+down_revision: Union[str, None] = "f1b7d3e8a265"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+change_entity = sa.Enum(
+    "category", "movement", "planned_expense", "activity_log", name="changeentity"
+)
+change_operation = sa.Enum("create", "update", "delete", name="changeoperation")
+
+# Entity name and the (user_id, id) select of its existing rows
+EXISTING_ROWS = {
+    "category": "SELECT user_id, id FROM category",
+    "movement": "SELECT user_id, id FROM movement",
+    "planned_expense": "SELECT user_id, id FROM plannedexpense",
+    "activity_log": "SELECT movement.user_id, activitylog.id FROM activitylog "
+    "JOIN movement ON movement.id = activitylog.movement_id",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "change_log",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("entity", change_entity, nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("operation", change_operation, nullable=False),
+        sa.PrimaryKeyConstraint("seq"),
+    )
+    op.create_index("ix_change_log_user_id_seq", "change_log", ["user_id", "seq"])
+
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    entity_value = "CAST(:entity AS changeentity)" if postgresql else ":entity"
+    operation_value = (
+        "CAST(:operation AS changeoperation)" if postgresql else ":operation"
+    )
+    for entity, rows in EXISTING_ROWS.items():
+        # Values are bound, the f-string only inlines the constant
+        # EXISTING_ROWS subqueries of this module
+        insert = (
+            "INSERT INTO change_log (user_id, entity, entity_id, operation) "  # nosec B608
+            f"SELECT existing.user_id, {entity_value}, existing.id, {operation_value} "
+            f"FROM ({rows}) AS existing ORDER BY existing.id"
+        )
+        op.execute(sa.text(insert).bindparams(entity=entity, operation="create"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_change_log_user_id_seq", table_name="change_log")
+    op.drop_table("change_log")
+    change_operation.drop(op.get_bind(), checkfirst=True)
+    change_entity.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""Add prefix index on category counterparty
+
+Revision ID: 3c8e5f27a1d4
+Revises: d7b21f4c9e08
+Create Date: 2026-10-19 13:55:31.284619
+
+Expression index on (user_id, lower(counterparty)), serving the
+case insensitive prefix queries of /categories/suggest.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3c8e5f27a1d4"
+down_revision: Union[str, None] = "d7b21f4c9e08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_category_user_id_counterparty_lower",
+        "category",
+        ["user_id", sa.text("lower(counterparty)")],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_category_user_id_counterparty_lower", table_name="category")
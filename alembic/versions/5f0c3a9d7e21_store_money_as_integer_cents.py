@@ -0,0 +1,95 @@
+"""Store movement and planned expense values as integer cents
+
+Revision ID: 5f0c3a9d7e21
+Revises: b2d987bbee6e
+Create Date: 2026-10-19 10:02:14.902113
+
+The float `value` columns are replaced by BIGINT columns holding cents.
+Existing rows are converted in id-range batches, each batch committed
+on its own, so the tables are never locked for the whole backfill.
+A final catch-up pass, right before the old column is dropped,
+converts the rows inserted while the backfill ran and the rows updated
+after their batch was converted (their converted value no longer
+matches the old column).
+
+The SQL is built with f-strings from the table and column names of
+this module only, values are bound parameters.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0c3a9d7e21"
+down_revision: Union[str, None] = "b2d987bbee6e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY_TABLES = ("movement", "plannedexpense")
+BATCH_SIZE = 5000
+
+
+def backfill_in_batches(table: str, column: str, expression: str) -> None:
+    """
+    Runs `UPDATE table SET column = expression` over id ranges of
+    BATCH_SIZE rows, committing after every batch. Rows already
+    converted are skipped, so an interrupted backfill can simply be
+    run again.
+    """
+    connection = op.get_bind()
+    bounds = f'SELECT MIN(id), MAX(id) FROM "{table}"'  # nosec B608: module names
+    min_id, max_id = connection.execute(sa.text(bounds)).one()
+    if min_id is None:
+        return
+
+    with op.get_context().autocommit_block():
+        for start in range(min_id, max_id + 1, BATCH_SIZE):
+            connection.execute(
+                sa.text(
+                    f'UPDATE "{table}" SET {column} = {expression} '  # nosec B608: module names
+                    f"WHERE id >= :start AND id < :end AND {column} IS NULL"
+                ),
+                {"start": start, "end": start + BATCH_SIZE},
+            )
+
+
+def catch_up(table: str, column: str, expression: str) -> None:
+    """
+    Converts the rows inserted or updated since the backfill: not
+    converted yet, or converted from a value changed since.
+    """
+    op.execute(
+        f'UPDATE "{table}" SET {column} = {expression} '  # nosec B608: module names
+        f"WHERE {column} IS NULL OR {column} <> {expression}"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in MONEY_TABLES:
+        op.add_column(table, sa.Column("value_cents", sa.BigInteger(), nullable=True))
+        expression = "CAST(ROUND(value * 100) AS BIGINT)"
+        backfill_in_batches(table, "value_cents", expression)
+        catch_up(table, "value_cents", expression)
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("value_cents", nullable=False)
+            batch_op.drop_column("value")
+            batch_op.alter_column("value_cents", new_column_name="value")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in MONEY_TABLES:
+        op.add_column(table, sa.Column("value_float", sa.Float(), nullable=True))
+        expression = "value / 100.0"
+        backfill_in_batches(table, "value_float", expression)
+        catch_up(table, "value_float", expression)
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column("value_float", nullable=False)
+            batch_op.drop_column("value")
+            batch_op.alter_column("value_float", new_column_name="value")
@@ -0,0 +1,32 @@
+"""Add data_version counter to user
+
+Revision ID: 6e2a8b5c3f90
+Revises: 0b6d4f9e2c17
+Create Date: 2026-10-19 16:21:55.648217
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "6e2a8b5c3f90"
+down_revision: Union[str, None] = "0b6d4f9e2c17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user",
+        sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("data_version")
@@ -0,0 +1,48 @@
+"""Use the C collation in the counterparty prefix index
+
+Revision ID: 8f3c1a6d2b47
+Revises: 6e2a8b5c3f90
+Create Date: 2026-10-19 18:07:42.915306
+
+The prefix queries of /categories/suggest match a range of
+lower(counterparty) values, which only holds in byte order. Under a
+non-C PostgreSQL collation the range can miss valid matches, so the
+queries compare with COLLATE "C" and the index is rebuilt to match.
+SQLite compares in byte order already, its index is unchanged.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8f3c1a6d2b47"
+down_revision: Union[str, None] = "6e2a8b5c3f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_category_user_id_counterparty_lower", table_name="category")
+    op.create_index(
+        "ix_category_user_id_counterparty_lower",
+        "category",
+        ["user_id", sa.text('(lower(counterparty) COLLATE "C")')],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_category_user_id_counterparty_lower", table_name="category")
+    op.create_index(
+        "ix_category_user_id_counterparty_lower",
+        "category",
+        ["user_id", sa.text("lower(counterparty)")],
+    )
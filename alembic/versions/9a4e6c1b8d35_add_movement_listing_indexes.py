@@ -0,0 +1,50 @@
+"""Add composite indexes for movement listing filters
+
+Revision ID: 9a4e6c1b8d35
+Revises: 5f0c3a9d7e21
+Create Date: 2026-10-19 11:20:47.105338
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4e6c1b8d35"
+down_revision: Union[str, None] = "5f0c3a9d7e21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MOVEMENT_INDEXES = {
+    "ix_movement_user_id_movement_date": ["user_id", "movement_date"],
+    "ix_movement_user_id_value": ["user_id", "value"],
+    "ix_movement_user_id_currency_movement_date": [
+        "user_id",
+        "currency",
+        "movement_date",
+    ],
+    "ix_movement_user_id_payment_method_movement_date": [
+        "user_id",
+        "payment_method",
+        "movement_date",
+    ],
+    "ix_movement_category_id_movement_date": ["category_id", "movement_date"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for index_name, columns in MOVEMENT_INDEXES.items():
+        op.create_index(index_name, "movement", columns)
+    op.create_index(
+        "ix_category_user_id_category_type", "category", ["user_id", "category_type"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_category_user_id_category_type", table_name="category")
+    for index_name in MOVEMENT_INDEXES:
+        op.drop_index(index_name, table_name="movement")
@@ -0,0 +1,48 @@
+"""Add fx_rate table and user reporting_currency
+
+Revision ID: b2d987bbee6e
+Revises: 160cb2d2dc62
+Create Date: 2026-10-19 09:12:31.418220
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b2d987bbee6e"
+down_revision: Union[str, None] = "160cb2d2dc62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The currencytype enum already exists (created with the movement table)
+currency_type = postgresql.ENUM("euro", "usd", name="currencytype", create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "fx_rate",
+        sa.Column("rate_date", sa.Date(), nullable=False),
+        sa.Column("currency", currency_type, nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("rate_date", "currency"),
+    )
+    op.add_column(
+        "user",
+        sa.Column(
+            "reporting_currency",
+            currency_type,
+            nullable=False,
+            server_default="euro",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user", "reporting_currency")
+    op.drop_table("fx_rate")
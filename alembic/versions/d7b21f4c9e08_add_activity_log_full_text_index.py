@@ -0,0 +1,68 @@
+"""Add full-text index on activity log descriptions
+
+Revision ID: d7b21f4c9e08
+Revises: 9a4e6c1b8d35
+Create Date: 2026-10-19 12:41:09.377512
+
+PostgreSQL gets a GIN expression index, built concurrently so writes
+to activitylog are not blocked. SQLite gets the FTS5 table and its
+sync triggers, then the table is filled from the existing rows.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d7b21f4c9e08"
+down_revision: Union[str, None] = "9a4e6c1b8d35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copy of schema.activity_log.SQLITE_FTS_DDL as of this revision
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS activitylog_fts USING fts5("
+    "description, content='activitylog', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS activitylog_fts_insert AFTER INSERT ON activitylog "
+    "BEGIN INSERT INTO activitylog_fts(rowid, description) "
+    "VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS activitylog_fts_delete AFTER DELETE ON activitylog "
+    "BEGIN INSERT INTO activitylog_fts(activitylog_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS activitylog_fts_update AFTER UPDATE ON activitylog "
+    "BEGIN INSERT INTO activitylog_fts(activitylog_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO activitylog_fts(rowid, description) "
+    "VALUES (new.id, new.description); END",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_activitylog_description_fts",
+                "activitylog",
+                [sa.text("to_tsvector('simple'::regconfig, description)")],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+            )
+    elif dialect_name == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO activitylog_fts(activitylog_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        op.drop_index("ix_activitylog_description_fts", table_name="activitylog")
+    elif dialect_name == "sqlite":
+        for trigger in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS activitylog_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS activitylog_fts")
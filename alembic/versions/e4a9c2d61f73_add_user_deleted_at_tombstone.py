@@ -0,0 +1,31 @@
+"""Add deleted_at tombstone to user
+
+Revision ID: e4a9c2d61f73
+Revises: 3c8e5f27a1d4
+Create Date: 2026-10-19 14:32:08.517203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a9c2d61f73"
+down_revision: Union[str, None] = "3c8e5f27a1d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("deleted_at")
@@ -8,8 +8,10 @@ JWT token creation, and user retrieval from the database.
     * get_user: Retrieves a user from the database by username (email).
     * authenticate_user: Authenticates a user by checking the provided username and password.
     * create_access_token: Creates a JWT access token with an expiration time.
+    * decode_access_token: Returns the username of a valid JWT access token.
     * get_current_user: Retrieves the current user from the JWT token.
     * get_current_active_user: Checks if the current user is active.
+    * get_page_user: Retrieves the user of a page request, if any.
 
 get_current_user and get_current_active_user are FastAPI dependencies
 that can be used in route handlers to ensure that the user is authenticated
@@ -21,7 +23,7 @@ from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from typing import Annotated
 import jwt
-from fastapi import Depends, status
+from fastapi import Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
@@ -37,6 +39,10 @@ load_dotenv()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+# Cookie holding the access token, set at login so that page requests
+# (which carry no Authorization header) can be rendered on the server
+ACCESS_TOKEN_COOKIE = "access_token"  # nosec B105: a cookie name, not a secret
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -49,8 +55,9 @@ def get_password_hash(password):
 def get_user(username: str, session: SessionDep) -> User | None:
     """
     Retrieve a user by username (email in this case) from the database.
+    Deleted accounts, waiting to be purged, are ignored.
     """
-    stmt = select(User).where(User.email == username)
+    stmt = select(User).where(User.email == username, User.deleted_at.is_(None))
     user = session.exec(stmt).first()
     if not user:
         return None
@@ -85,29 +92,45 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> str | None:
+    """
+    Return the username (subject) of a JWT access token, or None when
+    the token is invalid, expired or has no subject.
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            os.environ.get("SECRET_KEY"),
+            algorithms=[os.environ.get("ALGORITHM")],
+        )
+    except InvalidTokenError:
+        return None
+    return payload.get("sub")
+
+
 async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: SessionDep,
 ):
     """
     Get the current user from the JWT token.
+
+    Operations of a batch request get the user the batch was
+    authenticated with (see services/batch.py).
     """
+    batch = getattr(request.state, "batch", None)
+    if batch is not None:
+        return batch.user
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token,
-            os.environ.get("SECRET_KEY"),
-            algorithms=[os.environ.get("ALGORITHM")],
-        )
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except InvalidTokenError:
+    username = decode_access_token(token)
+    if username is None:
         raise credentials_exception
+    token_data = TokenData(username=username)
     user = get_user(username=token_data.username, session=session)
     if user is None:
         raise credentials_exception
@@ -118,3 +141,23 @@ async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     return current_user
+
+
+async def get_page_user(request: Request, session: SessionDep) -> User | None:
+    """
+    Get the user of a page request from the bearer token or the
+    access token cookie.
+
+    Returns None instead of raising when the request is not
+    authenticated, the page is then served without its data.
+    """
+    token = request.cookies.get(ACCESS_TOKEN_COOKIE)
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        token = credentials
+    if not token:
+        return None
+    username = decode_access_token(token)
+    if username is None:
+        return None
+    return get_user(username=username, session=session)
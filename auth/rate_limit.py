@@ -1,19 +1,292 @@
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_ipaddr
-from fastapi import Request, Response, HTTPException, status
-from starlette.exceptions import HTTPException as StarletteHTTPException
+"""
+Token bucket rate limiting, shared by the worker processes of a host.
 
-limiter = Limiter(key_func=get_ipaddr, default_limits=["20/minute"])
+Every limited key (an endpoint and a client IP, or an endpoint and a
+user) has a bucket holding up to `count` tokens, refilled at
+`count / period` tokens per second. A request takes one token, or is
+rejected with 429 Too Many Requests and a Retry-After header when the
+bucket is empty. A check reads and writes the one bucket of its key
+(by primary key), O(1) whatever the number of clients.
 
+Backends, selected with RATE_LIMIT_BACKEND:
 
-#
-def custom_rate_limit_exceeded_handler(
-    request: Request, exc: StarletteHTTPException
-) -> Response:
+    * sqlite (default): buckets in a local SQLite file
+    (RATE_LIMIT_PATH), shared by the gunicorn workers of a host, so
+    limits hold whatever the worker a request lands on.
+    * memory: buckets in the worker process, limits are multiplied
+    by the number of workers.
+    * none: rate limiting disabled.
+
+Usage, as a route dependency:
+
+    @router.post("/token", dependencies=[Depends(rate_limit("login", "5/minute"))])
+    @router.delete("/me", dependencies=[Depends(rate_limit("delete_user",
+        "10/minute", key=current_user_key))])
+
+    * rate_limit: builds the dependency taking a token from the bucket
+    of the endpoint and the key (client_ip by default).
+    * client_ip, current_user_key: the per-IP and per-user keys.
+    The client IP is the address of the peer, or, behind
+    TRUSTED_PROXY_COUNT proxies (load balancers), the address the
+    outermost of them added to X-Forwarded-For. Addresses written
+    to the header by the client itself are never trusted.
+    * rate_limit_metrics: the requests allowed and throttled by the
+    worker, per endpoint and key kind.
+"""
+
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Annotated, Callable, NamedTuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from auth.auth import get_current_active_user
+from schema.user import User
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "sqlite")
+RATE_LIMIT_PATH = os.environ.get(
+    "RATE_LIMIT_PATH",
+    os.path.join(tempfile.gettempdir(), "marginal_wallet_rate_limit.db"),
+)
+# Proxies in front of the app appending the address of their peer
+# to X-Forwarded-For, 0 when clients connect to the app directly
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", 0))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class Rate(NamedTuple):
+    """
+    A limit of `capacity` requests per `period` seconds.
+    """
+
+    capacity: int
+    period: int
+
+    @property
+    def per_second(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_rate(limit: str) -> Rate:
+    """
+    Parses a limit written as "<count>/<second|minute|hour|day>".
     """
-    Custom handler for rate limit exceeded exceptions.
+    count, _, period = limit.partition("/")
+    return Rate(int(count), PERIODS[period.strip().lower()])
+
+
+class Hit(NamedTuple):
+    allowed: bool
+    # Seconds until the bucket holds a token again, when not allowed
+    retry_after: float
+
+
+class Bucket(NamedTuple):
+    tokens: float
+    updated_at: float
+    # When the bucket is full again, it can then be dropped
+    full_at: float
+
+
+def take_token(bucket: Bucket | None, rate: Rate, now: float) -> tuple[Hit, Bucket]:
+    """
+    Refills a bucket (a new one being full) up to now and takes a token
+    from it when there is one.
+    """
+    if bucket is None:
+        tokens = float(rate.capacity)
+    else:
+        elapsed = max(0.0, now - bucket.updated_at)
+        tokens = min(rate.capacity, bucket.tokens + elapsed * rate.per_second)
+    if tokens >= 1:
+        hit = Hit(True, 0.0)
+        tokens -= 1
+    else:
+        hit = Hit(False, (1 - tokens) / rate.per_second)
+    full_at = now + (rate.capacity - tokens) / rate.per_second
+    return hit, Bucket(tokens, now, full_at)
+
+
+class MemoryBackend:
+    """
+    Token buckets in the worker process.
+    """
+
+    # Full buckets are dropped once every PURGE_EVERY checks
+    PURGE_EVERY = 1000
+
+    def __init__(self):
+        self._buckets: dict[str, Bucket] = {}
+        self._checks = 0
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, rate: Rate, now: float | None = None) -> Hit:
+        now = time.time() if now is None else now
+        with self._lock:
+            hit, self._buckets[key] = take_token(self._buckets.get(key), rate, now)
+            self._checks += 1
+            if self._checks % self.PURGE_EVERY == 0:
+                self._purge(now)
+        return hit
+
+    def _purge(self, now: float):
+        """
+        Drops the buckets refilled since, a full bucket being the same
+        as no bucket.
+        """
+        for key in [
+            key for key, bucket in self._buckets.items() if bucket.full_at <= now
+        ]:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
 
-    This function is called when a rate limit is exceeded.
-    It returns a 429 Too Many Requests response with a custom message.
+
+class SQLiteBackend:
+    """
+    Token buckets in a local SQLite file, shared by the worker
+    processes of a host. Each thread uses its own connection.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str = RATE_LIMIT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._checks = 0
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "full_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rate_limit_full_at ON rate_limit (full_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def hit(self, key: str, rate: Rate, now: float | None = None) -> Hit:
+        now = time.time() if now is None else now
+        connection = self._connection()
+        # The write lock is taken before reading the bucket, so concurrent
+        # workers checking the same key never lose a token
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated_at, full_at FROM rate_limit WHERE key = ?",
+                (key,),
+            ).fetchone()
+            hit, bucket = take_token(Bucket(*row) if row else None, rate, now)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limit VALUES (?, ?, ?, ?)", (key, *bucket)
+            )
+            self._checks += 1
+            if self._checks % self.PURGE_EVERY == 0:
+                connection.execute("DELETE FROM rate_limit WHERE full_at <= ?", (now,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return hit
+
+    def clear(self):
+        self._connection().execute("DELETE FROM rate_limit")
+
+
+class NullBackend:
+    def hit(self, key: str, rate: Rate, now: float | None = None) -> Hit:
+        return Hit(True, 0.0)
+
+    def clear(self):
+        pass
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "memory":
+        return MemoryBackend()
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name}")
+
+
+rate_limiter = create_backend()
+
+# (endpoint:key kind, "allowed" | "throttled") -> requests, of this worker
+_counters: Counter[tuple[str, str]] = Counter()
+
+
+def client_ip(request: Request) -> str:
+    """
+    Per-IP key: the address of the peer, or behind trusted proxies the
+    address of X-Forwarded-For added by the outermost one, i.e. the
+    TRUSTED_PROXY_COUNT-th from the right. The addresses on its left
+    come from the client, which can write any value there.
+    """
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if TRUSTED_PROXY_COUNT and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",")]
+        return f"ip:{hops[max(len(hops) - TRUSTED_PROXY_COUNT, 0)]}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def current_user_key(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+) -> str:
+    """
+    Per-user key, for endpoints of an authenticated user.
+    """
+    return f"user:{current_user.id}"
+
+
+def rate_limit(
+    name: str, limit: str, key: Callable[..., str] = client_ip
+) -> Callable[..., None]:
+    """
+    Returns a dependency allowing `limit` requests (e.g. "5/minute") to
+    the endpoint `name` per key.
+    """
+    rate = parse_rate(limit)
+
+    def rate_limit_guard(subject: Annotated[str, Depends(key)]):
+        hit = rate_limiter.hit(f"{name}:{subject}", rate)
+        counter = f"{name}:{subject.partition(':')[0]}"
+        if hit.allowed:
+            _counters[counter, "allowed"] += 1
+            return
+        _counters[counter, "throttled"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded: {limit}",
+            headers={"Retry-After": str(math.ceil(hit.retry_after))},
+        )
+
+    return rate_limit_guard
+
+
+def rate_limit_metrics() -> dict[str, dict[str, int]]:
+    """
+    Returns the requests allowed and throttled by this worker, per
+    endpoint and key kind (e.g. "login:ip").
     """
-    return _rate_limit_exceeded_handler(request, exc)
+    metrics = {}
+    for (counter, outcome), requests in sorted(_counters.items()):
+        metrics.setdefault(counter, {"allowed": 0, "throttled": 0})[outcome] = requests
+    return metrics
@@ -0,0 +1,95 @@
+"""
+Benchmark of the response compression settings.
+
+Compresses the JSON of a movement listing (200 rows, the page size of
+/movements/list, and 10,000 rows, an export) with every gzip level and,
+when the brotli package is installed, the common brotli qualities.
+For each setting it prints the compressed size, the CPU time per
+response, and the time to send the response on a 10 Mbit/s link
+(CPU time included), the uncompressed response being the reference.
+
+    python -m benchmarks.compression [--rows 200 10000] [--mbps 10]
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from services import compression
+from services.compression import Compressor
+from services.fast_json import dumps
+
+CATEGORY_TYPES = ("Minijob", "Freelance", "Commission", "Expenses")
+
+
+def movement_listing(rows: int) -> bytes:
+    first_day = date(2024, 1, 1)
+    return dumps(
+        [
+            {
+                "id": index + 1,
+                "movement_date": first_day + timedelta(days=index % 700),
+                "value": Decimal(index % 5000 - 2500).scaleb(-2),
+                "currency": "EURO" if index % 5 else "USD",
+                "payment_method": ("Cash", "Paypal", "Bank Transfer")[index % 3],
+                "category": {
+                    "id": index % 40 + 1,
+                    "category_type": CATEGORY_TYPES[index % 4],
+                    "counterparty": f"Counterparty {index % 40}",
+                },
+            }
+            for index in range(rows)
+        ]
+    )
+
+
+def settings() -> list[tuple[str, str, int]]:
+    options = [("gzip", "gzip", level) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        options += [("br", "br", quality) for quality in (1, 4, 6, 11)]
+    return options
+
+
+def measure(body: bytes, encoding: str, level: int, repeat: int) -> tuple[int, float]:
+    """
+    Returns the compressed size and the best CPU time over `repeat` runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        compressed = Compressor(encoding, level, level).finish(body)
+        best = min(best, time.process_time() - started)
+    return len(compressed), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200, 10000])
+    parser.add_argument("--mbps", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    bytes_per_ms = args.mbps * 1_000_000 / 8 / 1000
+
+    print(
+        f"{'rows':>6} {'encoding':>9} {'size':>10} {'ratio':>6} "
+        f"{'cpu ms':>8} {'send ms':>8}"
+    )
+    for rows in args.rows:
+        body = movement_listing(rows)
+        print(
+            f"{rows:>6} {'identity':>9} {len(body):>10,} {1:>6.2f} "
+            f"{0:>8.2f} {len(body) / bytes_per_ms:>8.1f}"
+        )
+        for name, encoding, level in settings():
+            size, cpu = measure(body, encoding, level, args.repeat)
+            cpu_ms = cpu * 1000
+            print(
+                f"{rows:>6} {f'{name}-{level}':>9} {size:>10,} "
+                f"{len(body) / size:>6.2f} {cpu_ms:>8.2f} "
+                f"{cpu_ms + size / bytes_per_ms:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark of the JSON paths of the movement list endpoints.
+
+Compares, for responses of 200 and 10,000 movements:
+
+    * validated: ORM objects loaded with `select(Movement)`, validated
+    against the response model and dumped by pydantic, which is what
+    an endpoint returning ORM objects with a response_model costs.
+    * fast: public columns selected as tuples, turned into dicts by
+    rows_to_movements and serialized by services/fast_json.py.
+
+Each path is timed from the query to the JSON bytes, on an in-memory
+SQLite database, and its peak memory is traced with tracemalloc.
+
+    python -m benchmarks.json_serialization [--rows 200 10000] [--repeat 5]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from pydantic import TypeAdapter
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from schema.category import Category
+from schema.movement import Movement, MovementPublic
+from schema.planned_expense import PlannedExpense  # noqa: F401, maps User
+from schema.user import User
+from services import fast_json
+from services.movement_listing import movement_listing_statement, rows_to_movements
+
+MOVEMENTS_ADAPTER = TypeAdapter(list[MovementPublic])
+
+
+def create_database(rows: int):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(
+            name="bench",
+            email="bench@example.com",
+            password="x",  # nosec B106: user of an in-memory benchmark database
+        )
+        session.add(user)
+        session.flush()
+        category = Category(
+            category_type="Expenses", counterparty="Bakery", user_id=user.id
+        )
+        session.add(category)
+        session.flush()
+        first_day = date(2020, 1, 1)
+        session.add_all(
+            Movement(
+                movement_date=first_day + timedelta(days=index % 2000),
+                value=f"-{index % 500}.{index % 100:02d}",
+                currency="EURO",
+                payment_method="Cash",
+                user_id=user.id,
+                category_id=category.id,
+            )
+            for index in range(rows)
+        )
+        session.commit()
+    return engine
+
+
+def validated_path(session: Session, rows: int) -> bytes:
+    movements = session.exec(select(Movement).limit(rows)).all()
+    validated = MOVEMENTS_ADAPTER.validate_python(movements, from_attributes=True)
+    return MOVEMENTS_ADAPTER.dump_json(validated)
+
+
+def fast_path(session: Session, rows: int) -> bytes:
+    result = session.exec(movement_listing_statement(set()).limit(rows)).all()
+    return fast_json.dumps(rows_to_movements(result, set()))
+
+
+def measure(engine, path, rows: int, repeat: int) -> tuple[float, int, bytes]:
+    """
+    Returns the best rows/sec over `repeat` runs, the peak memory
+    of one run and the JSON it produced.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            body = path(session, rows)
+            best = min(best, time.perf_counter() - started)
+    with Session(engine) as session:
+        tracemalloc.start()
+        path(session, rows)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return rows / best, peak, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = "orjson" if fast_json.orjson is not None else "json"
+    print(f"fast path encoder: {encoder}")
+    print(f"{'rows':>8} {'path':>10} {'rows/sec':>12} {'peak memory':>12}")
+    for rows in args.rows:
+        engine = create_database(rows)
+        bodies = []
+        for name, path in (("validated", validated_path), ("fast", fast_path)):
+            rate, peak, body = measure(engine, path, rows, args.repeat)
+            bodies.append(body)
+            print(f"{rows:>8} {name:>10} {rate:>12,.0f} {peak / 1024:>9,.0f} KiB")
+        if json.loads(bodies[0]) != json.loads(bodies[1]):
+            raise SystemExit("Both paths must return the same JSON")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,22 +8,62 @@ It uses SQLModel for ORM and dotenv for environment variable management.
 The database uses PostgresSQL, and the connection URL is expected
 to be stored in an environment variable named `DATABASE_URL`.
 
+    * TimedQueuePool: connection pool timing how long checkouts wait
+    for a connection, exposed by GET /metrics.
     * create_db_and_tables: Function to create the database and tables
     if they do not exist.
     * get_session: Dependency to get a database session for each request,
-    returning a generator that yields a session.
+    returning a generator that yields a session. The operations of a
+    batch request (routers/batch.py) share the session of the batch.
 """
 
 import os
+import time
+from threading import Lock
 from dotenv import load_dotenv
-from fastapi import Depends
+from fastapi import Depends, Request
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel, create_engine, Session
-from typing import Annotated, Generator
+from typing import Annotated, AsyncGenerator
 
 load_dotenv()
 
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool recording the time spent in checkouts, waiting for a free
+    connection (or opening a new one), per worker process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._wait_lock = Lock()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def wait_metrics(self) -> dict:
+        with self._wait_lock:
+            return {
+                "db_pool_checkouts": self.checkouts,
+                "db_pool_wait_seconds": round(self.wait_seconds, 6),
+                "db_pool_max_wait_seconds": round(self.max_wait_seconds, 6),
+            }
+
+
 DATABASE_URL = os.environ.get("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool)
 
 
 def create_db_and_tables():
@@ -34,11 +74,19 @@ def create_db_and_tables():
     print("Database tables created (or checked)")
 
 
-def get_session() -> Generator[Session, None, None]:
+async def get_session(request: Request) -> AsyncGenerator[Session, None]:
     """
     Dependency to get a database session.
     This function is used to create a new session for each request.
+
+    Operations of a batch request use the session of the batch
+    instead, one operation at a time (see services/batch.py).
     """
+    batch = getattr(request.state, "batch", None)
+    if batch is not None:
+        async with batch.session_lock:
+            yield batch.session
+        return
     with Session(engine) as session:
         yield session
 
@@ -7,11 +7,17 @@ Thanks to FastAPI's dependency injection system,
 these functions can be easily integrated into route handlers
 to enforce ownership checks before performing any operations
 on categories and movements.
+
+It also provides `has_dependents`, the EXISTS check to use instead
+of loading a collection relationship (e.g. `category.movements`)
+just to test whether it is empty, and `parse_batch_ids` with
+`split_found_missing` for the `/batch?ids=1,2,3` endpoints, which
+check the ownership of all the ids with a single query.
 """
 
-from sqlmodel import select
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from sqlmodel import Session, exists, select
+from typing import Annotated, Sequence
+from fastapi import Depends, HTTPException, Query, status
 
 ## Importing necessary dependencies
 from config.database import SessionDep
@@ -26,6 +32,58 @@ from schema.user import User
 from schema.movement import Movement
 
 
+def has_dependents(db: Session, *criteria) -> bool:
+    """
+    Returns whether any row matches the criteria, with an EXISTS
+    subquery that stops at the first match, e.g.
+
+        has_dependents(db, Movement.category_id == category.id)
+    """
+    return db.exec(select(exists().where(*criteria))).one()
+
+
+BATCH_MAX_IDS = 100
+
+
+def parse_batch_ids(
+    ids: str = Query(
+        ...,
+        description=f"Comma separated ids, at most {BATCH_MAX_IDS}",
+        examples=["1,2,3"],
+    ),
+) -> list[int]:
+    """
+    Parses the comma separated ids of a batch read, without duplicates
+    and in request order, raising a 400 error for invalid lists.
+    """
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma separated list of integers.",
+        )
+    unique_ids = list(dict.fromkeys(parsed))
+    if not unique_ids or len(unique_ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must contain between 1 and {BATCH_MAX_IDS} ids.",
+        )
+    return unique_ids
+
+
+def split_found_missing(ids: list[int], rows: Sequence) -> dict:
+    """
+    Orders the rows fetched by a batch read as requested, and lists
+    the ids that do not exist or do not belong to the user.
+    """
+    rows_by_id = {row.id: row for row in rows}
+    return {
+        "found": [rows_by_id[id] for id in ids if id in rows_by_id],
+        "missing": [id for id in ids if id not in rows_by_id],
+    }
+
+
 def check_category_belongs_to_user(
     category_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
@@ -6,15 +6,37 @@ and managing categories and movements (transactions).
 
 import os
 from contextlib import asynccontextmanager
+from datetime import date
+from typing import Annotated
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi import Depends, FastAPI, Request
+from pydantic import TypeAdapter
 from starlette.templating import Jinja2Templates
 
-from config.database import create_db_and_tables
-from routers import users, categories, movements, planned_expenses, activity_logs, auth
-
+from auth.auth import get_page_user
+from config.database import SessionDep, create_db_and_tables
+from routers import (
+    users,
+    categories,
+    movements,
+    planned_expenses,
+    activity_logs,
+    auth,
+    sync,
+    metrics,
+    batch,
+)
+from schema.movement import MovementWithDetails
+from schema.user import User, UserPublic
+from services.admission import AdmissionMiddleware
+from services.compression import CompressionMiddleware
+from services.etag import NotModified, not_modified_response
+from services.idempotency import IdempotentReplay, replay_idempotent_response
+from services.movement_listing import default_movement_listing
+from services.overview import user_overview
+from services.response_cache import CachedResponse, cached_response
+from services.static_assets import StaticAssets
 
 load_dotenv()
 
@@ -25,6 +47,9 @@ async def lifespan(app: FastAPI):
     # Code to run on startup
     print("Application starting up...")
     create_db_and_tables()
+    # Compile every template once, instead of on the first request of each page
+    for template_name in templates.env.list_templates():
+        templates.env.get_template(template_name)
     yield
     # Code to run on shutdown (if any)
     print("Application shutting down...")
@@ -37,16 +62,34 @@ app = FastAPI(
     lifespan=lifespan,  # Use the new lifespan event handler
 )
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Retried write requests with a known Idempotency-Key get the stored response
+app.add_exception_handler(IdempotentReplay, replay_idempotent_response)
+# Conditional GETs whose ETag still matches get an empty 304
+app.add_exception_handler(NotModified, not_modified_response)
+# Cached read responses are replayed without running the endpoint
+app.add_exception_handler(CachedResponse, cached_response)
+
+# Responses are gzip/brotli compressed when the client accepts it
+app.add_middleware(CompressionMiddleware)
+# Added last, so it runs first: sheds expensive requests when overloaded
+app.add_middleware(AdmissionMiddleware)
+
+# Fingerprinted static files (python -m services.static_assets) are cached
+# for a year, templates link them with {{ static_url("styles.css") }}
+static_assets = StaticAssets(directory="static")
+app.mount("/static", static_assets, name="static")
 
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_assets.url
+# Compiled templates are cached, set TEMPLATES_AUTO_RELOAD=true to pick
+# up template edits without restarting (checks the files on every render)
+templates.env.auto_reload = os.environ.get("TEMPLATES_AUTO_RELOAD") == "true"
 
-# Note: Rate limiting middleware is commented out for simplicity in local dev/testing.
-# You can uncomment it for production or specific staging environments.
-# from slowapi.middleware import SlowAPIMiddleware
-# from auth.rate_limit import limiter
-# app.state.limiter = limiter
-# app.add_middleware(SlowAPIMiddleware)
+# Latest movements listed on the server-rendered dashboard
+DASHBOARD_LATEST_MOVEMENTS = 5
+# Movements rendered on the movements page, the page size of /movements/list
+MOVEMENTS_PAGE_SIZE = 100
+MOVEMENTS_ADAPTER = TypeAdapter(list[MovementWithDetails])
 
 
 @app.get("/")
@@ -55,7 +98,7 @@ async def home(request: Request):
     This is the root endpoint of the FastAPI app.
     It returns the main landing page.
     """
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse(request, "index.html")
 
 
 @app.get("/login")
@@ -63,23 +106,46 @@ async def login(request: Request):
     """
     This endpoint serves the login page.
     """
-    return templates.TemplateResponse("login.html", {"request": request})
+    return templates.TemplateResponse(request, "login.html")
 
 
 @app.get("/profile")
-async def profile(request: Request):
+async def profile(
+    request: Request,
+    current_user: Annotated[User | None, Depends(get_page_user)],
+):
     """
     This endpoint serves the user profile page.
+
+    Like the dashboard, an authenticated request gets the page rendered
+    with the user's details, also embedded as JSON.
     """
-    return templates.TemplateResponse("profile.html", {"request": request})
+    user = None
+    if current_user is not None:
+        user = UserPublic.model_validate(current_user).model_dump(mode="json")
+    return templates.TemplateResponse(request, "profile.html", {"user": user})
 
 
 @app.get("/dashboard")
-async def dashboard(request: Request):
+async def dashboard(
+    request: Request,
+    current_user: Annotated[User | None, Depends(get_page_user)],
+    db: SessionDep,
+):
     """
     This endpoint serves the user dashboard page.
+
+    When the request is authenticated (access token cookie or bearer
+    token), the page is rendered with the user's overview and embeds
+    it as JSON, so it needs no API call after loading. Otherwise the
+    page loads the overview itself.
     """
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    overview = None
+    if current_user is not None:
+        overview = user_overview(
+            db, current_user, date.today(), DASHBOARD_LATEST_MOVEMENTS
+        ).model_dump(mode="json")
+    return templates.TemplateResponse(request, "dashboard.html", {"overview": overview})
 
 
 @app.get("/user_settings")
@@ -87,7 +153,7 @@ async def user_settings(request: Request):
     """
     This endpoint serves the user settings page.
     """
-    return templates.TemplateResponse("user_settings.html", {"request": request})
+    return templates.TemplateResponse(request, "user_settings.html")
 
 
 @app.get("/insights")
@@ -95,7 +161,7 @@ async def insights(request: Request):
     """
     This endpoint serves the financial insights page.
     """
-    return templates.TemplateResponse("insights.html", {"request": request})
+    return templates.TemplateResponse(request, "insights.html")
 
 
 @app.get("/delete_user_confirm")
@@ -103,7 +169,7 @@ async def delete_user_confirm(request: Request):
     """
     This endpoint serves the delete user confirmation page.
     """
-    return templates.TemplateResponse("delete_user_confirm.html", {"request": request})
+    return templates.TemplateResponse(request, "delete_user_confirm.html")
 
 
 @app.get("/register")
@@ -111,15 +177,36 @@ async def register(request: Request):
     """
     This endpoint serves the user registration page.
     """
-    return templates.TemplateResponse("register.html", {"request": request})
+    return templates.TemplateResponse(request, "register.html")
 
 
 @app.get("/movements_page")
-async def movements_page(request: Request):
+async def movements_page(
+    request: Request,
+    current_user: Annotated[User | None, Depends(get_page_user)],
+    db: SessionDep,
+):
     """
     This endpoint serves the movements list page.
-    """
-    return templates.TemplateResponse("movements.html", {"request": request})
+
+    Like the dashboard, an authenticated request gets the page rendered
+    with the default listing of /movements/list (this month, latest
+    first), also embedded as JSON. Other sort orders and time filters
+    are fetched by the page.
+    """
+    movements = None
+    if current_user is not None:
+        movements = MOVEMENTS_ADAPTER.dump_python(
+            MOVEMENTS_ADAPTER.validate_python(
+                default_movement_listing(
+                    db, current_user.id, date.today(), MOVEMENTS_PAGE_SIZE
+                )
+            ),
+            mode="json",
+        )
+    return templates.TemplateResponse(
+        request, "movements.html", {"movements": movements}
+    )
 
 
 @app.get("/add_movement_page")
@@ -127,7 +214,7 @@ async def add_movement_page(request: Request):
     """
     This endpoint serves the add movement page.
     """
-    return templates.TemplateResponse("add_movement.html", {"request": request})
+    return templates.TemplateResponse(request, "add_movement.html")
 
 
 # Include all the API routers
@@ -137,3 +224,6 @@ app.include_router(movements.router)
 app.include_router(planned_expenses.router)
 app.include_router(activity_logs.router)
 app.include_router(auth.router)
+app.include_router(sync.router)
+app.include_router(metrics.router)
+app.include_router(batch.router)
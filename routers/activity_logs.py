@@ -1,24 +1,46 @@
 from typing import Annotated, List
-from fastapi import APIRouter, status, Depends, HTTPException, Query
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Response
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select, Session
 
 from auth.auth import get_current_active_user
 from config.database import SessionDep
-from dependencies import check_activity_log_belongs_to_user
+from dependencies import (
+    check_activity_log_belongs_to_user,
+    parse_batch_ids,
+    split_found_missing,
+)
 
-from schema.activity_log import ActivityLog, ActivityLogPublic, ActivityLogUpdate
-from schema.movement import Movement
+from schema.activity_log import (
+    ActivityLog,
+    ActivityLogBatch,
+    ActivityLogPublic,
+    ActivityLogUpdate,
+)
+from schema.movement import ActivityLogMatch, Movement, MovementPublic
+from schema.enums import ChangeEntity, ChangeOperation
 from schema.user import User
+from services.change_log import record_change
+from services.etag import etag_guard
+from services.fast_json import fast_json_response
+from services.response_cache import cache_guard
+from services.routing import ApiRoute
+from services.text_search import activity_log_text_match, activity_log_text_rank
 
 # APIRouter instance for activity log operations
-router = APIRouter(prefix="/activity_logs", tags=["activity_logs"])
+router = APIRouter(
+    prefix="/activity_logs", tags=["activity_logs"], route_class=ApiRoute
+)
 
 
 @router.get(
-    "/list", response_model=List[ActivityLogPublic], status_code=status.HTTP_200_OK
+    "/list",
+    response_model=List[ActivityLogPublic],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def list_activity_logs(
+    response: Response,
     current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
     skip: int = Query(0, ge=0, description="Number of items to skip (offset)"),
@@ -33,24 +55,100 @@ async def list_activity_logs(
     This endpoint returns a list of ActivityLogPublic instances,
     associated with the authenticated user's movements. When no
     results are found, it returns an empty list.
+    Only the public columns are selected, and serialized without
+    re-validation (see services/fast_json.py).
     """
     statement = (
-        select(ActivityLog)
+        select(ActivityLog.id, ActivityLog.description, ActivityLog.movement_id)
         .join(Movement)
         .where(Movement.user_id == current_user.id)
         .order_by(ActivityLog.id)
         .offset(skip)
         .limit(limit)
     )
-    activity_logs = db.exec(statement).all()
+    rows = db.exec(statement).all()
 
-    return activity_logs
+    return fast_json_response([row._asdict() for row in rows], response)
+
+
+@router.get(
+    "/search",
+    response_model=List[ActivityLogMatch],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
+)
+async def search_activity_logs(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+    q: str = Query(..., min_length=1, description="Words to search in the notes"),
+    skip: int = Query(0, ge=0, description="Number of items to skip (offset)"),
+    limit: int = Query(
+        20, ge=1, le=100, description="Max number of items to return (page size)"
+    ),
+):
+    """
+    Full-text search over the descriptions of the authenticated
+    user's activity logs.
+
+    Returns the matching activity logs, most relevant first, each one
+    with its movement, fetched together in a single query backed by
+    the full-text index.
+    """
+    dialect_name = db.get_bind().dialect.name
+    rank = activity_log_text_rank(dialect_name, q).label("rank")
+    statement = (
+        select(ActivityLog, Movement, rank)
+        .join(Movement, Movement.id == ActivityLog.movement_id)
+        .where(Movement.user_id == current_user.id)
+        .where(activity_log_text_match(dialect_name, q))
+        .order_by(rank.desc(), ActivityLog.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    results = db.exec(statement).all()
+
+    return [
+        ActivityLogMatch(
+            **ActivityLogPublic.model_validate(activity_log).model_dump(),
+            rank=rank_value,
+            movement=MovementPublic.model_validate(movement),
+        )
+        for activity_log, movement, rank_value in results
+    ]
+
+
+@router.get(
+    "/batch",
+    response_model=ActivityLogBatch,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
+)
+async def get_activity_logs_batch(
+    ids: Annotated[List[int], Depends(parse_batch_ids)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Retrieve several activity logs by their IDs (`?ids=1,2,3`).
+
+    Ownership of all the ids is checked with a single query through
+    their movements. Found activity logs are returned in request
+    order, ids that do not exist or do not belong to the user's
+    movements are listed in `missing`.
+    """
+    statement = (
+        select(ActivityLog)
+        .join(Movement)
+        .where(ActivityLog.id.in_(ids), Movement.user_id == current_user.id)
+    )
+    return split_found_missing(ids, db.exec(statement).all())
 
 
 @router.get(
     "/{activity_log_id}",
     response_model=ActivityLogPublic,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
 )
 async def get_activity_log_by_id(
     activity_log: Annotated[ActivityLog, Depends(check_activity_log_belongs_to_user)],
@@ -70,6 +168,7 @@ async def get_activity_log_by_id(
 async def update_activity_log(
     activity_log: Annotated[ActivityLog, Depends(check_activity_log_belongs_to_user)],
     update_data: ActivityLogUpdate,
+    current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
 ):
     """
@@ -81,6 +180,13 @@ async def update_activity_log(
 
     try:
         db.add(activity_log)
+        record_change(
+            db,
+            current_user.id,
+            ChangeEntity.activity_log,
+            activity_log.id,
+            ChangeOperation.update,
+        )
         db.commit()
         db.refresh(activity_log)
         return activity_log
@@ -103,10 +209,18 @@ async def update_activity_log(
 @router.delete("/{activity_log_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_activity_log(
     activity_log: Annotated[ActivityLog, Depends(check_activity_log_belongs_to_user)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
 ):
     """
     Delete an activity log by its ID, ensuring ownership.
     """
     db.delete(activity_log)
+    record_change(
+        db,
+        current_user.id,
+        ChangeEntity.activity_log,
+        activity_log.id,
+        ChangeOperation.delete,
+    )
     db.commit()
@@ -3,27 +3,28 @@ from datetime import timedelta
 from typing import Annotated
 
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 
-from auth.auth import authenticate_user, create_access_token
-from auth.rate_limit import limiter
+from auth.auth import ACCESS_TOKEN_COOKIE, authenticate_user, create_access_token
+from auth.rate_limit import rate_limit
 from config.database import SessionDep
 from schema.auth import Token
 
-from slowapi import Limiter
-from slowapi.util import get_ipaddr
-
 load_dotenv()
 
 # APIRouter instance for user operations
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/token", response_model=Token)
-@limiter.limit("5/minute")
+@router.post(
+    "/token",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login", "5/minute"))],
+)
 async def login_for_access_token(
     request: Request,
+    response: Response,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: SessionDep,
 ) -> Token:
@@ -31,6 +32,10 @@ async def login_for_access_token(
     Login endpoint to authenticate a user and return an access token.
     This endpoint expects a POST request with form data containing
     the username and password of the user to authenticate.
+
+    The token is also set in an HttpOnly cookie, only read by the
+    server-rendered pages (see main.py), the API itself keeps
+    requiring the Authorization header.
     """
     user = authenticate_user(form_data.username, form_data.password, session=session)
     if not user:
@@ -55,4 +60,21 @@ async def login_for_access_token(
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
+    response.set_cookie(
+        ACCESS_TOKEN_COOKIE,
+        access_token,
+        max_age=int(access_token_expires.total_seconds()),
+        httponly=True,
+        secure=request.url.scheme == "https",
+        samesite="lax",
+    )
     return Token(access_token=access_token, token_type="bearer")  # nosec
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(response: Response):
+    """
+    Logout endpoint, removing the access token cookie of the pages.
+    Clients also have to drop the token they keep themselves.
+    """
+    response.delete_cookie(ACCESS_TOKEN_COOKIE)
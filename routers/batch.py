@@ -0,0 +1,51 @@
+"""
+Router for the batch endpoint of the Marginal Wallet API.
+
+Pages that need several resources (profile, dashboard, balances,
+recent movements) can get them all with one `POST /batch` instead
+of one request each. The batch is authenticated once, and its
+operations share one database session (see services/batch.py).
+
+Only GET operations are accepted, writes keep going through their
+own endpoints, so every write is a request of its own with its
+Idempotency-Key and its own transaction.
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from auth.auth import get_current_active_user
+from config.database import SessionDep
+from schema.batch import BatchRequest, BatchResponse
+from schema.user import User
+from services.batch import BatchContext, run_batch
+
+# APIRouter instance for the batch requests
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+@router.post("", response_model=BatchResponse, status_code=status.HTTP_200_OK)
+async def batch(
+    request: Request,
+    batch_request: BatchRequest,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Endpoint to execute several GET requests in one round trip.
+
+    Operations run concurrently, each result holds the status code,
+    headers and body the path would have returned on its own, in
+    the order of the operations. A failing operation does not fail
+    the batch.
+    """
+    for operation in batch_request.operations:
+        if operation.path.split("?")[0].rstrip("/") == router.prefix:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Batch requests cannot be nested.",
+            )
+    context = BatchContext(user=current_user, session=db)
+    results = await run_batch(request, batch_request.operations, context)
+    return BatchResponse(results=results)
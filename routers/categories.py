@@ -1,18 +1,53 @@
 from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select
+from sqlmodel import delete, select, update
 
 from auth.auth import get_current_active_user
 from config.database import SessionDep
-from dependencies import check_category_belongs_to_user
+from dependencies import (
+    check_category_belongs_to_user,
+    has_dependents,
+    parse_batch_ids,
+    split_found_missing,
+)
 
-from schema.category import CategoryCreate, CategoryPublic, Category, CategoryUpdate
-from schema.movement import MovementPublic, Movement, MovementCreate
+from schema.category import (
+    CategoryBatch,
+    CategoryCreate,
+    CategoryMerge,
+    CategoryMergeResult,
+    CategoryPublic,
+    Category,
+    CategoryUpdate,
+)
+from schema.movement import (
+    MovementPublic,
+    Movement,
+    MovementCreate,
+    MovementWithDetails,
+)
+from services.change_log import record_change, record_changes
+from services.counterparty_suggest import (
+    SUGGEST_TOP_K,
+    suggest_counterparties,
+    suggestion_cache,
+)
+from services.etag import etag_guard
+from services.fast_json import fast_json_response
+from services.idempotency import idempotency_guard
+from services.movement_listing import (
+    movement_listing_statement,
+    parse_expand,
+    rows_to_movements,
+)
+from services.response_cache import cache_guard
+from services.routing import ApiRoute
+from schema.enums import ChangeEntity, ChangeOperation
 from schema.user import User
 
 # APIRouter instance for category operations
-router = APIRouter(prefix="/categories", tags=["categories"])
+router = APIRouter(prefix="/categories", tags=["categories"], route_class=ApiRoute)
 
 
 @router.post("/", response_model=CategoryPublic, status_code=status.HTTP_201_CREATED)
@@ -31,8 +66,17 @@ def create_category(
     db_category = Category(**category.model_dump(), user_id=current_user.id)
     try:
         db.add(db_category)
+        db.flush()
+        record_change(
+            db,
+            current_user.id,
+            ChangeEntity.category,
+            db_category.id,
+            ChangeOperation.create,
+        )
         db.commit()
         db.refresh(db_category)
+        suggestion_cache.invalidate(current_user.id)
         return db_category
     except IntegrityError as e:
         db.rollback()
@@ -49,7 +93,108 @@ def create_category(
         )
 
 
-@router.get("/", response_model=List[CategoryPublic], status_code=status.HTTP_200_OK)
+@router.post(
+    "/merge", response_model=CategoryMergeResult, status_code=status.HTTP_200_OK
+)
+def merge_categories(
+    merge: CategoryMerge,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Endpoint to merge duplicate categories into one.
+
+    All movements of the source categories are moved to the target
+    category with a single UPDATE, then the source categories are
+    deleted, in one transaction. Dashboard balances are computed from
+    the movements, so they stay consistent without further work.
+    All categories must belong to the current user (404 otherwise) and
+    have the same category type (400 otherwise), so that moved movements
+    keep counting towards the same balance.
+    """
+    source_ids = sorted(set(merge.source_ids))
+    if merge.target_id in source_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The target category cannot be one of the source categories.",
+        )
+
+    owned_statement = select(Category).where(
+        Category.id.in_([*source_ids, merge.target_id]),
+        Category.user_id == current_user.id,
+    )
+    owned_categories = {category.id: category for category in db.exec(owned_statement)}
+    if len(owned_categories) != len(source_ids) + 1:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found or does not belong to the user.",
+        )
+    target = owned_categories[merge.target_id]
+    if any(
+        owned_categories[source_id].category_type != target.category_type
+        for source_id in source_ids
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only categories of the same category type can be merged.",
+        )
+
+    try:
+        record_changes(
+            db,
+            current_user.id,
+            ChangeEntity.movement,
+            ChangeOperation.update,
+            Movement.category_id.in_(source_ids),
+            Movement.user_id == current_user.id,
+        )
+        for source_id in source_ids:
+            record_change(
+                db,
+                current_user.id,
+                ChangeEntity.category,
+                source_id,
+                ChangeOperation.delete,
+            )
+        moved = db.exec(
+            update(Movement)
+            .where(Movement.category_id.in_(source_ids))
+            .where(Movement.user_id == current_user.id)
+            .values(category_id=target.id)
+        )
+        db.exec(
+            delete(Category)
+            .where(Category.id.in_(source_ids))
+            .where(Category.user_id == current_user.id)
+        )
+        db.commit()
+        db.refresh(target)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Category merge failed: Integrity error, "
+            "possibly due to foreign key constraints.",
+        )
+    except Exception as e:
+        db.rollback()
+        print(f"Error merging categories: {e}")
+        raise HTTPException(
+            status_code=500, detail="An error occurred while merging the categories."
+        )
+    suggestion_cache.invalidate(current_user.id)
+
+    return CategoryMergeResult(
+        target=target, merged_category_ids=source_ids, moved_movements=moved.rowcount
+    )
+
+
+@router.get(
+    "/",
+    response_model=List[CategoryPublic],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
+)
 async def get_categories(
     current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
@@ -77,7 +222,64 @@ async def get_categories(
 
 
 @router.get(
-    "/{category_id}", response_model=CategoryPublic, status_code=status.HTTP_200_OK
+    "/suggest",
+    response_model=List[CategoryPublic],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
+)
+def suggest_categories(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+    q: str = Query(
+        ..., min_length=1, max_length=100, description="Counterparty prefix"
+    ),
+    limit: int = Query(
+        SUGGEST_TOP_K,
+        ge=1,
+        le=SUGGEST_TOP_K,
+        description="Max number of suggestions to return",
+    ),
+):
+    """
+    Endpoint to autocomplete counterparties.
+
+    Returns the current user's categories whose counterparty starts
+    with `q` (case insensitive), in alphabetical order. Answered from
+    a per-user prefix trie cached in memory, see
+    services/counterparty_suggest.py.
+    """
+    return suggest_counterparties(db, current_user.id, q, limit)
+
+
+@router.get(
+    "/batch",
+    response_model=CategoryBatch,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
+)
+async def get_categories_batch(
+    ids: Annotated[List[int], Depends(parse_batch_ids)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Endpoint to retrieve several categories by their IDs (`?ids=1,2,3`).
+
+    Ownership of all the ids is checked with a single query. Found
+    categories are returned in request order, ids that do not exist
+    or do not belong to the user are listed in `missing`.
+    """
+    statement = select(Category).where(
+        Category.id.in_(ids), Category.user_id == current_user.id
+    )
+    return split_found_missing(ids, db.exec(statement).all())
+
+
+@router.get(
+    "/{category_id}",
+    response_model=CategoryPublic,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
 )
 async def get_category(
     category: Annotated[Category, Depends(check_category_belongs_to_user)],
@@ -111,8 +313,16 @@ async def update_category(
         setattr(category, key, value)
     try:
         db.add(category)
+        record_change(
+            db,
+            category.user_id,
+            ChangeEntity.category,
+            category.id,
+            ChangeOperation.update,
+        )
         db.commit()
         db.refresh(category)
+        suggestion_cache.invalidate(category.user_id)
         return category
     except IntegrityError as e:
         db.rollback()
@@ -140,14 +350,22 @@ async def delete_category(
     Only categories that belong to the current user
     and have no associated movements can be deleted.
     """
-    if category.movements:
+    if has_dependents(db, Movement.category_id == category.id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete category with associated movements.",
         )
     try:
         db.delete(category)
+        record_change(
+            db,
+            current_user.id,
+            ChangeEntity.category,
+            category.id,
+            ChangeOperation.delete,
+        )
         db.commit()
+        suggestion_cache.invalidate(current_user.id)
     except IntegrityError as e:
         db.rollback()
         raise HTTPException(
@@ -168,10 +386,13 @@ async def delete_category(
 
 @router.get(
     "/{category_id}/movements",
-    response_model=List[MovementPublic],
+    response_model=List[MovementWithDetails],
+    response_model_exclude_unset=True,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def get_category_movements(
+    response: Response,
     category: Annotated[Category, Depends(check_category_belongs_to_user)],
     current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
@@ -179,6 +400,11 @@ async def get_category_movements(
     limit: int = Query(
         100, ge=1, le=200, description="Max number of items to return (page size)"
     ),
+    expand: str | None = Query(
+        None,
+        description="Related data to embed in each movement "
+        "(comma separated: category, activity_log)",
+    ),
 ):
     """
     Endpoint to retrieve all movements for a specific category
@@ -186,24 +412,30 @@ async def get_category_movements(
 
     This endpoint returns a list of MovementPublic instances,
     which include the movement date, value, currency, and payment method.
+    With `expand=category,activity_log` each movement also embeds its
+    category and activity log, fetched in the same joined query.
+    Rows are serialized directly, without re-validation (see
+    services/fast_json.py).
     """
+    relations = parse_expand(expand)
     movements_statement = (
-        select(Movement)
+        movement_listing_statement(relations)
         .where(Movement.category_id == category.id)
         .where(Movement.user_id == current_user.id)
         .order_by(Movement.movement_date.desc())
         .offset(skip)
         .limit(limit)
     )
-    movements = db.exec(movements_statement).all()
+    rows = db.exec(movements_statement).all()
 
-    return movements
+    return fast_json_response(rows_to_movements(rows, relations), response)
 
 
 @router.post(
     "/{category_id}/movements",
     response_model=MovementPublic,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotency_guard)],
 )
 async def create_category_movement(
     category: Annotated[Category, Depends(check_category_belongs_to_user)],
@@ -219,6 +451,8 @@ async def create_category_movement(
     value, and currency of the movement.
     The category_id is sent as a path parameter to associate
     the movement with a specific category.
+    Retries sent with the same `Idempotency-Key` header get the
+    first response back instead of creating another movement.
     """
     # Creates a new movement instance, by unpacking the data from
     # the request body into a dictionary and adding the user id
@@ -228,6 +462,14 @@ async def create_category_movement(
     )
     try:
         db.add(new_movement)
+        db.flush()
+        record_change(
+            db,
+            current_user.id,
+            ChangeEntity.movement,
+            new_movement.id,
+            ChangeOperation.create,
+        )
         db.commit()
         db.refresh(new_movement)
         return new_movement
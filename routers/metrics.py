@@ -0,0 +1,65 @@
+"""
+Router for the operational metrics of the Marginal Wallet API.
+
+Metrics are counters of the worker process answering the request,
+a scraper should aggregate them over the workers.
+
+They reveal the load and the rate limits of the service, so they are
+only served to a scraper sending `Authorization: Bearer <METRICS_TOKEN>`.
+Without METRICS_TOKEN the endpoint is disabled (404).
+"""
+
+import os
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from auth.rate_limit import rate_limit_metrics
+from services.admission import admission_metrics
+from services.single_flight import single_flight_metrics
+
+
+def metrics_token_guard(authorization: Annotated[str | None, Header()] = None):
+    """
+    Dependency rejecting requests without the metrics token.
+    """
+    token = os.environ.get("METRICS_TOKEN")
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        credentials.encode(), token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# APIRouter instance for the metrics
+router = APIRouter(
+    prefix="/metrics", tags=["metrics"], dependencies=[Depends(metrics_token_guard)]
+)
+
+
+@router.get("", status_code=status.HTTP_200_OK)
+async def read_metrics():
+    """
+    Endpoint to retrieve the counters of the worker process:
+
+        * single_flight: per expensive read, the computations
+        executed, the requests coalesced into an in-flight one,
+        and the computations currently in flight.
+        * rate_limit: per rate limited endpoint and key kind (ip or
+        user), the requests allowed and throttled.
+        * admission: the requests in flight and queued, the current
+        queueing delay, the requests admitted and shed per priority,
+        and the database connections checked out.
+    """
+    return {
+        "single_flight": single_flight_metrics(),
+        "rate_limit": rate_limit_metrics(),
+        "admission": admission_metrics(),
+    }
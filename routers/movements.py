@@ -7,42 +7,109 @@ Movements can be categorized as income or expenses depending
 on the value being positive or negative, respectively.
 """
 
-from typing import Annotated
-from datetime import datetime, timedelta
-from fastapi import APIRouter, status, Depends, HTTPException, Query
+from typing import Annotated, Literal
+from datetime import date
+from fastapi import (
+    APIRouter,
+    status,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select, extract
+from sqlmodel import select
 
 from auth.auth import get_current_active_user
 from config.database import SessionDep
-from dependencies import check_movement_belongs_to_user, check_category_belongs_to_user
+from dependencies import (
+    check_movement_belongs_to_user,
+    check_category_belongs_to_user,
+    has_dependents,
+    parse_batch_ids,
+    split_found_missing,
+)
 from schema.activity_log import ActivityLogPublic, ActivityLogCreate, ActivityLog
 from schema.category import Category
 
+from schema.enums import ChangeEntity, ChangeOperation
 from schema.user import User
-from schema.movement import MovementPublic, Movement, MovementUpdate
+from schema.movement import (
+    MovementBatch,
+    MovementBulkDelete,
+    MovementBulkResult,
+    MovementBulkUpdate,
+    MovementPublic,
+    Movement,
+    MovementFilters,
+    MovementUpdate,
+    MovementWithDetails,
+)
+from services.change_log import record_change, record_changes
+from services.etag import etag_guard
+from services.fast_json import fast_json_response
+from services.idempotency import idempotency_guard
+from services.movement_bulk import (
+    bulk_delete_movements,
+    bulk_update_movements,
+    count_bulk_targets,
+)
+from services.movement_export import (
+    ARROW_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    PACKED_MEDIA_TYPE,
+    export_media_types,
+    export_statement,
+    negotiate_export_media_type,
+    stream_export,
+)
+from services.movement_listing import (
+    apply_movement_filters,
+    apply_time_filter,
+    movement_listing_statement,
+    order_movements,
+    parse_expand,
+    rows_to_movements,
+)
+from services.response_cache import cache_guard
+from services.routing import ApiRoute
 
 # APIRouter instance for movement operations
-router = APIRouter(prefix="/movements", tags=["movements"])
+router = APIRouter(prefix="/movements", tags=["movements"], route_class=ApiRoute)
 
 
 @router.get(
-    "/list", response_model=list[MovementPublic], status_code=status.HTTP_200_OK
+    "/list",
+    response_model=list[MovementWithDetails],
+    response_model_exclude_unset=True,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def list_movements(
+    response: Response,
     current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
-    sort_order: str = Query(
-        "desc", description="Sort order for movement date (asc or desc)"
+    filters: Annotated[MovementFilters, Depends()],
+    sort_by: Literal["date", "value"] = Query(
+        "date", description="Sort movements by date or value"
     ),
+    sort_order: str = Query("desc", description="Sort order (asc or desc)"),
     time_filter: str = Query(
         "last_month",
-        description="Filter movements by time (last_month, last_3_months, all)",
+        description="Filter movements by time (last_month, last_3_months, all), "
+        "ignored when date_from or date_to is given",
     ),
     skip: int = Query(0, ge=0, description="Number of items to skip (offset)"),
     limit: int = Query(
         100, ge=1, le=200, description="Max number of items to return (page size)"
     ),
+    expand: str | None = Query(
+        None,
+        description="Related data to embed in each movement "
+        "(comma separated: category, activity_log)",
+    ),
 ):
     """
     Endpoint to retrieve all movements for the authenticated user.
@@ -51,36 +118,206 @@ async def list_movements(
     movement date in descending order, associated with the
     authenticated user.
     When no results are found, it returns an empty list.
+
+    Movements can be filtered by date and value range, currency,
+    payment method, category type, counterparty and text in their
+    activity log, and sorted by date or value. All filters are
+    combined into a single query.
+
+    With `expand=category,activity_log` each movement embeds its
+    category and activity log, fetched in the same joined query.
+    Rows are serialized directly, without re-validation (see
+    services/fast_json.py).
     """
-    statement = select(Movement).where(Movement.user_id == current_user.id)
+    relations = parse_expand(expand)
+    statement = apply_movement_filters(
+        movement_listing_statement(relations),
+        current_user.id,
+        filters,
+        db.get_bind().dialect.name,
+    )
+    # An explicit date range replaces the predefined time filter
+    if filters.date_from is None and filters.date_to is None:
+        statement = apply_time_filter(statement, time_filter, date.today())
+    statement = order_movements(statement, sort_by, sort_order)
+
+    statement = statement.offset(skip).limit(limit)
+    rows = db.exec(statement).all()
 
-    # Apply time filter
-    now = datetime.now()
-    if time_filter == "last_month":
-        statement = statement.where(
-            extract("month", Movement.movement_date) == now.month,
-            extract("year", Movement.movement_date) == now.year,
+    return fast_json_response(rows_to_movements(rows, relations), response)
+
+
+# Plain def, unlike the other handlers: the UPDATE of a bulk request may
+# touch thousands of rows, so it runs in the threadpool instead of
+# blocking the event loop for every other request
+@router.post(
+    "/bulk_update", response_model=MovementBulkResult, status_code=status.HTTP_200_OK
+)
+def bulk_update(
+    bulk: MovementBulkUpdate,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Endpoint to update every movement matching the filters at once.
+
+    The filters (id list, date range, category, currency, payment
+    method) are combined, and the changes applied with a single
+    UPDATE scoped to the current user. With `dry_run` nothing is
+    changed, only the number of matching movements is returned.
+    """
+    new_category_id = bulk.changes.category_id
+    if new_category_id is not None:
+        category_statement = select(Category.id).where(
+            Category.id == new_category_id, Category.user_id == current_user.id
         )
-    elif time_filter == "last_3_months":
-        three_months_ago = now - timedelta(days=90)
-        statement = statement.where(Movement.movement_date >= three_months_ago)
-    elif time_filter == "all":
-        pass  # No time filter applied
-
-    # Apply sort order
-    if sort_order == "asc":
-        statement = statement.order_by(Movement.movement_date.asc())
-    else:  # Default to desc
-        statement = statement.order_by(Movement.movement_date.desc())
+        if db.exec(category_statement).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category with ID {new_category_id} not found or "
+                f"does not belong to the current user.",
+            )
 
-    statement = statement.offset(skip).limit(limit)
-    movements = db.exec(statement).all()
+    if bulk.dry_run:
+        movements, _ = count_bulk_targets(db, current_user.id, bulk.filters)
+        return MovementBulkResult(movements=movements, dry_run=True)
+
+    try:
+        movements = bulk_update_movements(
+            db, current_user.id, bulk.filters, bulk.changes
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bulk update failed: invalid data.",
+        )
+    return MovementBulkResult(movements=movements, dry_run=False)
 
-    return movements
+
+# Plain def too, for the same reason as bulk_update
+@router.post(
+    "/bulk_delete", response_model=MovementBulkResult, status_code=status.HTTP_200_OK
+)
+def bulk_delete(
+    bulk: MovementBulkDelete,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Endpoint to delete every movement matching the filters at once,
+    together with their activity logs, in one transaction.
+
+    With `dry_run` nothing is deleted, only the number of movements
+    and activity logs that would be deleted is returned.
+    """
+    if bulk.dry_run:
+        movements, activity_logs = count_bulk_targets(db, current_user.id, bulk.filters)
+        return MovementBulkResult(
+            movements=movements, activity_logs=activity_logs, dry_run=True
+        )
+
+    try:
+        movements, activity_logs = bulk_delete_movements(
+            db, current_user.id, bulk.filters
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error deleting movements: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while deleting the movements.",
+        )
+    return MovementBulkResult(
+        movements=movements, activity_logs=activity_logs, dry_run=False
+    )
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "All the movements, in the negotiated format",
+            "content": {
+                JSON_MEDIA_TYPE: {},
+                PACKED_MEDIA_TYPE: {},
+                ARROW_MEDIA_TYPE: {},
+            },
+        },
+        406: {"description": "None of the accepted formats is available"},
+    },
+)
+async def export_movements(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+    filters: Annotated[MovementFilters, Depends()],
+):
+    """
+    Endpoint to export all the movements of the authenticated user,
+    for analytics clients, ordered by date.
+
+    The format is negotiated with the Accept header: JSON by default,
+    the packed columnar format (`application/vnd.marginal-wallet.packed`)
+    or, when pyarrow is installed, an Arrow IPC stream. The response
+    is streamed in batches read from the database cursor, see
+    services/movement_export.py for the formats.
+
+    Movements can be filtered with the same filters as `/movements/list`.
+    """
+    media_type = negotiate_export_media_type(request.headers.get("Accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Available formats: {', '.join(export_media_types())}.",
+        )
+    dialect_name = db.get_bind().dialect.name
+    statement = apply_movement_filters(
+        export_statement(media_type, dialect_name),
+        current_user.id,
+        filters,
+        dialect_name,
+    )
+    return StreamingResponse(
+        stream_export(db, statement, media_type),
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
+
+
+@router.get(
+    "/batch",
+    response_model=MovementBatch,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
+)
+async def get_movements_batch(
+    ids: Annotated[list[int], Depends(parse_batch_ids)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+):
+    """
+    Endpoint to retrieve several movements by their IDs (`?ids=1,2,3`).
+
+    Ownership of all the ids is checked with a single query. Found
+    movements are returned in request order, ids that do not exist
+    or do not belong to the user are listed in `missing`.
+    """
+    statement = select(Movement).where(
+        Movement.id.in_(ids), Movement.user_id == current_user.id
+    )
+    return split_found_missing(ids, db.exec(statement).all())
 
 
 @router.get(
-    "/{movement_id}", response_model=MovementPublic, status_code=status.HTTP_200_OK
+    "/{movement_id}",
+    response_model=MovementPublic,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
 )
 async def get_movement_by_id(
     movement: Annotated[Movement, Depends(check_movement_belongs_to_user)],
@@ -147,6 +384,13 @@ async def update_movement(
 
     try:
         db.add(movement)
+        record_change(
+            db,
+            current_user.id,
+            ChangeEntity.movement,
+            movement.id,
+            ChangeOperation.update,
+        )
         db.commit()
         db.refresh(movement)
         return movement
@@ -170,6 +414,16 @@ async def delete_movement(
     movement belongs to the authenticated user. If the movement is
     successfully deleted, it returns a 204 No Content response.
     """
+    record_changes(
+        db,
+        movement.user_id,
+        ChangeEntity.activity_log,
+        ChangeOperation.delete,
+        ActivityLog.movement_id == movement.id,
+    )
+    record_change(
+        db, movement.user_id, ChangeEntity.movement, movement.id, ChangeOperation.delete
+    )
     db.delete(movement)
     db.commit()
 
@@ -178,6 +432,7 @@ async def delete_movement(
     "/{movement_id}/activity_logs",
     response_model=ActivityLogPublic,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotency_guard)],
 )
 async def create_activity_log(
     activity_log_data: ActivityLogCreate,
@@ -187,12 +442,10 @@ async def create_activity_log(
     """
     Create a new activity log for a specific movement belonging to the user.
     Each movement can only have one activity log.
+    Retries sent with the same `Idempotency-Key` header get the
+    first response back.
     """
-    existing_log_statement = select(ActivityLog).where(
-        ActivityLog.movement_id == movement.id
-    )
-    existing_log = db.exec(existing_log_statement).first()
-    if existing_log:
+    if has_dependents(db, ActivityLog.movement_id == movement.id):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"An activity log already exists for movement ID "
@@ -205,6 +458,14 @@ async def create_activity_log(
 
     try:
         db.add(db_activity_log)
+        db.flush()
+        record_change(
+            db,
+            movement.user_id,
+            ChangeEntity.activity_log,
+            db_activity_log.id,
+            ChangeOperation.create,
+        )
         db.commit()
         db.refresh(db_activity_log)
         return db_activity_log
@@ -7,6 +7,7 @@ from auth.auth import get_current_active_user
 from config.database import SessionDep
 from dependencies import check_planned_expense_belongs_to_user
 
+from schema.enums import ChangeEntity, ChangeOperation
 from schema.user import User
 from schema.planned_expense import (
     PlannedExpense,
@@ -14,13 +15,23 @@ from schema.planned_expense import (
     PlannedExpenseUpdate,
     PlannedExpensePublic,
 )
+from services.change_log import record_change
+from services.etag import etag_guard
+from services.idempotency import idempotency_guard
+from services.response_cache import cache_guard
+from services.routing import ApiRoute
 
 # APIRouter instance for planned expenses operations
-router = APIRouter(prefix="/planned_expenses", tags=["planned_expenses"])
+router = APIRouter(
+    prefix="/planned_expenses", tags=["planned_expenses"], route_class=ApiRoute
+)
 
 
 @router.post(
-    "/", response_model=PlannedExpensePublic, status_code=status.HTTP_201_CREATED
+    "/",
+    response_model=PlannedExpensePublic,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotency_guard)],
 )
 async def create_planned_expense(
     planned_expense: PlannedExpenseCreate,
@@ -29,6 +40,8 @@ async def create_planned_expense(
 ):
     """
     Creates a new planned expense for the authenticated user.
+    Retries sent with the same `Idempotency-Key` header get the
+    first response back instead of creating another planned expense.
     """
     db_planned_expense = PlannedExpense.model_validate(
         planned_expense, update={"user_id": current_user.id}
@@ -36,6 +49,14 @@ async def create_planned_expense(
 
     try:
         db.add(db_planned_expense)
+        db.flush()
+        record_change(
+            db,
+            current_user.id,
+            ChangeEntity.planned_expense,
+            db_planned_expense.id,
+            ChangeOperation.create,
+        )
         db.commit()
         db.refresh(db_planned_expense)
         return db_planned_expense
@@ -57,7 +78,10 @@ async def create_planned_expense(
 
 
 @router.get(
-    "/list", response_model=List[PlannedExpensePublic], status_code=status.HTTP_200_OK
+    "/list",
+    response_model=List[PlannedExpensePublic],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def list_planned_expenses(
     current_user: Annotated[User, Depends(get_current_active_user)],
@@ -85,6 +109,7 @@ async def list_planned_expenses(
     "/{planned_expense_id}",
     response_model=PlannedExpensePublic,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
 )
 async def get_planned_expense_by_id(
     planned_expense: Annotated[
@@ -118,6 +143,13 @@ async def update_planned_expense(
 
     try:
         db.add(planned_expense)
+        record_change(
+            db,
+            planned_expense.user_id,
+            ChangeEntity.planned_expense,
+            planned_expense.id,
+            ChangeOperation.update,
+        )
         db.commit()
         db.refresh(planned_expense)
         return planned_expense
@@ -149,4 +181,11 @@ async def delete_planned_expense(
     Deletes a planned expense by its ID, ensuring ownership.
     """
     db.delete(planned_expense)
+    record_change(
+        db,
+        planned_expense.user_id,
+        ChangeEntity.planned_expense,
+        planned_expense.id,
+        ChangeOperation.delete,
+    )
     db.commit()
@@ -0,0 +1,42 @@
+"""
+Router for the delta sync of the Marginal Wallet API.
+
+Clients keep a local copy of the user's data and call `/sync`
+with the `seq` returned by their previous sync, getting only the
+categories, movements, planned expenses and activity logs that
+changed since then, so syncing costs proportional to the changes
+rather than to the size of the data.
+"""
+
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query, status
+
+from auth.auth import get_current_active_user
+from config.database import SessionDep
+from schema.change_log import SyncResponse
+from schema.user import User
+from services.change_log import changes_since
+
+# APIRouter instance for the sync operations
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncResponse, status_code=status.HTTP_200_OK)
+async def sync(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+    since: int = Query(
+        0, ge=0, description="Last `seq` received, 0 for a full download"
+    ),
+    limit: int = Query(
+        500, ge=1, le=1000, description="Max number of changes to process"
+    ),
+):
+    """
+    Endpoint to retrieve the changes made after `since`.
+
+    Returns the current state of every entity changed after `since`,
+    the entities deleted since then, and the `seq` to send next time.
+    When `has_more` is true, call again with the new `seq` right away.
+    """
+    return changes_since(db, current_user.id, since, limit)
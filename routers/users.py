@@ -1,15 +1,22 @@
 import calendar
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from typing import Annotated
 
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    Header,
+    Query,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select, extract
+from sqlmodel import select, extract, func
 
-from auth.rate_limit import limiter
 from auth.auth import (
     get_current_active_user,
     get_password_hash,
@@ -17,11 +24,12 @@ from auth.auth import (
     authenticate_user,
     create_access_token,
 )
+from auth.rate_limit import current_user_key, rate_limit
 from config.database import SessionDep
 from schema.activity_log import ActivityLog
 
 from schema.auth import Token
-from schema.enums import CategoryType
+from schema.enums import CategoryType, CurrencyType
 
 from schema.user import (
     UserPublic,
@@ -35,21 +43,36 @@ from schema.user import (
     CategoryTypeBalanceSummary,
 )
 from schema.category import Category
-from schema.movement import Movement, MovementPublic
+from schema.movement import Movement
+from schema.overview import UserOverview
 
+from services.account_deletion import purge_user
+from services.change_log import bump_data_version
+from services.etag import etag_guard
 from services.financial_insights import generate_financial_insights
+from services.fx_rates import FxConversion, require_rates
+from services.overview import user_overview
+from services.response_cache import cache_guard
+from services.routing import ApiRoute
+from services.single_flight import SingleFlight
 
 load_dotenv()
 
 # APIRouter instance for user operations
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=ApiRoute)
+
+# Coalesce identical concurrent computations of the expensive reads
+dashboard_flight = SingleFlight("dashboard")
+insights_flight = SingleFlight("insights")
 
 
 @router.post(
-    "/register", response_model=UserPublic, status_code=status.HTTP_201_CREATED
+    "/register",
+    response_model=UserPublic,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("register", "10/minute"))],
 )
-@limiter.limit("10/minute")
-async def register(request: Request, user: UserCreate, db: SessionDep):
+async def register(user: UserCreate, db: SessionDep):
     """
     User registration endpoint.
 
@@ -78,7 +101,12 @@ async def register(request: Request, user: UserCreate, db: SessionDep):
         )
 
 
-@router.get("/me", response_model=UserPublic, status_code=status.HTTP_200_OK)
+@router.get(
+    "/me",
+    response_model=UserPublic,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard)],
+)
 async def get_current_user_profile(
     current_user: Annotated[User, Depends(get_current_active_user)],
 ):
@@ -112,6 +140,8 @@ async def update_name_email(
 
     try:
         db.add(current_user)
+        # The reporting currency changes every balance
+        bump_data_version(db, current_user.id)
         db.commit()
         db.refresh(current_user)
         return current_user
@@ -128,10 +158,14 @@ async def update_name_email(
         )
 
 
-@router.patch("/me/update_password", status_code=status.HTTP_204_NO_CONTENT)
-@limiter.limit("10/minute")
+@router.patch(
+    "/me/update_password",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[
+        Depends(rate_limit("update_password", "10/minute", key=current_user_key))
+    ],
+)
 async def update_password(
-    request: Request,
     password_update: UserPasswordUpdate,
     current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
@@ -173,10 +207,14 @@ async def update_password(
         )
 
 
-@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
-@limiter.limit("10/minute")
+@router.delete(
+    "/me",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[
+        Depends(rate_limit("delete_user", "10/minute", key=current_user_key))
+    ],
+)
 async def delete_user(
-    request: Request,
     # Changed to accept password via a custom header
     password_confirmation: Annotated[
         str,
@@ -187,6 +225,7 @@ async def delete_user(
     ],
     current_user: Annotated[User, Depends(get_current_active_user)],
     db: SessionDep,
+    background_tasks: BackgroundTasks,
 ):
     """
     Endpoint to delete the authenticated user.
@@ -197,6 +236,9 @@ async def delete_user(
 
     Any associated movements, categories, planned expenses and
     activity logs that belong to the user will also be deleted.
+    The account is marked as deleted right away (it can no longer
+    log in), and its data is purged in batches after the response
+    is sent, so large accounts do not time out.
     """
     if not verify_password(
         password_confirmation, current_user.password  # Use the password from the header
@@ -207,7 +249,8 @@ async def delete_user(
         )
 
     try:
-        db.delete(current_user)
+        current_user.deleted_at = datetime.now(timezone.utc)
+        db.add(current_user)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -216,24 +259,52 @@ async def delete_user(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while deleting" " the user account.",
         )
+    background_tasks.add_task(purge_user, current_user.id)
 
 
 @router.get(
-    "/me/dashboard/", response_model=UserDashboard, status_code=status.HTTP_200_OK
+    "/me/dashboard/",
+    response_model=UserDashboard,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def read_own_items(
     current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
 ):
     """
     Endpoint to retrieve the user's overall balance,
     number of movements, and number of categories.
+
+    The balance is expressed in the user's reporting currency,
+    movements in other currencies are converted in the same
+    query using the daily rates of their movement date.
+    Identical concurrent requests share a single computation.
     """
-    total_balance = sum(movement.value for movement in current_user.movements)
-    num_categories = len(current_user.categories)
-    num_movements = len(current_user.movements)
+    key = (current_user.id, current_user.data_version, date.today())
+    return await dashboard_flight.run(key, dashboard_summary, current_user, db)
+
+
+def dashboard_summary(current_user: User, db: SessionDep) -> UserDashboard:
+    fx = FxConversion(current_user.reporting_currency)
+    balance_statement = fx.join(
+        select(
+            func.coalesce(func.sum(fx.value), 0),
+            func.count(Movement.id),
+            fx.unconverted,
+        )
+        .select_from(Movement)
+        .where(Movement.user_id == current_user.id)
+    )
+    total_balance, num_movements, unconverted = db.exec(balance_statement).one()
+    require_rates(unconverted)
+    num_categories = db.exec(
+        select(func.count(Category.id)).where(Category.user_id == current_user.id)
+    ).one()
 
     return UserDashboard(
         balance=total_balance,
+        currency=current_user.reporting_currency,
         num_categories=num_categories,
         num_movements=num_movements,
     )
@@ -243,6 +314,7 @@ async def read_own_items(
     "/me/minijobs_balance/",
     response_model=MinijobsBalanceSummary,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def read_minijobs_balance(
     current_user: Annotated[User, Depends(get_current_active_user)], db: SessionDep
@@ -250,26 +322,29 @@ async def read_minijobs_balance(
     """
     Endpoint to retrieve the user's balance for minijobs,
     for the current month and year.
+
+    The minijob earnings limit is set in EURO, so this balance
+    is always converted to EURO regardless of the reporting currency.
     """
     now = datetime.now()
+    fx = FxConversion(CurrencyType.euro)
     minijobs_statement = (
-        select(Movement)
-        .join(Category)
-        .where(Category.category_type == "Minijob")
+        fx.join(
+            select(func.coalesce(func.sum(fx.value), 0), fx.unconverted)
+            .select_from(Movement)
+            .join(Category)
+        )
+        .where(Category.category_type == CategoryType.minijob)
         .where(Movement.user_id == current_user.id)
         .where(extract("month", Movement.movement_date) == now.month)
         .where(extract("year", Movement.movement_date) == now.year)
     )
-    minijobs_query = db.exec(minijobs_statement).all()
-
-    minijobs_movements_current_month = [
-        MovementPublic.model_validate(mv) for mv in minijobs_query
-    ]
-
-    minijobs_balance = sum(mv.value for mv in minijobs_movements_current_month)
+    minijobs_balance, unconverted = db.exec(minijobs_statement).one()
+    require_rates(unconverted)
 
     return MinijobsBalanceSummary(
         minijobs_balance=minijobs_balance,
+        currency=CurrencyType.euro,
         max_earnings="556€",
         current_month=calendar.month_name[now.month],
         current_year=now.year,
@@ -280,6 +355,7 @@ async def read_minijobs_balance(
     "/me/{category_type}/balance/",
     response_model=CategoryTypeBalanceSummary,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
 )
 async def read_category_balance(
     category_type: CategoryType,
@@ -288,32 +364,59 @@ async def read_category_balance(
 ):
     """
     Endpoint to retrieve the user's overall balance for a specific
-    category type for the current month and year.
+    category type for the current month and year, in the user's
+    reporting currency.
     """
     now = datetime.now()
+    fx = FxConversion(current_user.reporting_currency)
     category_statement = (
-        select(Movement)
-        .join(Category)
+        fx.join(
+            select(func.coalesce(func.sum(fx.value), 0), fx.unconverted)
+            .select_from(Movement)
+            .join(Category)
+        )
         .where(Category.category_type == category_type)
         .where(Movement.user_id == current_user.id)
         .where(extract("month", Movement.movement_date) == now.month)
         .where(extract("year", Movement.movement_date) == now.year)
     )
-    category_query = db.exec(category_statement).all()
-
-    category_movements = [
-        MovementPublic.model_validate(movement) for movement in category_query
-    ]
-    category_balance = sum(mv.value for mv in category_movements)
+    category_balance, unconverted = db.exec(category_statement).one()
+    require_rates(unconverted)
 
     return CategoryTypeBalanceSummary(
         category_type=str(category_type),
         balance=category_balance,
+        currency=current_user.reporting_currency,
         current_month=calendar.month_name[now.month],
         current_year=now.year,
     )
 
 
+@router.get(
+    "/me/overview",
+    response_model=UserOverview,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(etag_guard), Depends(cache_guard)],
+)
+async def read_overview(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+    latest: int = Query(
+        5, ge=0, le=50, description="Number of latest movements to include"
+    ),
+):
+    """
+    Endpoint to retrieve everything the dashboard shows in one request:
+    overall balance and counts, the current month balance of every
+    category type, the minijob earnings left this month and the
+    latest movements.
+
+    Built from one GROUP BY query plus one limited select, instead of
+    the dashboard call and one balance call per category type.
+    """
+    return user_overview(db, current_user, date.today(), latest)
+
+
 @router.get("/me/insights", status_code=status.HTTP_200_OK)
 async def read_insights(
     current_user: Annotated[User, Depends(get_current_active_user)], db: SessionDep
@@ -325,6 +428,10 @@ async def read_insights(
     can provide insights such as spending patterns,
     income sources, and financial trends for the last
     three months.
+    Identical concurrent requests share a single computation.
     """
-    insights_text = generate_financial_insights(current_user, db)
+    key = (current_user.id, current_user.data_version, date.today())
+    insights_text = await insights_flight.run(
+        key, generate_financial_insights, current_user, db
+    )
     return {"insights": insights_text}
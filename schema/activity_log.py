@@ -12,11 +12,16 @@ with an activity log is deleted, the activity log
 will also be deleted.
 
 * Each activity log is associated with a movement.
+* Descriptions are full-text indexed: a GIN index over
+to_tsvector('simple', description) on PostgreSQL, and an FTS5
+table kept in sync by triggers on SQLite (local/test databases).
+See services/text_search.py for the matching queries.
 """
 
 from __future__ import annotations
-from typing import Optional, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import DDL, Index, event, text
 from sqlalchemy.orm import relationship
 
 
@@ -37,7 +42,20 @@ class ActivityLogUpdate(SQLModel):
     description: str = Field(min_length=1, nullable=False)
 
 
+class ActivityLogBatch(SQLModel):
+    found: List[ActivityLogPublic]
+    missing: List[int]
+
+
 class ActivityLog(ActivityLogBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_activitylog_description_fts",
+            text("to_tsvector('simple'::regconfig, description)"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
     id: Optional[int] = Field(primary_key=True, default=None)
     movement_id: int = Field(foreign_key="movement.id", unique=True)
 
@@ -50,3 +68,34 @@ class ActivityLog(ActivityLogBase, table=True):
             "Movement", back_populates="activity_log", uselist=False
         ),
     )
+
+
+# SQLite full-text index: an external content FTS5 table over
+# activitylog.description, kept in sync by triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS activitylog_fts USING fts5("
+    "description, content='activitylog', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS activitylog_fts_insert AFTER INSERT ON activitylog "
+    "BEGIN INSERT INTO activitylog_fts(rowid, description) "
+    "VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS activitylog_fts_delete AFTER DELETE ON activitylog "
+    "BEGIN INSERT INTO activitylog_fts(activitylog_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS activitylog_fts_update AFTER UPDATE ON activitylog "
+    "BEGIN INSERT INTO activitylog_fts(activitylog_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO activitylog_fts(rowid, description) "
+    "VALUES (new.id, new.description); END",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(
+        ActivityLog.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    ActivityLog.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS activitylog_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,49 @@
+"""
+Batch Schema
+
+A batch request (POST /batch) carries several read requests against
+the API, executed in a single HTTP round trip.
+
+* Each operation is a GET of an API path, query string included.
+* The optional `id` of an operation is echoed back in its result,
+so clients can match results without relying on their order.
+* Results hold the status code, headers and JSON body that the
+path would have returned on its own.
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import field_validator
+from sqlmodel import Field, SQLModel
+
+BATCH_MAX_OPERATIONS = 20
+
+
+class BatchOperation(SQLModel):
+    id: Optional[str] = Field(default=None, max_length=100)
+    method: Literal["GET"] = "GET"
+    path: str = Field(max_length=2000)
+
+    @field_validator("path")
+    @classmethod
+    def check_absolute_path(cls, path: str) -> str:
+        if not path.startswith("/"):
+            raise ValueError("path must start with /")
+        return path
+
+
+class BatchRequest(SQLModel):
+    operations: List[BatchOperation] = Field(
+        min_length=1, max_length=BATCH_MAX_OPERATIONS
+    )
+
+
+class BatchOperationResult(SQLModel):
+    id: Optional[str] = None
+    status_code: int
+    headers: Dict[str, str]
+    body: Any = None
+
+
+class BatchResponse(SQLModel):
+    results: List[BatchOperationResult]
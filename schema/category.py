@@ -8,6 +8,7 @@ for their transactions*.
 from __future__ import annotations
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import Index, text
 from sqlalchemy.orm import relationship, Mapped
 
 from schema.enums import CategoryType
@@ -31,7 +32,39 @@ class CategoryPublic(CategoryBase):
     id: int
 
 
+class CategoryMerge(SQLModel):
+    source_ids: List[int] = Field(min_length=1)
+    target_id: int
+
+
+class CategoryMergeResult(SQLModel):
+    target: CategoryPublic
+    merged_category_ids: List[int]
+    moved_movements: int
+
+
+class CategoryBatch(SQLModel):
+    found: List[CategoryPublic]
+    missing: List[int]
+
+
 class Category(CategoryBase, table=True):
+    __table_args__ = (
+        Index("ix_category_user_id_category_type", "user_id", "category_type"),
+        # Serves the counterparty prefix queries of /categories/suggest,
+        # compared in byte order (the C collation on PostgreSQL)
+        Index(
+            "ix_category_user_id_counterparty_lower",
+            "user_id",
+            text("lower(counterparty)"),
+        ).ddl_if(dialect="sqlite"),
+        Index(
+            "ix_category_user_id_counterparty_lower",
+            "user_id",
+            text('(lower(counterparty) COLLATE "C")'),
+        ).ddl_if(dialect="postgresql"),
+    )
+
     id: Optional[int] = Field(primary_key=True, default=None)
     user_id: int = Field(foreign_key="user.id")
 
@@ -0,0 +1,54 @@
+"""
+Change Log Schema
+
+Append-only log of the changes made to each user's data, used by
+the delta sync endpoint (routers/sync.py) so clients only download
+what changed since their last sync.
+
+* Every create, update and delete of a category, movement, planned
+expense or activity log appends one row, written in the same
+transaction as the change itself (see services/change_log.py).
+* `seq` increases with every change, clients keep the last `seq`
+they have seen and ask for the changes after it.
+* Rows are never updated. They are only deleted with the account.
+
+The sync response (SyncResponse) holds the current state of every
+entity changed after `since`, and the entities deleted since then.
+"""
+
+from __future__ import annotations
+from typing import List, Optional
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+from schema.activity_log import ActivityLogPublic
+from schema.category import CategoryPublic
+from schema.enums import ChangeEntity, ChangeOperation
+from schema.movement import MovementPublic
+from schema.planned_expense import PlannedExpensePublic
+
+
+class ChangeLog(SQLModel, table=True):
+    __tablename__ = "change_log"
+    __table_args__ = (Index("ix_change_log_user_id_seq", "user_id", "seq"),)
+
+    seq: Optional[int] = Field(primary_key=True, default=None)
+    user_id: int = Field(nullable=False)
+    entity: ChangeEntity = Field(nullable=False)
+    entity_id: int = Field(nullable=False)
+    operation: ChangeOperation = Field(nullable=False)
+
+
+class SyncDeletion(SQLModel):
+    entity: ChangeEntity
+    id: int
+
+
+class SyncResponse(SQLModel):
+    seq: int = Field(description="Pass as `since` on the next sync")
+    has_more: bool = Field(description="More changes are waiting after `seq`")
+    categories: List[CategoryPublic] = Field(default_factory=list)
+    movements: List[MovementPublic] = Field(default_factory=list)
+    planned_expenses: List[PlannedExpensePublic] = Field(default_factory=list)
+    activity_logs: List[ActivityLogPublic] = Field(default_factory=list)
+    deleted: List[SyncDeletion] = Field(default_factory=list)
@@ -30,3 +30,16 @@ class FrequencyType(str, enum.Enum):
     biannually = "Biannually"
     yearly = "Yearly"
     one_time = "One Time"
+
+
+class ChangeEntity(str, enum.Enum):
+    category = "category"
+    movement = "movement"
+    planned_expense = "planned_expense"
+    activity_log = "activity_log"
+
+
+class ChangeOperation(str, enum.Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
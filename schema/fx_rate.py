@@ -0,0 +1,28 @@
+"""
+FX Rate Schema
+
+Daily exchange rates used to convert movements recorded in
+different currencies into the user's reporting currency.
+
+Rates are loaded from a local file (see services/fx_rates.py),
+the application never fetches them over the network.
+
+* Rates are quoted against the EURO: `rate` is the amount of
+`currency` that one EURO buys on `rate_date`.
+* There is one row per currency and calendar day, gaps in the
+source file (weekends, bank holidays) are filled on load with
+the previous known rate, so movements can be joined on their date.
+"""
+
+from datetime import date
+from sqlmodel import Field, SQLModel
+
+from schema.enums import CurrencyType
+
+
+class FxRate(SQLModel, table=True):
+    __tablename__ = "fx_rate"
+
+    rate_date: date = Field(primary_key=True)
+    currency: CurrencyType = Field(primary_key=True)
+    rate: float = Field(nullable=False, gt=0)
@@ -0,0 +1,29 @@
+"""
+Idempotency Record Schema
+
+Responses of write endpoints called with an `Idempotency-Key`
+header, so a retried request returns the stored response instead
+of running the transaction again (see services/idempotency.py).
+
+* Keys are scoped by user: (user_id, key) is the primary key.
+* `request_hash` fingerprints the method, path and body, a key
+reused for a different request is rejected.
+* A record without `status_code` marks a request still in progress.
+* Records expire after IDEMPOTENCY_TTL seconds.
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Text
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    __tablename__ = "idempotency_record"
+
+    user_id: int = Field(primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(nullable=False, max_length=64)
+    status_code: Optional[int] = Field(default=None)
+    response_body: Optional[str] = Field(default=None, sa_type=Text)
+    created_at: datetime = Field(nullable=False, index=True)
@@ -0,0 +1,71 @@
+"""
+Money types shared by the app schemas.
+
+Amounts are exposed as `Decimal` with two decimal places in the API
+models, and stored in the database as integer minor units (cents)
+in a BIGINT column, so SUM() and comparisons stay exact in SQL.
+
+    * Money: Decimal annotated type for schema fields. It rounds input
+    to cents and is serialized as a JSON number, keeping the JSON
+    contract of the former float fields.
+    * MoneyCents: SQLAlchemy column type converting between Decimal
+    amounts and integer cents.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated
+
+from pydantic import AfterValidator, PlainSerializer
+from sqlalchemy import BigInteger, Numeric
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+
+def to_money(value) -> Decimal:
+    """
+    Rounds an amount (Decimal, int, float or str) to cents.
+    Floats go through str() to avoid binary representation noise.
+    """
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+Money = Annotated[
+    Decimal,
+    AfterValidator(to_money),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
+
+class MoneyCents(TypeDecorator):
+    """
+    Stores a Decimal amount as integer cents.
+
+    Python values compared with the column (e.g. `Movement.value >= 10`)
+    are converted to cents too. Arithmetic with plain numbers is left
+    untouched, so `Movement.value * 2` doubles the stored cents.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(to_money(value) * 100)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # Aggregates over converted amounts may come back as float/Decimal
+        if not isinstance(value, int):
+            value = int(Decimal(str(value)).quantize(Decimal(1), ROUND_HALF_UP))
+        return Decimal(value).scaleb(-2)
+
+    def coerce_compared_value(self, op, value):
+        if op in (operators.mul, operators.truediv, operators.floordiv):
+            return Numeric()
+        return self
@@ -8,24 +8,36 @@ from that user.
 * Each User and Category can have multiple transactions.
 * Each transaction can optionally have an activity log for
 tracking changes or notes.
+* List endpoints can embed the category and the activity log
+of each transaction (MovementWithDetails), and be filtered with
+the MovementFilters query parameters.
+* Transactions can be updated or deleted in bulk, selecting them
+with MovementBulkFilter (MovementBulkUpdate, MovementBulkDelete).
 
 Value represents the amount of the transaction, which will be
 negative for Categories of type "Expenses" and positive for
 Categories of type "Minijob", "Freelance", or "Commission".
+It is handled as a Decimal and stored as integer cents
+(see schema/money.py).
 """
 
 from __future__ import annotations
 from datetime import date
-from typing import Optional, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
+from pydantic import model_validator
 from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship, Mapped
 
-from schema.enums import PaymentMethodType, CurrencyType
+from schema.activity_log import ActivityLogPublic
+from schema.category import CategoryPublic
+from schema.enums import CategoryType, PaymentMethodType, CurrencyType
+from schema.money import Money, MoneyCents
 
 
 class MovementBase(SQLModel):
     movement_date: date = Field(nullable=False)
-    value: float = Field(nullable=False)
+    value: Money = Field(nullable=False, sa_type=MoneyCents)
     currency: CurrencyType
     payment_method: PaymentMethodType
 
@@ -36,7 +48,7 @@ class MovementCreate(MovementBase):
 
 class MovementUpdate(SQLModel):
     movement_date: Optional[date] = Field(default=None)
-    value: Optional[float] = Field(default=None)
+    value: Optional[Money] = Field(default=None)
     currency: Optional[CurrencyType] = Field(default=None)
     payment_method: Optional[PaymentMethodType] = Field(default=None)
     category_id: Optional[int] = None
@@ -46,7 +58,104 @@ class MovementPublic(MovementBase):
     id: int
 
 
+class MovementWithDetails(MovementPublic):
+    category: Optional[CategoryPublic] = None
+    activity_log: Optional[ActivityLogPublic] = None
+
+
+class MovementBatch(SQLModel):
+    found: List[MovementPublic]
+    missing: List[int]
+
+
+class ActivityLogMatch(ActivityLogPublic):
+    rank: float
+    movement: MovementPublic
+
+
+class MovementFilters(SQLModel):
+    date_from: Optional[date] = Field(default=None, description="From this date on")
+    date_to: Optional[date] = Field(default=None, description="Up to this date")
+    min_value: Optional[Money] = Field(default=None, description="Minimum value")
+    max_value: Optional[Money] = Field(default=None, description="Maximum value")
+    currency: Optional[CurrencyType] = None
+    payment_method: Optional[PaymentMethodType] = None
+    category_type: Optional[CategoryType] = None
+    counterparty: Optional[str] = Field(
+        default=None, description="Counterparty name (case insensitive)"
+    )
+    q: Optional[str] = Field(
+        default=None, min_length=1, description="Text in the activity log notes"
+    )
+
+
+class MovementBulkFilter(SQLModel):
+    ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=1000)
+    date_from: Optional[date] = Field(default=None, description="From this date on")
+    date_to: Optional[date] = Field(default=None, description="Up to this date")
+    category_id: Optional[int] = None
+    currency: Optional[CurrencyType] = None
+    payment_method: Optional[PaymentMethodType] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would select every movement of the user
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("At least one filter is required.")
+        return self
+
+
+class MovementBulkChanges(SQLModel):
+    movement_date: Optional[date] = None
+    currency: Optional[CurrencyType] = None
+    payment_method: Optional[PaymentMethodType] = None
+    category_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("At least one change is required.")
+        return self
+
+
+class MovementBulkUpdate(SQLModel):
+    filters: MovementBulkFilter
+    changes: MovementBulkChanges
+    dry_run: bool = False
+
+
+class MovementBulkDelete(SQLModel):
+    filters: MovementBulkFilter
+    dry_run: bool = False
+
+
+class MovementBulkResult(SQLModel):
+    movements: int
+    activity_logs: int = 0
+    dry_run: bool
+
+
 class Movement(MovementBase, table=True):
+    # Composite indexes serving the listing filters, see
+    # services/movement_listing.py for which filter uses which index
+    __table_args__ = (
+        Index("ix_movement_user_id_movement_date", "user_id", "movement_date"),
+        Index("ix_movement_user_id_value", "user_id", "value"),
+        Index(
+            "ix_movement_user_id_currency_movement_date",
+            "user_id",
+            "currency",
+            "movement_date",
+        ),
+        Index(
+            "ix_movement_user_id_payment_method_movement_date",
+            "user_id",
+            "payment_method",
+            "movement_date",
+        ),
+        Index("ix_movement_category_id_movement_date", "category_id", "movement_date"),
+    )
+
     id: Optional[int] = Field(primary_key=True, default=None)
     user_id: int = Field(foreign_key="user.id")
     category_id: int = Field(foreign_key="category.id")
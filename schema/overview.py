@@ -0,0 +1,55 @@
+"""
+Dashboard Overview Schema
+
+Everything the dashboard page shows, returned by a single request
+(GET /users/me/overview):
+
+* The overall balance and the number of categories and movements.
+* Per category type, its categories, movements, overall balance and
+balance of the current month.
+* The minijob earnings of the current month, in EURO, and how much
+is left before the monthly minijob limit.
+* The latest movements, with their category.
+
+Balances are in the user's reporting currency, except the minijob
+earnings, since the limit is set in EURO.
+"""
+
+from __future__ import annotations
+from decimal import Decimal
+from typing import List
+from sqlmodel import Field, SQLModel
+
+from schema.enums import CategoryType, CurrencyType
+from schema.money import Money
+from schema.movement import MovementWithDetails
+
+# Monthly earnings limit of a minijob, in EURO
+MINIJOB_MAX_EARNINGS = Decimal("556.00")
+
+
+class CategoryTypeOverview(SQLModel):
+    category_type: CategoryType
+    num_categories: int = 0
+    num_movements: int = 0
+    balance: Money = Field(default=Decimal("0.00"))
+    month_balance: Money = Field(default=Decimal("0.00"))
+
+
+class MinijobHeadroom(SQLModel):
+    earnings: Money = Field(default=Decimal("0.00"))
+    max_earnings: Money = Field(default=MINIJOB_MAX_EARNINGS)
+    headroom: Money = Field(default=MINIJOB_MAX_EARNINGS)
+    currency: CurrencyType = Field(default=CurrencyType.euro)
+
+
+class UserOverview(SQLModel):
+    currency: CurrencyType
+    balance: Money = Field(default=Decimal("0.00"))
+    num_categories: int = 0
+    num_movements: int = 0
+    current_month: str
+    current_year: int
+    category_types: List[CategoryTypeOverview]
+    minijob: MinijobHeadroom
+    latest_movements: List[MovementWithDetails]
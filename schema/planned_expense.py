@@ -17,11 +17,12 @@ from typing import Optional, TYPE_CHECKING
 from sqlalchemy.orm import relationship, Mapped
 
 from schema.enums import CurrencyType, FrequencyType
+from schema.money import Money, MoneyCents
 
 
 class PlannedExpenseBase(SQLModel):
     approx_date: date = Field(nullable=False)
-    value: float = Field(nullable=False)
+    value: Money = Field(nullable=False, sa_type=MoneyCents)
     currency: CurrencyType = Field(nullable=False)
     frequency: FrequencyType = Field(nullable=False)
     description: str = Field(min_length=1)
@@ -33,7 +34,7 @@ class PlannedExpenseCreate(PlannedExpenseBase):
 
 class PlannedExpenseUpdate(SQLModel):
     approx_date: Optional[date] = Field(default=None)
-    value: Optional[float] = Field(default=None)
+    value: Optional[Money] = Field(default=None)
     currency: Optional[CurrencyType] = Field(default=None)
     frequency: Optional[FrequencyType] = Field(default=None)
     description: Optional[str] = Field(default=None, min_length=1)
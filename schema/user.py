@@ -3,7 +3,7 @@ User schema definitions.
 
 Users can:
 - Create an account with a name, email, and password.
-- Update their name and email.
+- Update their name, email and reporting currency.
 - Update their password.
 - Retrieve their public profile without the password.
 - Have multiple categories, transactions, and planned
@@ -13,10 +13,15 @@ expenses associated with them.
 from __future__ import annotations
 
 import calendar
+from datetime import datetime
+from decimal import Decimal
 from sqlmodel import Field, Relationship, SQLModel
 from typing import List, Optional, TYPE_CHECKING
 from sqlalchemy.orm import Mapped, relationship
 
+from schema.enums import CurrencyType
+from schema.money import Money
+
 if TYPE_CHECKING:
     from schema.category import Category
     from schema.movement import Movement
@@ -26,6 +31,7 @@ if TYPE_CHECKING:
 class UserBase(SQLModel):
     name: str = Field(nullable=False, unique=True)
     email: str = Field(nullable=False, unique=True)
+    reporting_currency: CurrencyType = Field(default=CurrencyType.euro)
 
 
 class UserPublic(UserBase):
@@ -39,6 +45,7 @@ class UserCreate(UserBase):
 class UserNameEmailUpdate(UserBase):
     name: Optional[str] = None
     email: Optional[str] = None
+    reporting_currency: Optional[CurrencyType] = None
 
 
 class UserPasswordUpdate(SQLModel):
@@ -52,7 +59,8 @@ class UserDeleteConfirmation(SQLModel):
 
 
 class MinijobsBalanceSummary(SQLModel):
-    minijobs_balance: float = Field(default=0.0)
+    minijobs_balance: Money = Field(default=Decimal("0.00"))
+    currency: CurrencyType = Field(default=CurrencyType.euro)
     max_earnings: str = Field(default="556€")
     current_month: str
     current_year: int
@@ -60,13 +68,15 @@ class MinijobsBalanceSummary(SQLModel):
 
 class CategoryTypeBalanceSummary(SQLModel):
     category_type: str
-    balance: float = Field(default=0.0)
+    balance: Money = Field(default=Decimal("0.00"))
+    currency: CurrencyType = Field(default=CurrencyType.euro)
     current_month: str
     current_year: int
 
 
 class UserDashboard(SQLModel):
-    balance: float = Field(default=0.0)
+    balance: Money = Field(default=Decimal("0.00"))
+    currency: CurrencyType = Field(default=CurrencyType.euro)
     num_categories: int = Field(default=0)
     num_movements: int = Field(default=0)
 
@@ -74,6 +84,12 @@ class UserDashboard(SQLModel):
 class User(UserBase, table=True):
     id: Optional[int] = Field(primary_key=True, default=None)
     password: str
+    # Set when the account is deleted, its data is purged in the background
+    # (see services/account_deletion.py)
+    deleted_at: Optional[datetime] = Field(default=None)
+    # Bumped by every change to the user's data, used for ETags
+    # (see services/etag.py)
+    data_version: int = Field(default=0, nullable=False)
 
     categories: Mapped[List["Category"]] = Relationship(
         back_populates="user",
@@ -0,0 +1,106 @@
+"""
+Account deletion.
+
+Deleting a user through the ORM cascades loads every category,
+movement, planned expense and activity log of the account into
+memory first. Instead, DELETE /users/me only marks the user as
+deleted (the `deleted_at` tombstone, which already blocks every
+login and token), and the data is purged after the response is sent:
+
+    * purge_user: deletes the account data with set-based DELETE
+    statements over batches of PURGE_BATCH_SIZE ids, children first,
+    committing after every batch so locks are held briefly. The user
+    row goes last, so an interrupted purge can simply be run again.
+    * purge_deleted_users: purges every tombstoned user, for purges
+    interrupted by a restart. Run it with:
+
+        python -m services.account_deletion
+"""
+
+import os
+
+from sqlalchemy import Engine
+from sqlmodel import Session, delete, select
+
+from config.database import engine
+from schema.activity_log import ActivityLog
+from schema.category import Category
+from schema.change_log import ChangeLog
+from schema.idempotency import IdempotencyRecord
+from schema.movement import Movement
+from schema.planned_expense import PlannedExpense
+from schema.user import User
+
+PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", 5000))
+
+
+def _delete_in_batches(session: Session, model, ids_statement) -> int:
+    """
+    Deletes the rows of `model` whose ids are returned by
+    `ids_statement`, PURGE_BATCH_SIZE ids at a time.
+    """
+    deleted = 0
+    while True:
+        ids = session.exec(ids_statement.limit(PURGE_BATCH_SIZE)).all()
+        if not ids:
+            return deleted
+        session.exec(delete(model).where(model.id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
+
+
+def purge_user(user_id: int, bind: Engine = engine) -> dict[str, int]:
+    """
+    Deletes a user and all their data, returning the number of
+    deleted rows per table.
+    """
+    with Session(bind) as session:
+        counts = {
+            "activity_logs": _delete_in_batches(
+                session,
+                ActivityLog,
+                select(ActivityLog.id)
+                .join(Movement, Movement.id == ActivityLog.movement_id)
+                .where(Movement.user_id == user_id),
+            ),
+            "movements": _delete_in_batches(
+                session,
+                Movement,
+                select(Movement.id).where(Movement.user_id == user_id),
+            ),
+            "planned_expenses": _delete_in_batches(
+                session,
+                PlannedExpense,
+                select(PlannedExpense.id).where(PlannedExpense.user_id == user_id),
+            ),
+            "categories": _delete_in_batches(
+                session,
+                Category,
+                select(Category.id).where(Category.user_id == user_id),
+            ),
+        }
+        session.exec(
+            delete(IdempotencyRecord).where(IdempotencyRecord.user_id == user_id)
+        )
+        session.exec(delete(ChangeLog).where(ChangeLog.user_id == user_id))
+        session.exec(delete(User).where(User.id == user_id))
+        session.commit()
+    return counts
+
+
+def purge_deleted_users(bind: Engine = engine) -> list[int]:
+    """
+    Purges every user marked as deleted, returning their ids.
+    """
+    with Session(bind) as session:
+        user_ids = session.exec(
+            select(User.id).where(User.deleted_at.is_not(None))
+        ).all()
+    for user_id in user_ids:
+        purge_user(user_id, bind)
+    return list(user_ids)
+
+
+if __name__ == "__main__":
+    purged = purge_deleted_users()
+    print(f"Purged {len(purged)} deleted user account(s).")
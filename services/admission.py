@@ -0,0 +1,230 @@
+"""
+Admission control and load shedding, per worker process.
+
+At most ADMISSION_MAX_IN_FLIGHT requests run at once in a worker, the
+size of the database connection pool (5 connections plus 10 overflow
+by default), so requests wait for a connection in the queue of the
+controller, without blocking the event loop, instead of in the pool.
+The time checkouts still wait in the pool (config/database.py,
+TimedQueuePool) is exported next to the queueing delay: a growing
+db_pool_wait_seconds means the pool is smaller than the in-flight cap.
+Queued requests are admitted by priority, then in arrival order:
+
+    * high: authentication, metrics and static files. Never queued
+    nor rejected, they do not hold a database connection for long.
+    * normal: every other route, mostly cheap reads and writes.
+    * low: expensive routes (insights, export, bulk updates, category
+    merges, batches).
+
+The queueing delay is the time the oldest queued request has been
+waiting. Once it exceeds ADMISSION_TARGET_DELAY_MS, new low priority
+requests are rejected right away with 503 Service Unavailable and a
+Retry-After header, and queued low priority requests give up after
+that delay. Normal priority requests give up after
+ADMISSION_MAX_DELAY_MS. A rejected request costs no database work,
+so cheap reads keep their latency during bursts.
+
+The operations of a batch request (services/batch.py) are dispatched
+through the application again, with the batch in their scope state.
+They run within the slot of their batch and are not admitted again,
+which would make a batch wait for slots it may itself be holding.
+
+    * AdmissionMiddleware: ASGI middleware admitting or rejecting
+    every HTTP request.
+    * AdmissionController: the in-flight count and the queues.
+    * admission_metrics: counters of the worker, and the connections
+    checked out of the pool and the time spent waiting for them,
+    exposed by GET /metrics.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Callable
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config.database import TimedQueuePool, engine
+
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", 15))
+ADMISSION_TARGET_DELAY_MS = int(os.environ.get("ADMISSION_TARGET_DELAY_MS", 100))
+ADMISSION_MAX_DELAY_MS = int(os.environ.get("ADMISSION_MAX_DELAY_MS", 2000))
+
+
+class Priority(IntEnum):
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
+HIGH_PRIORITY_PREFIXES = ("/auth/", "/metrics", "/static/")
+LOW_PRIORITY_PREFIXES = (
+    "/users/me/insights",
+    "/movements/export",
+    "/movements/bulk_",
+    "/categories/merge",
+    "/batch",
+)
+
+
+def request_priority(path: str) -> Priority:
+    if path.startswith(HIGH_PRIORITY_PREFIXES):
+        return Priority.HIGH
+    if path.startswith(LOW_PRIORITY_PREFIXES):
+        return Priority.LOW
+    return Priority.NORMAL
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        target_delay: float = ADMISSION_TARGET_DELAY_MS / 1000,
+        max_delay: float = ADMISSION_MAX_DELAY_MS / 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_in_flight = max_in_flight
+        self.target_delay = target_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.in_flight = 0
+        self.high_in_flight = 0
+        self.queued = 0
+        # Waiters by priority: (queued_at, future), oldest first
+        self._queues: dict[Priority, deque[tuple[float, asyncio.Future]]] = {
+            Priority.NORMAL: deque(),
+            Priority.LOW: deque(),
+        }
+        self.admitted = {priority.name.lower(): 0 for priority in Priority}
+        self.shed = {priority.name.lower(): 0 for priority in Priority}
+
+    def queueing_delay(self) -> float:
+        """
+        Seconds the oldest queued request has been waiting.
+        """
+        now = self.clock()
+        delay = 0.0
+        for queue in self._queues.values():
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue:
+                delay = max(delay, now - queue[0][0])
+        return delay
+
+    def retry_after(self) -> int:
+        """
+        Seconds a rejected client should wait before retrying.
+        """
+        return max(1, math.ceil(self.queueing_delay()))
+
+    async def acquire(self, priority: Priority) -> bool:
+        """
+        Waits for a slot, returns False when the request is rejected.
+        """
+        key = priority.name.lower()
+        if priority == Priority.HIGH:
+            self.high_in_flight += 1
+            self.admitted[key] += 1
+            return True
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self.admitted[key] += 1
+            return True
+        if priority == Priority.LOW:
+            if self.queueing_delay() > self.target_delay:
+                self.shed[key] += 1
+                return False
+            timeout = self.target_delay
+        else:
+            timeout = self.max_delay
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append((self.clock(), future))
+        self.queued += 1
+        try:
+            # shield: the timeout must not cancel a slot handed over meanwhile
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.queued -= 1
+                self.shed[key] += 1
+                return False
+        except asyncio.CancelledError:
+            if future.done():
+                self.release(priority)
+            else:
+                future.cancel()
+                self.queued -= 1
+            raise
+        self.admitted[key] += 1
+        return True
+
+    def release(self, priority: Priority):
+        """
+        Frees the slot of an admitted request, handing it to the next
+        queued request, if any.
+        """
+        if priority == Priority.HIGH:
+            self.high_in_flight -= 1
+            return
+        for queued_priority in (Priority.NORMAL, Priority.LOW):
+            queue = self._queues[queued_priority]
+            while queue:
+                _, future = queue.popleft()
+                if not future.done():
+                    # The slot goes to the waiter, in_flight is unchanged
+                    future.set_result(None)
+                    self.queued -= 1
+                    return
+        self.in_flight -= 1
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self.in_flight + self.high_in_flight,
+            "queued": self.queued,
+            "queueing_delay_ms": round(self.queueing_delay() * 1000, 1),
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+        }
+
+
+admission_controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self, app: ASGIApp, controller: AdmissionController = admission_controller
+    ):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope.get("state", {}).get("batch"):
+            await self.app(scope, receive, send)
+            return
+        priority = request_priority(scope["path"])
+        if not await self.controller.acquire(priority):
+            response = JSONResponse(
+                {"detail": "The server is busy, please retry later."},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority)
+
+
+def admission_metrics() -> dict:
+    metrics = admission_controller.metrics()
+    if isinstance(engine.pool, TimedQueuePool):
+        metrics["db_pool_checked_out"] = engine.pool.checkedout()
+        metrics.update(engine.pool.wait_metrics())
+    return metrics
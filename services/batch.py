@@ -0,0 +1,128 @@
+"""
+Execution of the operations of a batch request (routers/batch.py).
+
+Every operation is dispatched through the application itself, as an
+in-process ASGI request, so it goes through the same routing,
+validation, guards and caches as a request of its own.
+
+Operations are dispatched concurrently and share what the batch
+already did:
+
+    * authentication: `get_current_user` returns the user of the
+    batch instead of decoding the token and loading the user again.
+    * the database session: `get_session` hands the session of the
+    batch to one operation at a time, since a session (and its
+    connection) can only run one query at a time. The database work
+    of the operations is thus serialized, a batch holds a single
+    connection of the pool whatever its number of operations.
+
+An operation raising an error is logged and gets a 500 result, the
+other operations of the batch are not affected.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+
+from fastapi import Request
+from sqlmodel import Session
+
+from schema.batch import BatchOperation, BatchOperationResult
+from schema.user import User
+
+# Request headers passed on to the operations. Conditional and
+# encoding headers are left out, every result carries its full body.
+FORWARDED_HEADERS = {b"authorization", b"cookie", b"user-agent", b"accept-language"}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchContext:
+    user: User
+    session: Session
+    session_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+def _operation_scope(request: Request, operation: BatchOperation, context) -> dict:
+    path, _, query = operation.path.partition("?")
+    return {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": operation.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [
+            (name, value)
+            for name, value in request.scope["headers"]
+            if name in FORWARDED_HEADERS
+        ],
+        "state": {**request.scope.get("state", {}), "batch": context},
+    }
+
+
+async def run_operation(
+    request: Request, operation: BatchOperation, context: BatchContext
+) -> BatchOperationResult:
+    """
+    Runs one operation through the application and collects its response.
+    """
+    response = {"status": 500, "headers": [], "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await request.app(_operation_scope(request, operation, context), receive, send)
+    except Exception as e:
+        logger.exception("Error in batch operation %s", operation.path)
+        detail = f"Batch operation failed: {type(e).__name__}"
+        response = {
+            "status": 500,
+            "headers": [],
+            "body": json.dumps({"detail": detail}).encode(),
+        }
+
+    headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in response["headers"]
+        if name not in (b"content-length", b"content-type")
+    }
+    body = response["body"]
+    if body:
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = body.decode("utf-8", errors="replace")
+    elif response["status"] >= 500:
+        body = {"detail": "Internal Server Error"}
+    else:
+        body = None
+    return BatchOperationResult(
+        id=operation.id,
+        status_code=response["status"],
+        headers=headers,
+        body=body,
+    )
+
+
+async def run_batch(
+    request: Request, operations: list[BatchOperation], context: BatchContext
+) -> list[BatchOperationResult]:
+    return await asyncio.gather(
+        *(run_operation(request, operation, context) for operation in operations)
+    )
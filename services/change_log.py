@@ -0,0 +1,175 @@
+"""
+Per-user change log and delta sync.
+
+Write endpoints record what they changed in the change_log table
+before committing, so the log entry is part of the same transaction:
+
+    db.add(category)
+    db.flush()  # assigns the id of new rows
+    record_change(db, user_id, ChangeEntity.category, category.id,
+                  ChangeOperation.create)
+    db.commit()
+
+    * record_change: logs one change.
+    * record_changes: logs the same change for every row matching
+    a WHERE clause, with a single INSERT ... SELECT (bulk endpoints).
+    Deletions must be logged before the rows are deleted.
+Both also bump the user's `data_version`, used for ETags (services/etag.py).
+
+Seqs must be committed in order: a client that synced up to seq 12
+never asks for seq 11 again. `seq` is assigned when the change_log row
+is inserted, not at commit, so the user's row is locked first (the
+`data_version` UPDATE) and the entry inserted after it. The writes of
+a user are then serialized from the allocation of their first seq to
+their commit, so the seqs of a user commit in increasing order, and
+`seq > since` never skips a change committed late. (Seqs of different
+users may still commit out of order, sync only reads one user's.)
+
+    * bump_data_version: bumps it alone, for changes to the user itself.
+    * bump_data_versions: bumps it for many users at once, for changes
+    to shared data their responses depend on (e.g. exchange rates).
+    * changes_since: builds the sync response, the current state of
+    the entities changed after a given seq plus the deleted ones.
+"""
+
+from sqlmodel import Session, insert, literal, select, update
+
+from schema.activity_log import ActivityLog, ActivityLogPublic
+from schema.category import Category, CategoryPublic
+from schema.change_log import ChangeLog, SyncDeletion, SyncResponse
+from schema.enums import ChangeEntity, ChangeOperation
+from schema.movement import Movement, MovementPublic
+from schema.planned_expense import PlannedExpense, PlannedExpensePublic
+from schema.user import User
+
+ENTITY_MODELS = {
+    ChangeEntity.category: Category,
+    ChangeEntity.movement: Movement,
+    ChangeEntity.planned_expense: PlannedExpense,
+    ChangeEntity.activity_log: ActivityLog,
+}
+# Sync response field and public model of each entity
+RESPONSE_FIELDS = {
+    ChangeEntity.category: ("categories", CategoryPublic),
+    ChangeEntity.movement: ("movements", MovementPublic),
+    ChangeEntity.planned_expense: ("planned_expenses", PlannedExpensePublic),
+    ChangeEntity.activity_log: ("activity_logs", ActivityLogPublic),
+}
+
+
+def bump_data_version(db: Session, user_id: int):
+    # Their cached responses are dropped after commit (services/response_cache.py)
+    db.info.setdefault("changed_user_ids", set()).add(user_id)
+    db.exec(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_data_versions(db: Session, user_ids: list[int]):
+    db.info.setdefault("changed_user_ids", set()).update(user_ids)
+    db.exec(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(data_version=User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_change(
+    db: Session,
+    user_id: int,
+    entity: ChangeEntity,
+    entity_id: int,
+    operation: ChangeOperation,
+):
+    # Locks the user's row before the seq is assigned (see above)
+    bump_data_version(db, user_id)
+    db.add(
+        ChangeLog(
+            user_id=user_id, entity=entity, entity_id=entity_id, operation=operation
+        )
+    )
+
+
+def record_changes(
+    db: Session,
+    user_id: int,
+    entity: ChangeEntity,
+    operation: ChangeOperation,
+    *criteria,
+):
+    """
+    Logs `operation` for every row of `entity` matching the criteria,
+    e.g. record_changes(db, user_id, ChangeEntity.movement,
+    ChangeOperation.delete, Movement.category_id == category_id)
+    """
+    bump_data_version(db, user_id)
+    columns = ChangeLog.__table__.c
+    model = ENTITY_MODELS[entity]
+    rows = select(
+        literal(user_id),
+        literal(entity, columns.entity.type),
+        model.id,
+        literal(operation, columns.operation.type),
+    ).where(*criteria)
+    db.exec(
+        insert(ChangeLog).from_select(
+            ["user_id", "entity", "entity_id", "operation"], rows
+        )
+    )
+
+
+def _owned(model, user_id: int):
+    if model is ActivityLog:
+        return ActivityLog.movement_id.in_(
+            select(Movement.id).where(Movement.user_id == user_id)
+        )
+    return model.user_id == user_id
+
+
+def changes_since(db: Session, user_id: int, since: int, limit: int) -> SyncResponse:
+    """
+    Returns the entities changed in the next `limit` change log
+    entries after `since`. Several changes of the same entity are
+    collapsed, only its current state (or its deletion) is returned.
+    """
+    entries = db.exec(
+        select(
+            ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.operation
+        )
+        .where(ChangeLog.user_id == user_id, ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for _, entity, entity_id, operation in entries:
+        latest[(entity, entity_id)] = operation
+
+    response = SyncResponse(
+        seq=entries[-1].seq if entries else since, has_more=has_more
+    )
+    changed_ids = {entity: [] for entity in ChangeEntity}
+    for (entity, entity_id), operation in latest.items():
+        if operation == ChangeOperation.delete:
+            response.deleted.append(SyncDeletion(entity=entity, id=entity_id))
+        else:
+            changed_ids[entity].append(entity_id)
+
+    for entity, ids in changed_ids.items():
+        if not ids:
+            continue
+        model = ENTITY_MODELS[entity]
+        rows = db.exec(
+            select(model)
+            .where(model.id.in_(ids), _owned(model, user_id))
+            .order_by(model.id)
+        ).all()
+        field, public_model = RESPONSE_FIELDS[entity]
+        setattr(response, field, [public_model.model_validate(row) for row in rows])
+    return response
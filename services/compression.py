@@ -0,0 +1,208 @@
+"""
+Response compression middleware.
+
+Responses are compressed with brotli (when the `brotli` package is
+installed) or gzip, whichever the client prefers in Accept-Encoding,
+brotli winning ties. Bodies smaller than COMPRESSION_MINIMUM_SIZE
+bytes, responses that already have a Content-Encoding and media
+types that are already compressed (images, archives, fonts) are sent
+as they are.
+
+Streamed responses (e.g. GET /movements/export) are compressed chunk
+by chunk, each chunk being flushed, so the client keeps receiving
+data while the export is running.
+
+Settings (environment variables):
+
+    * COMPRESSION_MINIMUM_SIZE: bytes below which bodies are not
+    compressed (default 1024).
+    * COMPRESSION_GZIP_LEVEL: gzip level, 1 (fastest) to 9 (default 6).
+    * COMPRESSION_BROTLI_QUALITY: brotli quality, 0 (fastest) to 11
+    (default 4, higher levels are meant for static files).
+
+Run `python -m benchmarks.compression` to compare the CPU cost and
+the size of each setting on a movement listing.
+"""
+
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 4))
+
+# Media types that do not shrink when compressed again
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+INCOMPRESSIBLE_TYPES = {"application/zip", "application/gzip", "application/x-gzip"}
+
+
+def available_encodings() -> list[str]:
+    if brotli is not None:
+        return ["br", "gzip"]
+    return ["gzip"]
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """
+    Returns the quality of every coding listed in an Accept-Encoding
+    header.
+    """
+    preferences = {}
+    for item in accept_encoding.lower().split(","):
+        coding, *parameters = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            preferences[coding] = quality
+    return preferences
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Returns the encoding to use for an Accept-Encoding header, or None
+    when the response should not be compressed.
+    """
+    preferences = accepted_encodings(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = preferences.get(encoding, preferences.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """
+    Incremental compressor of one response body.
+    """
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS writes the gzip header and trailer
+            self._zlib = zlib.compressobj(
+                gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses a chunk and flushes it, so it can be sent right away.
+        """
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """
+    Wraps the `send` of one request, deciding on the first body
+    message whether the response is compressed.
+    """
+
+    def __init__(self, send: Send, encoding: str, settings: CompressionMiddleware):
+        self._send = send
+        self.encoding = encoding
+        self.settings = settings
+        self.start_message: Message | None = None
+        self.compressor: Compressor | None = None
+        self.passthrough = False
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers or self.start_message["status"] in (204, 304):
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return not (
+            media_type in INCOMPRESSIBLE_TYPES
+            or media_type.startswith(INCOMPRESSIBLE_PREFIXES)
+        )
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held until the first body message shows the body size
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(scope=self.start_message)
+            headers.add_vary_header("Accept-Encoding")
+            too_small = not more_body and len(body) < self.settings.minimum_size
+            if too_small or not self._compressible(headers):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = Compressor(
+                self.encoding, self.settings.gzip_level, self.settings.brotli_quality
+            )
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.compressor.compress(body)
+            else:
+                message["body"] = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(message["body"]))
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        if more_body:
+            message["body"] = self.compressor.compress(body)
+        else:
+            message["body"] = self.compressor.finish(body)
+        await self._send(message)
@@ -0,0 +1,184 @@
+"""
+Counterparty autocomplete for the category picker.
+
+Suggestions are answered from an in-process prefix trie per user,
+built with one query the first time the user asks for suggestions.
+Tries are kept in a bounded LRU cache (per worker) and dropped when
+the user's categories change (see routers/categories.py), or after
+SUGGEST_CACHE_TTL seconds, which bounds staleness when the write was
+handled by another worker.
+
+Users with more than SUGGEST_TRIE_MAX_CATEGORIES categories get no
+trie, their suggestions come straight from SQL, using the
+(user_id, lower(counterparty)) index on the category table. That
+outcome is cached (and invalidated) like a trie, so their categories
+are not loaded again on every keystroke.
+
+    * CounterpartyTrie: prefix tree returning the top-k categories
+    whose counterparty starts with a prefix (case insensitive).
+    * suggest_counterparties: returns the suggestions for a user.
+    * suggestion_cache: the per-worker cache, use
+    `suggestion_cache.invalidate(user_id)` after category writes.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from sqlmodel import Session, func, select
+
+from schema.category import Category
+
+SUGGEST_TOP_K = 10
+SUGGEST_CACHE_USERS = int(os.environ.get("SUGGEST_CACHE_USERS", 1000))
+SUGGEST_CACHE_TTL = int(os.environ.get("SUGGEST_CACHE_TTL", 60))
+SUGGEST_TRIE_MAX_CATEGORIES = int(os.environ.get("SUGGEST_TRIE_MAX_CATEGORIES", 5000))
+
+
+# Cached in place of a trie for users with too many categories
+USE_SQL = object()
+
+
+class CounterpartyTrie:
+    """
+    Prefix tree over lower-cased counterparty names.
+
+    Every node keeps the first SUGGEST_TOP_K categories (in
+    alphabetical order) below it, so a lookup only walks the
+    characters of the prefix.
+    """
+
+    def __init__(self, categories: list[dict]):
+        self.root = {"children": {}, "top": []}
+        ordered = sorted(
+            categories,
+            key=lambda category: (category["counterparty"].lower(), category["id"]),
+        )
+        for category in ordered:
+            self._insert(category)
+
+    def _insert(self, category: dict):
+        node = self.root
+        self._add_to_top(node, category)
+        for character in category["counterparty"].lower():
+            node = node["children"].setdefault(character, {"children": {}, "top": []})
+            self._add_to_top(node, category)
+
+    @staticmethod
+    def _add_to_top(node: dict, category: dict):
+        # Categories are inserted in order, so the first K are the top K
+        if len(node["top"]) < SUGGEST_TOP_K:
+            node["top"].append(category)
+
+    def search(self, prefix: str, limit: int = SUGGEST_TOP_K) -> list[dict]:
+        node = self.root
+        for character in prefix.lower():
+            node = node["children"].get(character)
+            if node is None:
+                return []
+        return node["top"][:limit]
+
+
+class SuggestionCache:
+    """
+    LRU cache of CounterpartyTrie objects (or USE_SQL) by user id,
+    with a TTL.
+    """
+
+    def __init__(
+        self, max_users: int = SUGGEST_CACHE_USERS, ttl: int = SUGGEST_CACHE_TTL
+    ):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._tries: OrderedDict[int, tuple[float, CounterpartyTrie | object]] = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def get(self, user_id: int) -> CounterpartyTrie | object | None:
+        with self._lock:
+            cached = self._tries.get(user_id)
+            if cached is None:
+                return None
+            built_at, trie = cached
+            if time.monotonic() - built_at > self.ttl:
+                del self._tries[user_id]
+                return None
+            self._tries.move_to_end(user_id)
+            return trie
+
+    def put(self, user_id: int, trie: CounterpartyTrie | object):
+        with self._lock:
+            self._tries[user_id] = (time.monotonic(), trie)
+            self._tries.move_to_end(user_id)
+            while len(self._tries) > self.max_users:
+                self._tries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._tries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._tries.clear()
+
+
+suggestion_cache = SuggestionCache()
+
+
+def _category_dict(category) -> dict:
+    return {
+        "id": category.id,
+        "category_type": category.category_type,
+        "counterparty": category.counterparty,
+    }
+
+
+def _suggest_from_sql(db: Session, user_id: int, prefix: str, limit: int) -> list[dict]:
+    """
+    Prefix query served by the (user_id, lower(counterparty)) index:
+    the range condition uses the index, LIKE rechecks the prefix.
+    The range only holds in byte order, so on PostgreSQL it compares
+    with the C collation, like the index.
+    """
+    lowered = prefix.lower()
+    upper_bound = lowered[:-1] + chr(ord(lowered[-1]) + 1)
+    escaped = lowered.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    counterparty = func.lower(Category.counterparty)
+    if db.get_bind().dialect.name == "postgresql":
+        counterparty = counterparty.collate("C")
+    statement = (
+        select(Category.id, Category.category_type, Category.counterparty)
+        .where(Category.user_id == user_id)
+        .where(counterparty >= lowered, counterparty < upper_bound)
+        .where(counterparty.like(f"{escaped}%", escape="\\"))
+        .order_by(counterparty, Category.id)
+        .limit(limit)
+    )
+    return [_category_dict(row) for row in db.exec(statement).all()]
+
+
+def suggest_counterparties(
+    db: Session, user_id: int, prefix: str, limit: int
+) -> list[dict]:
+    """
+    Returns up to `limit` of the user's categories whose counterparty
+    starts with `prefix`, in alphabetical order.
+    """
+    trie = suggestion_cache.get(user_id)
+    if trie is None:
+        statement = (
+            select(Category.id, Category.category_type, Category.counterparty)
+            .where(Category.user_id == user_id)
+            .limit(SUGGEST_TRIE_MAX_CATEGORIES + 1)
+        )
+        rows = db.exec(statement).all()
+        if len(rows) > SUGGEST_TRIE_MAX_CATEGORIES:
+            trie = USE_SQL
+        else:
+            trie = CounterpartyTrie([_category_dict(row) for row in rows])
+        suggestion_cache.put(user_id, trie)
+    if trie is USE_SQL:
+        return _suggest_from_sql(db, user_id, prefix, limit)
+    return trie.search(prefix, limit)
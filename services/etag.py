@@ -0,0 +1,70 @@
+"""
+Conditional GET for per-user resources.
+
+Every user has a `data_version` counter, bumped in the same
+transaction as any change to their data (services/change_log.py).
+Read endpoints guarded with `etag_guard` answer with a weak ETag
+derived from it, and with an empty 304 Not Modified when the client
+sends that ETag back in `If-None-Match`. The check only needs the
+already authenticated user, so the endpoint's queries do not run.
+
+The ETag also holds the current date, since dashboards show
+current-month balances and daily converted amounts.
+
+Usage:
+
+    @router.get("/list", dependencies=[Depends(etag_guard)])
+
+    * etag_guard: dependency raising NotModified, or setting the ETag
+    header on the response.
+    * NotModified: handled in main.py by `not_modified_response`.
+"""
+
+from datetime import date
+from typing import Annotated
+
+from fastapi import Depends, Request, Response, status
+
+from auth.auth import get_current_active_user
+from schema.user import User
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def user_data_etag(user: User) -> str:
+    return f'W/"{user.id}-{user.data_version}-{date.today().isoformat()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Weak comparison of an ETag against an If-None-Match header value.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def etag_guard(
+    request: Request,
+    response: Response,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    etag = user_data_etag(current_user)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        raise NotModified(etag)
+    response.headers["ETag"] = etag
+
+
+def not_modified_response(request: Request, exc: NotModified) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": exc.etag}
+    )
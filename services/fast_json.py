@@ -0,0 +1,73 @@
+"""
+Fast JSON responses for large list endpoints.
+
+By default FastAPI validates every returned row against the route's
+response_model before serializing it. List endpoints that already
+build their rows from plain columns (see services/movement_listing.py)
+can opt in to skip that second validation: the rows are serialized
+as they are, with orjson when it is installed (json otherwise), and
+the response_model is only used for the documentation.
+
+The rows must already have the shape and the values of the response
+model: only the columns of the public schema, Decimal money amounts
+(serialized as JSON numbers, like `Money`), dates and enums.
+
+Usage, in an endpoint receiving the `response: Response` parameter
+(so headers set by dependencies, like the ETag, are kept):
+
+    return fast_json_response(rows_to_movements(rows, relations), response)
+
+Run `python -m benchmarks.json_serialization` to compare both paths.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializes content to compact JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_response(content: Any, response: Response) -> FastJSONResponse:
+    """
+    Returns the content as a FastJSONResponse, with the headers that
+    dependencies set on the endpoint's `response` parameter.
+    """
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name != "content-length"
+    }
+    return FastJSONResponse(
+        content, status_code=response.status_code or 200, headers=headers
+    )
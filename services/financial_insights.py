@@ -10,6 +10,7 @@ from schema.activity_log import ActivityLog
 from schema.category import Category
 from schema.movement import Movement
 from schema.user import User
+from services.fx_rates import rate_cache
 
 from google.generativeai import GenerativeModel
 import google.generativeai as genai
@@ -58,10 +59,23 @@ def generate_financial_insights(current_user: User, db: SessionDep) -> str:
         category_statement = db.get(Category, movement.category_id)
         activity_log_statement = db.get(ActivityLog, movement.id)
 
+        # Rates come from the per-worker cache, not one query per movement
+        reporting_value = rate_cache.convert(
+            db,
+            movement.value,
+            movement.currency,
+            movement.movement_date,
+            current_user.reporting_currency,
+        )
+
         movement_data = {
             "date": movement.movement_date.strftime("%Y-%m-%d"),
-            "value": movement.value,
+            "value": float(movement.value),
             "currency": movement.currency,
+            "reporting_value": (
+                float(reporting_value) if reporting_value is not None else None
+            ),
+            "reporting_currency": current_user.reporting_currency,
             "payment_method": movement.payment_method,
             "category": category_statement.category_type,
             "stakeholder": category_statement.counterparty,
@@ -88,6 +102,8 @@ def generate_financial_insights(current_user: User, db: SessionDep) -> str:
         represents a financial movement with its date, value, counterparty,
         and category. Some movements may also have an 'activity_log' with
         notes and a timestamp, providing additional context.
+        Movements can be in different currencies, use 'reporting_value'
+        (in 'reporting_currency') when adding up totals.
 
         **Instructions:**
         1.  Provide a general overview of the user's financial activity for
@@ -0,0 +1,313 @@
+"""
+Currency conversion helpers for multi-currency balances.
+
+Movements can be recorded in EURO or USD, balances are reported in
+the user's reporting currency. Rates live in the local `fx_rate`
+table (schema/fx_rate.py) and are loaded from a CSV file:
+
+    python -m services.fx_rates rates.csv
+
+The CSV needs a header with the columns `date`, `currency` and
+`rate` (units of currency per EURO), e.g. `2025-10-01,USD,1.1734`.
+
+    * FxConversion: builds the SQL expression converting
+    Movement.value to a target currency, by joining the latest
+    fx_rate on or before the movement date, so aggregates stay a
+    single query.
+    * require_rates: rejects a conversion that left movements out
+    because no rate of their currency is loaded at all.
+    * RateCache: in-memory copy of the rate table, kept once per
+    worker, for code that converts movements row by row in Python.
+    * load_rates_from_csv: loads (and gap-fills) rates into the table,
+    and bumps the data version of the users whose converted balances
+    change, so their ETags and cached responses are not served again.
+"""
+
+import argparse
+import csv
+import os
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from threading import Lock
+
+from fastapi import HTTPException, status
+from sqlalchemy import BigInteger, and_, case, func, literal, or_, type_coerce
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from schema.enums import CurrencyType
+from schema.fx_rate import FxRate
+from schema.money import MoneyCents, to_money
+from schema.movement import Movement
+from schema.user import User
+from services.change_log import bump_data_versions
+
+# EURO is the quote currency of the rate table, so its rate is always 1
+BASE_CURRENCY = CurrencyType.euro
+
+# Seconds before a worker re-reads the rate table, so rates loaded
+# by the CLI in another process are eventually picked up
+RATE_CACHE_TTL = int(os.environ.get("FX_RATE_CACHE_TTL", 3600))
+
+
+class FxConversion:
+    """
+    SQL conversion of Movement.value into a target currency.
+
+    Movements already in the target currency are returned as they are,
+    any other movement is converted through the EURO rates of its
+    movement_date and rounded to whole cents. Days without a rate
+    (e.g. after the last loaded rate) use the closest earlier rate,
+    like RateCache, and days before the first loaded rate use that
+    first rate.
+
+    Only movements of a currency without any loaded rate convert to
+    NULL, which SUM() would silently ignore: aggregates select
+    `unconverted` too and pass it to require_rates. The expression is
+    typed as MoneyCents, so aggregates over it come back as Decimal
+    amounts.
+
+    Usage:
+        fx = FxConversion(CurrencyType.usd)
+        statement = fx.join(
+            select(func.sum(fx.value), fx.unconverted).select_from(Movement)
+        )
+        total, unconverted = db.exec(statement).one()
+        require_rates(unconverted)
+    """
+
+    def __init__(self, target_currency: CurrencyType):
+        self.target_currency = target_currency
+        self.source_rate = aliased(FxRate)
+        self.target_rate = aliased(FxRate)
+
+    @property
+    def value(self):
+        source_factor = case(
+            (Movement.currency == BASE_CURRENCY, literal(1.0)),
+            else_=self.source_rate.rate,
+        )
+        if self.target_currency == BASE_CURRENCY:
+            target_factor = literal(1.0)
+        else:
+            target_factor = self.target_rate.rate
+
+        cents = type_coerce(Movement.value, BigInteger)
+        converted = case(
+            (Movement.currency == self.target_currency, cents),
+            else_=func.round(cents * target_factor / source_factor),
+        )
+        return type_coerce(converted, MoneyCents)
+
+    @property
+    def unconverted(self):
+        """
+        Aggregate counting the movements `value` converts to NULL.
+        """
+        return func.count(Movement.id).filter(self.value.is_(None))
+
+    @staticmethod
+    def _rate_date(currency):
+        """
+        Correlated subquery of the date of the latest rate of `currency`
+        on or before the movement date, or of its first rate for older
+        movements.
+        """
+        earlier = aliased(FxRate)
+        first = aliased(FxRate)
+        latest_earlier = (
+            select(func.max(earlier.rate_date))
+            .where(
+                earlier.currency == currency,
+                earlier.rate_date <= Movement.movement_date,
+            )
+            .correlate(Movement)
+            .scalar_subquery()
+        )
+        first_date = (
+            select(func.min(first.rate_date))
+            .where(first.currency == currency)
+            .correlate(Movement)
+            .scalar_subquery()
+        )
+        return func.coalesce(latest_earlier, first_date)
+
+    def join(self, statement):
+        """
+        Adds the fx_rate joins needed by `value` to a statement
+        selecting from Movement.
+        """
+        statement = statement.outerjoin(
+            self.source_rate,
+            and_(
+                self.source_rate.currency == Movement.currency,
+                self.source_rate.rate_date == self._rate_date(Movement.currency),
+            ),
+        )
+        if self.target_currency != BASE_CURRENCY:
+            statement = statement.outerjoin(
+                self.target_rate,
+                and_(
+                    self.target_rate.currency == self.target_currency,
+                    self.target_rate.rate_date == self._rate_date(self.target_currency),
+                ),
+            )
+        return statement
+
+
+def require_rates(unconverted: int):
+    """
+    Raises a 503 when `unconverted` movements (FxConversion.unconverted)
+    were left out of an aggregate for lack of any rate of their
+    currency, instead of returning a balance missing them.
+    """
+    if unconverted:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No exchange rate is loaded to convert "
+            f"{unconverted} movement(s) to the reporting currency.",
+        )
+
+
+class RateCache:
+    """
+    Per-worker, in-memory copy of the fx_rate table.
+
+    The whole table is read with a single query the first time a
+    rate is needed (and again after RATE_CACHE_TTL seconds), so
+    converting many movements in Python never queries per row.
+    Dates without a rate use the closest earlier rate, dates before
+    the first rate use the first rate, like FxConversion.
+    """
+
+    def __init__(self, ttl: int = RATE_CACHE_TTL):
+        self.ttl = ttl
+        self._dates: dict[CurrencyType, list[date]] = {}
+        self._rates: dict[CurrencyType, list[float]] = {}
+        self._loaded_at: float | None = None
+        self._lock = Lock()
+
+    def _load(self, db: Session):
+        statement = select(FxRate).order_by(FxRate.currency, FxRate.rate_date)
+        dates, rates = {}, {}
+        for fx_rate in db.exec(statement).all():
+            dates.setdefault(fx_rate.currency, []).append(fx_rate.rate_date)
+            rates.setdefault(fx_rate.currency, []).append(fx_rate.rate)
+        self._dates, self._rates = dates, rates
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self, db: Session):
+        with self._lock:
+            expired = (
+                self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+            )
+            if expired:
+                self._load(db)
+
+    def clear(self):
+        """
+        Drops the cached rates, the next lookup reloads the table.
+        """
+        with self._lock:
+            self._dates, self._rates = {}, {}
+            self._loaded_at = None
+
+    def rate(self, db: Session, currency: CurrencyType, on_date: date) -> float | None:
+        """
+        Returns the EURO rate of a currency on a given date,
+        or None if no rate of that currency is loaded.
+        """
+        if currency == BASE_CURRENCY:
+            return 1.0
+        self._ensure_loaded(db)
+        dates = self._dates.get(currency, [])
+        if not dates:
+            return None
+        index = bisect_right(dates, on_date)
+        return self._rates[currency][max(index - 1, 0)]
+
+    def convert(
+        self,
+        db: Session,
+        value: Decimal,
+        currency: CurrencyType,
+        on_date: date,
+        target_currency: CurrencyType,
+    ) -> Decimal | None:
+        """
+        Converts an amount between currencies with the rates of `on_date`,
+        rounded to cents.
+        """
+        if currency == target_currency:
+            return to_money(value)
+        source_rate = self.rate(db, currency, on_date)
+        target_rate = self.rate(db, target_currency, on_date)
+        if source_rate is None or target_rate is None:
+            return None
+        return to_money(
+            to_money(value) * Decimal(str(target_rate)) / Decimal(str(source_rate))
+        )
+
+
+rate_cache = RateCache()
+
+
+def load_rates_from_csv(path: str, db: Session) -> int:
+    """
+    Loads daily rates from a CSV file into the fx_rate table.
+
+    Existing rows for the same day and currency are replaced. Missing
+    days between two quoted dates are filled with the previous rate,
+    so every movement date inside the loaded range has a row to join.
+    Users reporting in, or with movements in, a loaded currency get
+    their data version bumped in the same transaction.
+    Returns the number of rows written.
+    """
+    quotes: dict[CurrencyType, dict[date, float]] = {}
+    with open(path, newline="") as rates_file:
+        for row in csv.DictReader(rates_file):
+            currency = CurrencyType(row["currency"].strip().upper())
+            if currency == BASE_CURRENCY:
+                continue
+            rate_date = date.fromisoformat(row["date"].strip())
+            quotes.setdefault(currency, {})[rate_date] = float(row["rate"])
+
+    written = 0
+    for currency, rates in quotes.items():
+        current_day = min(rates)
+        last_day = max(rates)
+        last_rate = rates[current_day]
+        while current_day <= last_day:
+            last_rate = rates.get(current_day, last_rate)
+            db.merge(FxRate(rate_date=current_day, currency=currency, rate=last_rate))
+            written += 1
+            current_day += timedelta(days=1)
+
+    currencies = list(quotes)
+    if currencies:
+        affected_users = select(User.id).where(
+            or_(
+                User.reporting_currency.in_(currencies),
+                User.id.in_(
+                    select(Movement.user_id).where(Movement.currency.in_(currencies))
+                ),
+            )
+        )
+        bump_data_versions(db, list(db.exec(affected_users).all()))
+    db.commit()
+    rate_cache.clear()
+    return written
+
+
+if __name__ == "__main__":
+    from config.database import engine
+
+    parser = argparse.ArgumentParser(description="Load daily FX rates from a CSV file.")
+    parser.add_argument("path", help="CSV file with date, currency and rate columns")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        count = load_rates_from_csv(args.path, session)
+    print(f"Loaded {count} daily rates into fx_rate")
@@ -0,0 +1,303 @@
+"""
+Idempotency keys for write endpoints.
+
+Clients may send an `Idempotency-Key` header (any unique string,
+e.g. a UUID) with a write request. The first successful response
+is stored for the (user, key) pair, and retries with the same key
+get that response back, with an `Idempotent-Replayed: true` header,
+without the endpoint running again.
+
+Responses are stored in the idempotency_record table, so retries
+landing on another worker are recognised too, with an in-process
+LRU cache in front of it. Records expire after IDEMPOTENCY_TTL seconds.
+A reservation still in progress after IDEMPOTENCY_LEASE seconds (its
+worker died or hung) is dropped, so the key can be retried.
+
+Usage, on a router created with a route class based on IdempotentRoute
+(`route_class=ApiRoute`, see services/routing.py, which also keeps
+response caching):
+
+    @router.post("/", dependencies=[Depends(idempotency_guard)])
+
+    * idempotency_guard: dependency replaying the stored response, or
+    reserving the key before the endpoint runs. A key still in
+    progress gives a 409, a key reused for another request a 422.
+    * IdempotentRoute: route class storing the response of guarded
+    requests, or releasing the key when the request failed or was
+    cancelled.
+    * IdempotentReplay: raised to replay a stored response, handled
+    in main.py by `replay_idempotent_response`.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Annotated, Callable
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete
+
+from auth.auth import get_current_active_user
+from config.database import SessionDep
+from schema.idempotency import IdempotencyRecord
+from schema.user import User
+
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_LEASE = int(os.environ.get("IDEMPOTENCY_LEASE", 60))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))
+# Expired records are deleted once every PURGE_EVERY stored responses
+PURGE_EVERY = 100
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    # None while the first request is still in progress
+    status_code: int | None
+    body: str | None
+    stored_at: float
+
+
+class IdempotentReplay(Exception):
+    def __init__(self, response: StoredResponse):
+        self.response = response
+
+
+class ResponseLRU:
+    """
+    In-process LRU cache of stored responses by (user_id, key).
+    """
+
+    def __init__(self, max_size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.max_size = max_size
+        self._responses: OrderedDict[tuple[int, str], StoredResponse] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id: int, key: str) -> StoredResponse | None:
+        with self._lock:
+            response = self._responses.get((user_id, key))
+            if response is None:
+                return None
+            if time.time() - response.stored_at > IDEMPOTENCY_TTL:
+                del self._responses[(user_id, key)]
+                return None
+            self._responses.move_to_end((user_id, key))
+            return response
+
+    def put(self, user_id: int, key: str, response: StoredResponse):
+        with self._lock:
+            self._responses[(user_id, key)] = response
+            self._responses.move_to_end((user_id, key))
+            while len(self._responses) > self.max_size:
+                self._responses.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+
+
+response_cache = ResponseLRU()
+_stored_count = 0
+
+
+@dataclass
+class IdempotencyContext:
+    db: Session
+    user_id: int
+    key: str
+    request_hash: str
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite returns naive datetimes, stored in UTC
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+async def request_fingerprint(request: Request) -> str:
+    body = await request.body()
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _load_response(db: Session, user_id: int, key: str) -> StoredResponse | None:
+    """
+    Reads the record of a key from the database, dropping it when
+    expired, or when still in progress past its lease. Completed
+    responses are added to the LRU cache.
+    """
+    record = db.get(IdempotencyRecord, (user_id, key))
+    if record is None:
+        return None
+    created_at = _as_utc(record.created_at)
+    lifetime = IDEMPOTENCY_TTL if record.status_code is not None else IDEMPOTENCY_LEASE
+    if _now() - created_at > timedelta(seconds=lifetime):
+        db.delete(record)
+        db.commit()
+        return None
+    stored = StoredResponse(
+        record.request_hash,
+        record.status_code,
+        record.response_body,
+        created_at.timestamp(),
+    )
+    if stored.status_code is not None:
+        response_cache.put(user_id, key, stored)
+    return stored
+
+
+async def idempotency_guard(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: SessionDep,
+    idempotency_key: Annotated[
+        str | None,
+        Header(
+            alias="Idempotency-Key",
+            max_length=255,
+            description="Unique key making retries of this request safe",
+        ),
+    ] = None,
+):
+    """
+    Replays the stored response of an already processed key, or
+    reserves the key so the endpoint's response can be stored.
+    Requests without the header are not affected.
+    """
+    if idempotency_key is None:
+        return
+    request_hash = await request_fingerprint(request)
+    in_progress = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress.",
+    )
+
+    stored = response_cache.get(current_user.id, idempotency_key) or _load_response(
+        db, current_user.id, idempotency_key
+    )
+    if stored is not None:
+        if stored.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="This Idempotency-Key was already used for a different request.",
+            )
+        if stored.status_code is None:
+            raise in_progress
+        raise IdempotentReplay(stored)
+
+    # Reserve the key, a concurrent retry gets a 409 meanwhile
+    try:
+        db.add(
+            IdempotencyRecord(
+                user_id=current_user.id,
+                key=idempotency_key,
+                request_hash=request_hash,
+                created_at=_now(),
+            )
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise in_progress
+    request.state.idempotency = IdempotencyContext(
+        db, current_user.id, idempotency_key, request_hash
+    )
+
+
+def _release(context: IdempotencyContext):
+    context.db.rollback()
+    context.db.exec(
+        delete(IdempotencyRecord).where(
+            IdempotencyRecord.user_id == context.user_id,
+            IdempotencyRecord.key == context.key,
+        )
+    )
+    context.db.commit()
+
+
+def _store(context: IdempotencyContext, response: Response):
+    global _stored_count
+    record = context.db.get(IdempotencyRecord, (context.user_id, context.key))
+    if record is None:
+        # The reservation outlived its lease and was dropped meanwhile
+        record = IdempotencyRecord(
+            user_id=context.user_id,
+            key=context.key,
+            request_hash=context.request_hash,
+            created_at=_now(),
+        )
+    record.status_code = response.status_code
+    record.response_body = response.body.decode()
+    context.db.add(record)
+
+    _stored_count += 1
+    if _stored_count % PURGE_EVERY == 0:
+        cutoff = _now() - timedelta(seconds=IDEMPOTENCY_TTL)
+        context.db.exec(
+            delete(IdempotencyRecord).where(IdempotencyRecord.created_at < cutoff)
+        )
+    context.db.commit()
+    response_cache.put(
+        context.user_id,
+        context.key,
+        StoredResponse(
+            context.request_hash,
+            response.status_code,
+            record.response_body,
+            time.time(),
+        ),
+    )
+
+
+class IdempotentRoute(APIRoute):
+    """
+    Stores the successful responses of requests reserved by
+    idempotency_guard, and releases the key of failed ones
+    so they can be retried. Cancelled requests (client disconnect,
+    shutdown) raise a BaseException and release their key too.
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def idempotent_route_handler(request: Request) -> Response:
+            try:
+                response = await original_route_handler(request)
+            except BaseException:
+                context = getattr(request.state, "idempotency", None)
+                if context is not None:
+                    _release(context)
+                raise
+            context = getattr(request.state, "idempotency", None)
+            if context is not None:
+                if 200 <= response.status_code < 300:
+                    _store(context, response)
+                else:
+                    _release(context)
+            return response
+
+        return idempotent_route_handler
+
+
+def replay_idempotent_response(request: Request, exc: IdempotentReplay) -> Response:
+    """
+    Exception handler returning a stored response.
+    """
+    return Response(
+        content=exc.response.body,
+        status_code=exc.response.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
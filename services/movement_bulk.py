@@ -0,0 +1,108 @@
+"""
+Bulk update and delete of movements.
+
+The movements are selected with a MovementBulkFilter and changed
+with single set-based statements, always scoped to the user:
+
+    * UPDATE movement SET ... WHERE user_id = ? AND <filters>
+    * DELETE FROM activitylog WHERE movement_id IN (SELECT id FROM
+    movement WHERE user_id = ? AND <filters>), then
+    DELETE FROM movement WHERE user_id = ? AND <filters>
+
+Both also append their change log entries with an INSERT ... SELECT
+over the same filters (services/change_log.py).
+The caller commits, so every operation is a single transaction.
+In dry-run mode only the affected rows are counted.
+
+    * movement_bulk_criteria: WHERE clauses of a MovementBulkFilter.
+    * count_bulk_targets: number of movements and activity logs selected.
+    * bulk_update_movements / bulk_delete_movements: run the statements
+    and return the number of affected rows.
+"""
+
+from sqlmodel import Session, delete, func, select, update
+
+from schema.activity_log import ActivityLog
+from schema.enums import ChangeEntity, ChangeOperation
+from schema.movement import Movement, MovementBulkChanges, MovementBulkFilter
+from services.change_log import record_changes
+
+
+def movement_bulk_criteria(user_id: int, filters: MovementBulkFilter) -> list:
+    criteria = [Movement.user_id == user_id]
+    if filters.ids is not None:
+        criteria.append(Movement.id.in_(filters.ids))
+    if filters.date_from is not None:
+        criteria.append(Movement.movement_date >= filters.date_from)
+    if filters.date_to is not None:
+        criteria.append(Movement.movement_date <= filters.date_to)
+    if filters.category_id is not None:
+        criteria.append(Movement.category_id == filters.category_id)
+    if filters.currency is not None:
+        criteria.append(Movement.currency == filters.currency)
+    if filters.payment_method is not None:
+        criteria.append(Movement.payment_method == filters.payment_method)
+    return criteria
+
+
+def count_bulk_targets(
+    db: Session, user_id: int, filters: MovementBulkFilter
+) -> tuple[int, int]:
+    """
+    Returns the number of movements selected by the filters,
+    and the number of activity logs attached to them.
+    """
+    statement = (
+        select(func.count(Movement.id), func.count(ActivityLog.id))
+        .select_from(Movement)
+        .outerjoin(ActivityLog, ActivityLog.movement_id == Movement.id)
+        .where(*movement_bulk_criteria(user_id, filters))
+    )
+    movements, activity_logs = db.exec(statement).one()
+    return movements, activity_logs
+
+
+def bulk_update_movements(
+    db: Session, user_id: int, filters: MovementBulkFilter, changes: MovementBulkChanges
+) -> int:
+    criteria = movement_bulk_criteria(user_id, filters)
+    record_changes(
+        db, user_id, ChangeEntity.movement, ChangeOperation.update, *criteria
+    )
+    statement = (
+        update(Movement)
+        .where(*criteria)
+        .values(**changes.model_dump(exclude_none=True))
+        .execution_options(synchronize_session=False)
+    )
+    return db.exec(statement).rowcount
+
+
+def bulk_delete_movements(
+    db: Session, user_id: int, filters: MovementBulkFilter
+) -> tuple[int, int]:
+    """
+    Deletes the selected movements and their activity logs,
+    returning both row counts.
+    """
+    criteria = movement_bulk_criteria(user_id, filters)
+    movement_ids = select(Movement.id).where(*criteria)
+    record_changes(
+        db,
+        user_id,
+        ChangeEntity.activity_log,
+        ChangeOperation.delete,
+        ActivityLog.movement_id.in_(movement_ids),
+    )
+    record_changes(
+        db, user_id, ChangeEntity.movement, ChangeOperation.delete, *criteria
+    )
+    activity_logs = db.exec(
+        delete(ActivityLog)
+        .where(ActivityLog.movement_id.in_(movement_ids))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    movements = db.exec(
+        delete(Movement).where(*criteria).execution_options(synchronize_session=False)
+    ).rowcount
+    return movements, activity_logs
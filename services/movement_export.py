@@ -0,0 +1,277 @@
+"""
+Export of all the movements of a user, in the format the client asks for.
+
+GET /movements/export negotiates the format with the Accept header:
+
+    * application/json (default): a JSON array of movements.
+    * application/vnd.marginal-wallet.packed: the packed columnar
+    format described below, readable without any JSON parsing.
+    * application/vnd.apache.arrow.stream: an Arrow IPC stream, only
+    offered when pyarrow is installed.
+
+Every format holds the same columns: id, movement_date, value,
+currency, payment_method and category_id. Rows are read from the
+database cursor in batches of EXPORT_BATCH_SIZE (a server-side cursor
+on PostgreSQL) and every batch is written to the response as soon as
+it is read. The columnar formats select the raw values (dates as days
+since 1970-01-01 computed in SQL, values as integer cents, enums as
+their stored names), so no per-row object or dict is built.
+
+Packed format (all integers little-endian):
+
+    magic         8 bytes   b"MWPACK1\\n"
+    header_size   uint32
+    header        UTF-8 JSON {"columns": [{"name", "type", ...}]}, in order:
+                  id int64, movement_date int32 (days since 1970-01-01),
+                  value int64 (cents), currency uint8, payment_method uint8,
+                  category_id int64. uint8 columns have a "dictionary"
+                  listing the value of every code.
+    batches       uint32 row count n, then each column as n contiguous
+                  values, in header order. A batch with n = 0 ends the
+                  stream.
+
+Reading it with numpy, for each batch:
+
+    n = int.from_bytes(stream.read(4), "little")
+    ids = numpy.frombuffer(stream.read(8 * n), "<i8")
+    days = numpy.frombuffer(stream.read(4 * n), "<i4")
+    ...
+"""
+
+import io
+import json
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Iterator
+
+from sqlalchemy import BigInteger, Integer, String, cast, literal, type_coerce
+from sqlmodel import Session, func, select
+
+from schema.enums import CurrencyType, PaymentMethodType
+from schema.movement import Movement
+from services.fast_json import dumps
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+EXPORT_BATCH_SIZE = 5000
+
+JSON_MEDIA_TYPE = "application/json"
+PACKED_MEDIA_TYPE = "application/vnd.marginal-wallet.packed"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+PACKED_MAGIC = b"MWPACK1\n"
+EPOCH = date(1970, 1, 1)
+
+# Codes of the enum columns, by the names stored in the database
+CURRENCY_CODES = {member.name: code for code, member in enumerate(CurrencyType)}
+PAYMENT_METHOD_CODES = {
+    member.name: code for code, member in enumerate(PaymentMethodType)
+}
+
+PACKED_HEADER = {
+    "columns": [
+        {"name": "id", "type": "int64"},
+        {"name": "movement_date", "type": "int32", "unit": "days since 1970-01-01"},
+        {"name": "value", "type": "int64", "unit": "cents"},
+        {
+            "name": "currency",
+            "type": "uint8",
+            "dictionary": [member.value for member in CurrencyType],
+        },
+        {
+            "name": "payment_method",
+            "type": "uint8",
+            "dictionary": [member.value for member in PaymentMethodType],
+        },
+        {"name": "category_id", "type": "int64"},
+    ]
+}
+
+# array typecodes of the packed columns, in header order
+PACKED_TYPECODES = ("q", "i", "q", "B", "B", "q")
+
+
+def export_media_types() -> list[str]:
+    media_types = [JSON_MEDIA_TYPE, PACKED_MEDIA_TYPE]
+    if pyarrow is not None:
+        media_types.append(ARROW_MEDIA_TYPE)
+    return media_types
+
+
+def negotiate_export_media_type(accept: str | None) -> str | None:
+    """
+    Returns the export format preferred by an Accept header, JSON when
+    any format is accepted, or None when no format is acceptable.
+    """
+    available = export_media_types()
+    if not accept:
+        return JSON_MEDIA_TYPE
+    candidates = []
+    for item in accept.split(","):
+        media_type, *parameters = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+        # Explicit types win over wildcards with the same quality
+        if media_type in available:
+            candidates.append((quality, True, media_type))
+        elif media_type in ("*/*", "application/*"):
+            candidates.append((quality, False, JSON_MEDIA_TYPE))
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: candidate[:2])[2]
+
+
+def _epoch_days(dialect_name: str):
+    if dialect_name == "postgresql":
+        return Movement.movement_date - literal(EPOCH)
+    return cast(func.julianday(Movement.movement_date) - 2440587.5, Integer)
+
+
+def export_statement(media_type: str, dialect_name: str):
+    """
+    Returns the SELECT of the exported columns, typed values for JSON
+    and raw values for the columnar formats.
+    """
+    if media_type == JSON_MEDIA_TYPE:
+        columns = (
+            Movement.id,
+            Movement.movement_date,
+            Movement.value,
+            Movement.currency,
+            Movement.payment_method,
+            Movement.category_id,
+        )
+    else:
+        columns = (
+            Movement.id,
+            _epoch_days(dialect_name),
+            type_coerce(Movement.value, BigInteger),
+            type_coerce(Movement.currency, String),
+            type_coerce(Movement.payment_method, String),
+            Movement.category_id,
+        )
+    return select(*columns).order_by(Movement.movement_date, Movement.id)
+
+
+def _partitions(db: Session, statement) -> Iterator[list]:
+    result = db.exec(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    yield from result.partitions()
+
+
+def _json_batches(db: Session, statement) -> Iterator[bytes]:
+    keys = [column["name"] for column in PACKED_HEADER["columns"]]
+    yield b"["
+    first = True
+    for rows in _partitions(db, statement):
+        chunk = dumps([dict(zip(keys, row)) for row in rows])[1:-1]
+        if chunk:
+            yield chunk if first else b"," + chunk
+            first = False
+    yield b"]"
+
+
+def _column_values(rows: list) -> tuple:
+    """
+    Splits a batch of raw rows into its columns, enums as their codes.
+    """
+    ids, days, cents, currencies, payment_methods, category_ids = zip(*rows)
+    return (
+        ids,
+        days,
+        cents,
+        [CURRENCY_CODES[name] for name in currencies],
+        [PAYMENT_METHOD_CODES[name] for name in payment_methods],
+        category_ids,
+    )
+
+
+def _packed_batches(db: Session, statement) -> Iterator[bytes]:
+    header = json.dumps(PACKED_HEADER).encode("utf-8")
+    yield PACKED_MAGIC + struct.pack("<I", len(header)) + header
+    for rows in _partitions(db, statement):
+        columns = [
+            array(typecode, values)
+            for typecode, values in zip(PACKED_TYPECODES, _column_values(rows))
+        ]
+        if sys.byteorder == "big":  # pragma: no cover
+            for column in columns:
+                column.byteswap()
+        yield struct.pack("<I", len(rows)) + b"".join(
+            column.tobytes() for column in columns
+        )
+    yield struct.pack("<I", 0)
+
+
+def _arrow_batches(db: Session, statement) -> Iterator[bytes]:
+    schema = pyarrow.schema(
+        [
+            ("id", pyarrow.int64()),
+            ("movement_date", pyarrow.date32()),
+            ("value", pyarrow.int64()),
+            ("currency", pyarrow.dictionary(pyarrow.uint8(), pyarrow.string())),
+            ("payment_method", pyarrow.dictionary(pyarrow.uint8(), pyarrow.string())),
+            ("category_id", pyarrow.int64()),
+        ],
+        metadata={"value": "cents"},
+    )
+    dictionaries = (
+        pyarrow.array([member.value for member in CurrencyType]),
+        pyarrow.array([member.value for member in PaymentMethodType]),
+    )
+    sink = io.BytesIO()
+    writer = pyarrow.ipc.new_stream(sink, schema)
+    for rows in _partitions(db, statement):
+        ids, days, cents, currencies, payment_methods, category_ids = _column_values(
+            rows
+        )
+        batch = pyarrow.record_batch(
+            [
+                pyarrow.array(ids, pyarrow.int64()),
+                pyarrow.array(days, pyarrow.int32()).cast(pyarrow.date32()),
+                pyarrow.array(cents, pyarrow.int64()),
+                pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(currencies, pyarrow.uint8()), dictionaries[0]
+                ),
+                pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(payment_methods, pyarrow.uint8()), dictionaries[1]
+                ),
+                pyarrow.array(category_ids, pyarrow.int64()),
+            ],
+            schema=schema,
+        )
+        writer.write_batch(batch)
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+
+def _drain(buffer: io.BytesIO) -> bytes:
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def stream_export(db: Session, statement, media_type: str) -> Iterator[bytes]:
+    """
+    Yields the response body of an export, batch by batch.
+    """
+    if media_type == PACKED_MEDIA_TYPE:
+        return _packed_batches(db, statement)
+    if media_type == ARROW_MEDIA_TYPE:
+        return _arrow_batches(db, statement)
+    return _json_batches(db, statement)
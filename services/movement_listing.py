@@ -0,0 +1,223 @@
+"""
+Read-optimized movement listing.
+
+List endpoints can embed each movement's category and activity log
+(`expand=category,activity_log`), so clients do not have to call
+`/categories/{id}` and `/activity_logs/{id}` once per row.
+
+The listing selects plain columns with a single joined query and
+builds the response from the Core rows, no ORM instances (and no
+lazy loads of their relationships) are involved.
+
+    * parse_expand: validates the `expand` query parameter.
+    * movement_listing_statement: SELECT of the movement columns plus
+    the requested related columns, ready for filters and pagination.
+    * apply_movement_filters / apply_time_filter / order_movements:
+    compile the listing filters and sort options into the statement,
+    every filter becoming a bound parameter of a single query.
+    * rows_to_movements: turns the result rows into response dicts.
+    * default_movement_listing: the first page GET /movements/list
+    returns without options, for the server-rendered movements page.
+
+Indexes serving the filters (declared on the Movement and Category
+tables, every movement query is scoped by user_id first):
+
+    * no filter, time filters, date range, sort by date:
+    ix_movement_user_id_movement_date
+    * value range, sort by value: ix_movement_user_id_value
+    * currency: ix_movement_user_id_currency_movement_date
+    * payment_method: ix_movement_user_id_payment_method_movement_date
+    * category_type, counterparty: ix_category_user_id_category_type
+    picks the user's matching categories, then
+    ix_movement_category_id_movement_date their movements
+    * q (activity log text): the full-text index of activitylog
+    (services/text_search.py) finds the matching logs, then the unique
+    index on activitylog.movement_id ties them to candidate movements
+"""
+
+from datetime import date, timedelta
+
+from fastapi import HTTPException, status
+from sqlmodel import Session, func, select
+
+from schema.activity_log import ActivityLog
+from schema.category import Category
+from schema.movement import Movement, MovementFilters
+from services.text_search import activity_log_text_match
+
+EXPANDABLE_RELATIONS = ("category", "activity_log")
+SORT_COLUMNS = {"date": Movement.movement_date, "value": Movement.value}
+
+MOVEMENT_COLUMNS = (
+    Movement.id,
+    Movement.movement_date,
+    Movement.value,
+    Movement.currency,
+    Movement.payment_method,
+)
+RELATED_COLUMNS = {
+    "category": (
+        Category.id.label("category__id"),
+        Category.category_type.label("category__category_type"),
+        Category.counterparty.label("category__counterparty"),
+    ),
+    "activity_log": (
+        ActivityLog.id.label("activity_log__id"),
+        ActivityLog.description.label("activity_log__description"),
+        ActivityLog.movement_id.label("activity_log__movement_id"),
+    ),
+}
+
+
+def parse_expand(expand: str | None) -> set[str]:
+    """
+    Parses a comma separated list of relations to embed,
+    raising a 400 error for unknown relation names.
+    """
+    if not expand:
+        return set()
+    relations = {relation.strip() for relation in expand.split(",")} - {""}
+    unknown = relations - set(EXPANDABLE_RELATIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot expand {', '.join(sorted(unknown))}. "
+            f"Allowed values: {', '.join(EXPANDABLE_RELATIONS)}.",
+        )
+    return relations
+
+
+def movement_listing_statement(expand: set[str]):
+    """
+    Returns a SELECT of the public movement columns, joined with the
+    category and/or activity log columns when requested.
+    """
+    columns = list(MOVEMENT_COLUMNS)
+    for relation in EXPANDABLE_RELATIONS:
+        if relation in expand:
+            columns.extend(RELATED_COLUMNS[relation])
+
+    statement = select(*columns).select_from(Movement)
+    if "category" in expand:
+        statement = statement.join(Category, Category.id == Movement.category_id)
+    if "activity_log" in expand:
+        statement = statement.outerjoin(
+            ActivityLog, ActivityLog.movement_id == Movement.id
+        )
+    return statement
+
+
+def apply_movement_filters(
+    statement, user_id: int, filters: MovementFilters, dialect_name: str
+):
+    """
+    Restricts a movement statement to the user's movements
+    matching every filter that was given. The dialect name selects
+    the full-text search SQL used by the `q` filter.
+    """
+    statement = statement.where(Movement.user_id == user_id)
+
+    if filters.date_from is not None:
+        statement = statement.where(Movement.movement_date >= filters.date_from)
+    if filters.date_to is not None:
+        statement = statement.where(Movement.movement_date <= filters.date_to)
+    if filters.min_value is not None:
+        statement = statement.where(Movement.value >= filters.min_value)
+    if filters.max_value is not None:
+        statement = statement.where(Movement.value <= filters.max_value)
+    if filters.currency is not None:
+        statement = statement.where(Movement.currency == filters.currency)
+    if filters.payment_method is not None:
+        statement = statement.where(Movement.payment_method == filters.payment_method)
+
+    if filters.category_type is not None or filters.counterparty is not None:
+        categories = select(Category.id).where(Category.user_id == user_id)
+        if filters.category_type is not None:
+            categories = categories.where(
+                Category.category_type == filters.category_type
+            )
+        if filters.counterparty is not None:
+            categories = categories.where(
+                func.lower(Category.counterparty) == filters.counterparty.lower()
+            )
+        statement = statement.where(Movement.category_id.in_(categories))
+
+    if filters.q is not None:
+        statement = statement.where(
+            select(ActivityLog.id)
+            .where(ActivityLog.movement_id == Movement.id)
+            .where(activity_log_text_match(dialect_name, filters.q))
+            .exists()
+        )
+
+    return statement
+
+
+def apply_time_filter(statement, time_filter: str, today: date):
+    """
+    Applies the predefined time filters (last_month, last_3_months, all)
+    as date ranges, so the movement_date indexes can be used.
+    """
+    if time_filter == "last_month":
+        month_start = today.replace(day=1)
+        if month_start.month == 12:
+            next_month_start = month_start.replace(year=month_start.year + 1, month=1)
+        else:
+            next_month_start = month_start.replace(month=month_start.month + 1)
+        statement = statement.where(
+            Movement.movement_date >= month_start,
+            Movement.movement_date < next_month_start,
+        )
+    elif time_filter == "last_3_months":
+        three_months_ago = today - timedelta(days=90)
+        statement = statement.where(Movement.movement_date >= three_months_ago)
+    return statement
+
+
+def order_movements(statement, sort_by: str, sort_order: str):
+    """
+    Orders movements by date or value, with the id as tie-breaker
+    so pages stay stable.
+    """
+    sort_column = SORT_COLUMNS[sort_by]
+    if sort_order == "asc":
+        return statement.order_by(sort_column.asc(), Movement.id.asc())
+    return statement.order_by(sort_column.desc(), Movement.id.desc())
+
+
+def rows_to_movements(rows, expand: set[str]) -> list[dict]:
+    """
+    Builds the response dicts from the rows of movement_listing_statement.
+    Related objects are nested under their relation name, a movement
+    without activity log gets `activity_log: None`.
+    """
+    movements = []
+    for row in rows:
+        mapping = row._mapping
+        movement = {column.key: mapping[column.key] for column in MOVEMENT_COLUMNS}
+        for relation in EXPANDABLE_RELATIONS:
+            if relation not in expand:
+                continue
+            prefix = f"{relation}__"
+            related = {
+                column.key[len(prefix) :]: mapping[column.key]
+                for column in RELATED_COLUMNS[relation]
+            }
+            movement[relation] = related if related["id"] is not None else None
+        movements.append(movement)
+    return movements
+
+
+def default_movement_listing(
+    db: Session, user_id: int, today: date, limit: int
+) -> list[dict]:
+    """
+    Returns the movements of the default listing (this month, latest
+    first) with their category and activity log embedded.
+    """
+    relations = {"category", "activity_log"}
+    statement = movement_listing_statement(relations).where(Movement.user_id == user_id)
+    statement = order_movements(
+        apply_time_filter(statement, "last_month", today), "date", "desc"
+    ).limit(limit)
+    return rows_to_movements(db.exec(statement).all(), relations)
@@ -0,0 +1,135 @@
+"""
+Dashboard overview built with two queries.
+
+    * One GROUP BY category type over the user's categories, outer
+    joined with their movements (and the fx_rate rows converting
+    them), returning per type the number of categories and movements,
+    the overall balance and the balance of the current month, plus
+    the minijob earnings of the month in EURO.
+    * One limited SELECT of the latest movements with their category,
+    served by ix_movement_user_id_movement_date.
+
+Totals are summed up from the per type rows in Python.
+"""
+
+import calendar
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import and_, case, distinct
+from sqlmodel import Session, func, select
+
+from schema.category import Category
+from schema.enums import CategoryType, CurrencyType
+from schema.movement import Movement
+from schema.overview import (
+    MINIJOB_MAX_EARNINGS,
+    CategoryTypeOverview,
+    MinijobHeadroom,
+    UserOverview,
+)
+from schema.user import User
+from services.fx_rates import FxConversion, require_rates
+from services.movement_listing import (
+    movement_listing_statement,
+    order_movements,
+    rows_to_movements,
+)
+
+
+def _month_range(today: date) -> tuple[date, date]:
+    month_start = today.replace(day=1)
+    if month_start.month == 12:
+        return month_start, month_start.replace(year=month_start.year + 1, month=1)
+    return month_start, month_start.replace(month=month_start.month + 1)
+
+
+def user_overview(db: Session, user: User, today: date, latest: int) -> UserOverview:
+    """
+    Returns the dashboard overview of a user, `latest` being the
+    number of latest movements to include.
+    """
+    month_start, next_month_start = _month_range(today)
+    this_month = and_(
+        Movement.movement_date >= month_start,
+        Movement.movement_date < next_month_start,
+    )
+    fx = FxConversion(user.reporting_currency)
+    euro = (
+        fx
+        if fx.target_currency == CurrencyType.euro
+        else FxConversion(CurrencyType.euro)
+    )
+
+    statement = (
+        select(
+            Category.category_type,
+            func.count(distinct(Category.id)),
+            func.count(Movement.id),
+            func.coalesce(func.sum(fx.value), 0),
+            func.coalesce(func.sum(case((this_month, fx.value))), 0),
+            func.coalesce(func.sum(case((this_month, euro.value))), 0),
+            fx.unconverted if euro is fx else fx.unconverted + euro.unconverted,
+        )
+        .select_from(Category)
+        .outerjoin(Movement, Movement.category_id == Category.id)
+        .where(Category.user_id == user.id)
+        .group_by(Category.category_type)
+    )
+    statement = fx.join(statement)
+    if euro is not fx:
+        statement = euro.join(statement)
+
+    category_types = {
+        category_type: CategoryTypeOverview(category_type=category_type)
+        for category_type in CategoryType
+    }
+    minijob_earnings = Decimal("0.00")
+    rows = db.exec(statement).all()
+    require_rates(sum(row[-1] for row in rows))
+    for (
+        category_type,
+        num_categories,
+        num_movements,
+        balance,
+        month,
+        month_euro,
+        _unconverted,
+    ) in rows:
+        category_types[category_type] = CategoryTypeOverview(
+            category_type=category_type,
+            num_categories=num_categories,
+            num_movements=num_movements,
+            balance=balance,
+            month_balance=month,
+        )
+        if category_type == CategoryType.minijob:
+            minijob_earnings = month_euro
+
+    latest_movements = []
+    if latest:
+        latest_statement = order_movements(
+            movement_listing_statement({"category"}).where(Movement.user_id == user.id),
+            "date",
+            "desc",
+        ).limit(latest)
+        latest_movements = rows_to_movements(
+            db.exec(latest_statement).all(), {"category"}
+        )
+
+    totals = category_types.values()
+    minijob = MinijobHeadroom(
+        earnings=minijob_earnings,
+        headroom=max(MINIJOB_MAX_EARNINGS - minijob_earnings, Decimal("0.00")),
+    )
+    return UserOverview(
+        currency=user.reporting_currency,
+        balance=sum(overview.balance for overview in totals),
+        num_categories=sum(overview.num_categories for overview in totals),
+        num_movements=sum(overview.num_movements for overview in totals),
+        current_month=calendar.month_name[today.month],
+        current_year=today.year,
+        category_types=list(totals),
+        minijob=minijob,
+        latest_movements=latest_movements,
+    )
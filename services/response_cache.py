@@ -0,0 +1,288 @@
+"""
+Per-user response cache for read endpoints.
+
+Responses are cached as JSON bytes, keyed by the user, the user's
+`data_version`, the current date, the path and the query string.
+Every write bumps the data version (services/change_log.py), so a
+write makes the user's cached responses unreachable at once, on
+every worker. After each commit that bumped a version, the user's
+entries are also dropped from the cache to free their memory.
+
+Backends, selected with RESPONSE_CACHE_BACKEND:
+
+    * memory (default): in-process LRU, bounded by
+    RESPONSE_CACHE_MAX_BYTES, one cache per worker.
+    * sqlite: a local SQLite file (RESPONSE_CACHE_PATH) shared by
+    the gunicorn workers of a host, bounded the same way.
+    * none: caching disabled.
+
+Usage, on a router created with a route class based on CachedRoute
+(see services/routing.py):
+
+    @router.get("/list", dependencies=[Depends(cache_guard)])
+
+    * cache_guard: dependency replaying a cached response (raising
+    CachedResponse, handled in main.py by `cached_response`), or
+    marking the request so CachedRoute stores its response.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Annotated, Callable
+
+from fastapi import Depends, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from auth.auth import get_current_active_user
+from schema.user import User
+from services.etag import user_data_etag
+
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_MAX_BYTES = int(
+    os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+)
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(
+    os.environ.get("RESPONSE_CACHE_MAX_ENTRY_BYTES", 1024 * 1024)
+)
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "response_cache.db")
+
+
+class MemoryBackend:
+    """
+    In-process LRU cache bounded by the total size of the bodies.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[int, bytes]] = OrderedDict()
+        self._user_keys: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, user_id: int, key: str, body: bytes):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (user_id, body)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id, body = entry
+        self.size -= len(body)
+        user_keys = self._user_keys[user_id]
+        user_keys.discard(key)
+        if not user_keys:
+            del self._user_keys[user_id]
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self.size = 0
+
+
+class SQLiteBackend:
+    """
+    LRU cache in a local SQLite file, shared by the worker processes
+    of a host. Each thread uses its own connection.
+    """
+
+    # The total size is checked once every TRIM_EVERY writes
+    TRIM_EVERY = 20
+
+    def __init__(
+        self, path: str = RESPONSE_CACHE_PATH, max_bytes: int = RESPONSE_CACHE_MAX_BYTES
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, user_id INTEGER NOT NULL, body BLOB NOT NULL, "
+            "size INTEGER NOT NULL, used_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_user_id "
+            "ON response_cache (user_id)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_used_at "
+            "ON response_cache (used_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> bytes | None:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT body FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute(
+            "UPDATE response_cache SET used_at = ? WHERE key = ?", (time.time(), key)
+        )
+        return row[0]
+
+    def set(self, user_id: int, key: str, body: bytes):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+            (key, user_id, body, len(body), time.time()),
+        )
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            self._trim(connection)
+
+    def _trim(self, connection: sqlite3.Connection):
+        """
+        Deletes the least recently used entries beyond max_bytes.
+        """
+        connection.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER "
+            "(ORDER BY used_at DESC, key) AS running_size FROM response_cache) "
+            "WHERE running_size > ?)",
+            (self.max_bytes,),
+        )
+
+    def invalidate_user(self, user_id: int):
+        self._connection().execute(
+            "DELETE FROM response_cache WHERE user_id = ?", (user_id,)
+        )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM response_cache")
+
+
+class NullBackend:
+    def get(self, key: str) -> bytes | None:
+        return None
+
+    def set(self, user_id: int, key: str, body: bytes):
+        pass
+
+    def invalidate_user(self, user_id: int):
+        pass
+
+    def clear(self):
+        pass
+
+
+def create_backend(name: str = RESPONSE_CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name}")
+
+
+response_cache = create_backend()
+
+
+class CachedResponse(Exception):
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+
+
+def response_cache_key(user: User, request: Request) -> str:
+    query = "&".join(sorted(request.url.query.split("&")))
+    raw_key = (
+        f"{user.id}:{user.data_version}:{date.today().isoformat()}:"
+        f"{request.url.path}?{query}"
+    )
+    return f"{user.id}:{hashlib.sha256(raw_key.encode()).hexdigest()}"
+
+
+def cache_guard(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    key = response_cache_key(current_user, request)
+    body = response_cache.get(key)
+    if body is not None:
+        raise CachedResponse(body, user_data_etag(current_user))
+    request.state.response_cache = (current_user.id, key)
+
+
+class CachedRoute(APIRoute):
+    """
+    Stores the successful JSON responses of requests marked by cache_guard.
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def cached_route_handler(request: Request) -> Response:
+            response = await original_route_handler(request)
+            cache_entry = getattr(request.state, "response_cache", None)
+            body = getattr(response, "body", None)
+            if (
+                cache_entry is not None
+                and response.status_code == 200
+                and body is not None
+                and len(body) <= RESPONSE_CACHE_MAX_ENTRY_BYTES
+            ):
+                user_id, key = cache_entry
+                response_cache.set(user_id, key, body)
+                response.headers["X-Cache"] = "MISS"
+            return response
+
+        return cached_route_handler
+
+
+def cached_response(request: Request, exc: CachedResponse) -> Response:
+    return Response(
+        content=exc.body,
+        media_type="application/json",
+        headers={"ETag": exc.etag, "X-Cache": "HIT"},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    # Filled by services.change_log.bump_data_version
+    for user_id in session.info.pop("changed_user_ids", ()):
+        response_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session):
+    session.info.pop("changed_user_ids", None)
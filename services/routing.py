@@ -0,0 +1,18 @@
+"""
+Route class shared by the API routers.
+
+It combines the response hooks of the route classes of the services,
+each one only acting on requests marked by its dependency:
+
+    * IdempotentRoute (services/idempotency.py): stores the responses
+    of write requests sent with an Idempotency-Key.
+    * CachedRoute (services/response_cache.py): stores the responses
+    of cached read requests.
+"""
+
+from services.idempotency import IdempotentRoute
+from services.response_cache import CachedRoute
+
+
+class ApiRoute(IdempotentRoute, CachedRoute):
+    pass
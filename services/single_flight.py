@@ -0,0 +1,89 @@
+"""
+Request coalescing (single-flight) for expensive reads.
+
+When identical expensive requests of the same user arrive at the
+same time (several dashboard tabs, client retries), only the first
+one runs the computation, in the threadpool. The others wait for
+its result instead of running the same queries again.
+
+Coalescing is per worker process. Keys must identify the user, their
+`data_version` and every parameter of the computation, so requests
+are only coalesced when they would return the same result.
+
+    * SingleFlight: one instance per kind of computation, its `run`
+    method executes or joins the in-flight computation of a key.
+    * single_flight_metrics: executed and coalesced counts of every
+    instance, exposed by GET /metrics.
+"""
+
+import asyncio
+from typing import Any, Callable, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+_registry: dict[str, "SingleFlight"] = {}
+
+
+class LeaderCancelled(Exception):
+    """
+    Set on the shared future when the request running the computation
+    is cancelled, so its waiters run the computation again.
+    """
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        _registry[name] = self
+
+    async def run(self, key: Hashable, function: Callable, *args) -> Any:
+        """
+        Runs `function(*args)` in the threadpool, unless a computation
+        with the same key is already in flight, whose result is awaited.
+        When the request running it is cancelled (e.g. its client
+        disconnected), a waiter runs the computation itself instead.
+        """
+        # No await between the lookup and the insert, so no lock is needed
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                # shield: a cancelled waiter must not cancel the shared computation
+                return await asyncio.shield(future)
+            except LeaderCancelled:
+                return await self.run(key, function, *args)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await run_in_threadpool(function, *args)
+        except asyncio.CancelledError:
+            # Only the leader was cancelled, not the requests waiting for it
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Marks the exception as retrieved, in case nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def metrics(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+def single_flight_metrics() -> dict:
+    return {name: flight.metrics() for name, flight in _registry.items()}
@@ -0,0 +1,210 @@
+"""
+Fingerprinted, long-lived cacheable static files.
+
+At build time every file of static/ gets a copy named after a hash of
+its content (styles.css -> styles.3f2a9c1b7d4e.css), gzip (and brotli,
+when the `brotli` package is installed) precompressed variants next to
+it (styles.3f2a9c1b7d4e.css.gz, .br) and an entry in
+static/manifest.json:
+
+    python -m services.static_assets
+
+Templates link static files with `{{ static_url("styles.css") }}`,
+which returns the fingerprinted URL when the file is in the manifest
+and the plain URL otherwise (e.g. before the first build).
+
+    * StaticAssets: StaticFiles serving fingerprinted files with
+    `Cache-Control: public, max-age=31536000, immutable` (a new
+    content gets a new URL, so they never need revalidating) and
+    every other file with `no-cache`, revalidated with its ETag.
+    Precompressed variants are sent instead of the file when they
+    exist and the client accepts their encoding.
+    * build_static_assets: writes the fingerprinted copies, their
+    precompressed variants and the manifest.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from services.compression import (
+    INCOMPRESSIBLE_PREFIXES,
+    INCOMPRESSIBLE_TYPES,
+    accepted_encodings,
+    brotli,
+)
+
+MANIFEST_NAME = "manifest.json"
+FINGERPRINT_LENGTH = 12
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Precompressed variants, by preference, and their file suffix
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def load_manifest(directory: str | os.PathLike) -> dict[str, str]:
+    """
+    Returns the manifest of a static directory, mapping every file to
+    its fingerprinted copy, or an empty manifest before the first build.
+    """
+    try:
+        with open(Path(directory) / MANIFEST_NAME, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def fingerprinted_name(relative_path: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:FINGERPRINT_LENGTH]
+    path = Path(relative_path)
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def _compressible(path: Path) -> bool:
+    media_type, _ = mimetypes.guess_type(path.name)
+    if media_type is None:
+        return False
+    return not (
+        media_type in INCOMPRESSIBLE_TYPES
+        or media_type.startswith(INCOMPRESSIBLE_PREFIXES)
+    )
+
+
+def _write_precompressed(path: Path, content: bytes):
+    """
+    Writes the .gz (and .br) variants of a file, when they are smaller.
+    """
+    # mtime=0 keeps the build reproducible
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    for suffix, compressed in variants.items():
+        variant = path.with_name(path.name + suffix)
+        if len(compressed) < len(content):
+            variant.write_bytes(compressed)
+        else:
+            variant.unlink(missing_ok=True)
+
+
+def _remove_with_variants(path: Path):
+    path.unlink(missing_ok=True)
+    for suffix in PRECOMPRESSED_SUFFIXES.values():
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def build_static_assets(directory: str | os.PathLike) -> dict[str, str]:
+    """
+    Fingerprints and precompresses every file of a static directory and
+    writes its manifest. Copies left by a previous build for a content
+    that changed since are removed.
+    """
+    root = Path(directory)
+    previous = load_manifest(root)
+    generated = set(previous.values())
+    suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+
+    manifest = {}
+    for path in sorted(root.rglob("*")):
+        relative_path = path.relative_to(root).as_posix()
+        if (
+            not path.is_file()
+            or relative_path == MANIFEST_NAME
+            or relative_path in generated
+            or path.name.endswith(suffixes)
+        ):
+            continue
+        content = path.read_bytes()
+        fingerprinted = fingerprinted_name(relative_path, content)
+        (root / fingerprinted).write_bytes(content)
+        if _compressible(path):
+            _write_precompressed(path, content)
+            _write_precompressed(root / fingerprinted, content)
+        manifest[relative_path] = fingerprinted
+
+    for stale in generated - set(manifest.values()):
+        _remove_with_variants(root / stale)
+
+    with open(root / MANIFEST_NAME, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticAssets(StaticFiles):
+    def __init__(self, *, directory: str | os.PathLike, url_prefix: str = "/static"):
+        super().__init__(directory=directory)
+        self.url_prefix = url_prefix
+        self.manifest = load_manifest(directory)
+        self.fingerprinted = set(self.manifest.values())
+
+    def url(self, path: str) -> str:
+        """
+        Template helper returning the URL of a static file, fingerprinted
+        when the file is in the manifest.
+        """
+        return f"{self.url_prefix}/{self.manifest.get(path, path)}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if path in self.fingerprinted:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        return response
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        """
+        Sends the precompressed variant of the file the client prefers,
+        if any was built, or the file itself.
+        """
+        preferences = accepted_encodings(
+            Headers(scope=scope).get("Accept-Encoding", "")
+        )
+        has_variants = False
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            variant_path = f"{full_path}{suffix}"
+            try:
+                variant_stat = os.stat(variant_path)
+            except FileNotFoundError:
+                continue
+            has_variants = True
+            if preferences.get(encoding, preferences.get("*", 0.0)) <= 0:
+                continue
+            response = super().file_response(
+                variant_path, variant_stat, scope, status_code
+            )
+            if "content-type" in response.headers:
+                media_type, _ = mimetypes.guess_type(str(full_path))
+                media_type = media_type or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["Content-Type"] = media_type
+            response.headers["Content-Encoding"] = encoding
+            response.headers.add_vary_header("Accept-Encoding")
+            return response
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if has_variants:
+            response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+
+if __name__ == "__main__":
+    static_directory = Path(__file__).resolve().parent.parent / "static"
+    built = build_static_assets(static_directory)
+    print(f"Fingerprinted {len(built)} static file(s) into {MANIFEST_NAME}")
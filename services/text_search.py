@@ -0,0 +1,82 @@
+"""
+Full-text search over activity log descriptions.
+
+The matching SQL depends on the database dialect, both backed by
+the full-text indexes declared in schema/activity_log.py:
+
+    * PostgreSQL: to_tsvector('simple', description) @@ plainto_tsquery,
+    ranked with ts_rank, served by the GIN expression index.
+    * SQLite: the activitylog_fts FTS5 table, ranked with bm25.
+
+The 'simple' text search configuration is used on purpose: notes are
+written in several languages, so no language specific stemming.
+
+    * activity_log_text_match: WHERE clause matching ActivityLog rows.
+    * activity_log_text_rank: relevance expression, higher is better.
+"""
+
+import re
+
+from sqlalchemy import Float, column, false, func, literal_column, select, table
+from sqlalchemy.sql import ColumnElement
+
+from schema.activity_log import ActivityLog
+
+TS_CONFIG = literal_column("'simple'::regconfig")
+
+# Core handle on the SQLite FTS5 table (not part of SQLModel.metadata)
+activitylog_fts = table("activitylog_fts", column("rowid"), column("rank", Float))
+
+
+def fts5_query(search: str) -> str:
+    """
+    Turns free text into a safe FTS5 query: every word is quoted, so
+    FTS5 operators or quotes typed by the user are matched literally,
+    and all words must appear.
+    """
+    words = re.findall(r"\w+", search)
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def _sqlite_match_ids(search: str):
+    return select(activitylog_fts.c.rowid).where(
+        literal_column("activitylog_fts").op("MATCH")(fts5_query(search))
+    )
+
+
+def activity_log_text_match(dialect_name: str, search: str) -> ColumnElement:
+    """
+    Returns a WHERE clause matching the activity logs whose
+    description contains every word of `search`.
+    """
+    if dialect_name == "postgresql":
+        return func.to_tsvector(TS_CONFIG, ActivityLog.description).op("@@")(
+            func.plainto_tsquery(TS_CONFIG, search)
+        )
+    if dialect_name == "sqlite":
+        if not fts5_query(search):
+            return false()
+        return ActivityLog.id.in_(_sqlite_match_ids(search))
+    # Other databases have no full-text index, fall back to a substring match
+    return ActivityLog.description.icontains(search, autoescape=True)
+
+
+def activity_log_text_rank(dialect_name: str, search: str) -> ColumnElement:
+    """
+    Returns the relevance of a matching activity log, higher is better.
+    Only meaningful together with activity_log_text_match.
+    """
+    if dialect_name == "postgresql":
+        return func.ts_rank(
+            func.to_tsvector(TS_CONFIG, ActivityLog.description),
+            func.plainto_tsquery(TS_CONFIG, search),
+        )
+    if dialect_name == "sqlite":
+        # bm25 scores are negative, the best match having the lowest one
+        return (
+            select(-activitylog_fts.c.rank)
+            .where(activitylog_fts.c.rowid == ActivityLog.id)
+            .where(literal_column("activitylog_fts").op("MATCH")(fts5_query(search)))
+            .scalar_subquery()
+        )
+    return literal_column("1.0", Float)
@@ -12,6 +12,7 @@ Fixtures in this module include:
 * test_auth_user: A pre-registered user in the test database,
   used for authentication in tests.
 * auth_client: A TestClient that is authenticated with a test user.
+* metrics_headers: The headers authorizing GET /metrics.
 """
 
 import sys
@@ -37,17 +38,13 @@ from main import app
 # Actual dependency functions to override
 from config.database import get_session as get_session_dependency
 from auth.auth import get_current_active_user as get_current_active_user_dependency
-from auth.rate_limit import limiter
+from auth.rate_limit import rate_limiter
+from services.response_cache import response_cache
 
 # Auth functions and models
 from auth.auth import get_password_hash
 from schema.user import User, UserCreate
 
-# Rate limiting setup
-from slowapi import Limiter
-from slowapi.util import get_ipaddr
-from slowapi.middleware import SlowAPIMiddleware
-
 # Database setup for testing
 sqlite_file_name = "test.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
@@ -86,16 +83,14 @@ def client_fixture(session: Session):
     The session is cleared after each test to ensure no state is carried over.
     """
     app.dependency_overrides[get_session_dependency] = lambda: session
-
-    # original_limiter_enabled = limiter.enabled
-
-    # limiter.enabled = False
+    # Every test starts from user id 1 and data version 0 again
+    response_cache.clear()
+    # and with full rate limit buckets
+    rate_limiter.clear()
 
     with TestClient(app) as client:
         yield client
 
-    # limiter.enabled = original_limiter_enabled
-
     app.dependency_overrides.clear()
 
 
@@ -140,3 +135,12 @@ def auth_client_fixture(client: TestClient, test_auth_user: User):
     )
     yield client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="metrics_headers", scope="function")
+def metrics_headers_fixture(monkeypatch):
+    """
+    Sets a metrics token and provides the headers sending it.
+    """
+    monkeypatch.setenv("METRICS_TOKEN", "metrics-test-token")
+    return {"Authorization": "Bearer metrics-test-token"}
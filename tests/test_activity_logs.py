@@ -5,4 +5,104 @@ test_get_activity_log_by_id_success()
 test_get_activity_log_by_id_not_found()
 test_update_activity_log_success()
 test_delete_activity_log_success()
+test_get_activity_logs_batch()
 """
+
+from fastapi.testclient import TestClient
+
+from schema.user import User
+
+MOVEMENT_DATA = {
+    "movement_date": "2025-07-01",
+    "value": 80.0,
+    "currency": "EURO",
+    "payment_method": "Cash",
+}
+
+
+def create_logged_movements(auth_client: TestClient, descriptions: list[str]):
+    """
+    Helper creating one movement per description, each with an
+    activity log holding that description. Returns the activity logs.
+    """
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "Cafe"}
+    ).json()
+    activity_logs = []
+    for description in descriptions:
+        movement = auth_client.post(
+            f"/categories/{category['id']}/movements", json=MOVEMENT_DATA
+        ).json()
+        activity_logs.append(
+            auth_client.post(
+                f"/movements/{movement['id']}/activity_logs",
+                json={"description": description},
+            ).json()
+        )
+    return activity_logs
+
+
+def test_search_activity_logs(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests the full-text search over activity log descriptions.
+    * Only the logs containing every searched word are returned,
+    each one with its movement.
+
+    Endpoint: GET /activity_logs/search
+    """
+    create_logged_movements(
+        auth_client,
+        ["Weekend shift at the cafe", "Paid invoice for the cafe", "Train ticket"],
+    )
+
+    response = auth_client.get("/activity_logs/search", params={"q": "cafe shift"})
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["description"] for result in results] == [
+        "Weekend shift at the cafe"
+    ]
+    assert results[0]["movement"]["id"] == results[0]["movement_id"]
+
+
+def test_search_activity_logs_follows_updates(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that the full-text index follows description updates
+    and deletions.
+    * After the update, the old word no longer matches and the new one does.
+    * After deleting the log, nothing matches.
+
+    Endpoints: PATCH, DELETE /activity_logs/{activity_log_id}
+    """
+    (activity_log,) = create_logged_movements(auth_client, ["Tips in cash"])
+
+    auth_client.patch(
+        f"/activity_logs/{activity_log['id']}", json={"description": "Bonus in cash"}
+    )
+    assert auth_client.get("/activity_logs/search", params={"q": "tips"}).json() == []
+    assert (
+        len(auth_client.get("/activity_logs/search", params={"q": "bonus"}).json()) == 1
+    )
+
+    auth_client.delete(f"/activity_logs/{activity_log['id']}")
+    assert auth_client.get("/activity_logs/search", params={"q": "bonus"}).json() == []
+
+
+def test_get_activity_logs_batch(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests reading several activity logs at once.
+    * Found activity logs come back in request order.
+    * Unknown ids are listed as missing.
+
+    Endpoint: GET /activity_logs/batch
+    """
+    first, second = create_logged_movements(auth_client, ["Tips", "Shift"])
+
+    response = auth_client.get(
+        "/activity_logs/batch", params={"ids": f"{second['id']},{first['id']},42"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"found": [second, first], "missing": [42]}
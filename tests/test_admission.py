@@ -0,0 +1,179 @@
+"""
+Focus: Admission control and load shedding of the workers.
+Key Tests:
+test_request_priority()
+test_queued_requests_are_admitted_by_priority()
+test_low_priority_requests_are_shed_when_queueing()
+test_middleware_rejects_with_retry_after()
+test_batch_operations_run_in_the_batch_slot()
+test_pool_wait_is_timed()
+"""
+
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from config.database import TimedQueuePool
+from schema.user import User
+from services import admission
+from services.admission import AdmissionController, Priority, request_priority
+
+
+def test_request_priority():
+    """
+    Tests that auth is served first and expensive routes last.
+    """
+    assert request_priority("/auth/token") == Priority.HIGH
+    assert request_priority("/movements/list") == Priority.NORMAL
+    assert request_priority("/users/me/overview") == Priority.NORMAL
+    assert request_priority("/users/me/insights") == Priority.LOW
+    assert request_priority("/movements/export") == Priority.LOW
+    assert request_priority("/movements/bulk_update") == Priority.LOW
+
+
+def test_queued_requests_are_admitted_by_priority():
+    """
+    Tests that a freed slot goes to the queued normal priority request
+    before the low priority one queued earlier, and that high priority
+    requests never wait.
+    """
+    controller = AdmissionController(max_in_flight=1, target_delay=5, max_delay=5)
+    admitted = []
+
+    async def request(name: str, priority: Priority):
+        assert await controller.acquire(priority)
+        admitted.append(name)
+
+    async def scenario():
+        await controller.acquire(Priority.NORMAL)
+        low = asyncio.create_task(request("low", Priority.LOW))
+        await asyncio.sleep(0)
+        normal = asyncio.create_task(request("normal", Priority.NORMAL))
+        await asyncio.sleep(0)
+        assert await controller.acquire(Priority.HIGH)
+        assert controller.queued == 2
+
+        controller.release(Priority.NORMAL)
+        await normal
+        controller.release(Priority.NORMAL)
+        await low
+        controller.release(Priority.LOW)
+        controller.release(Priority.HIGH)
+
+    asyncio.run(scenario())
+
+    assert admitted == ["normal", "low"]
+    assert controller.in_flight == 0
+    assert controller.metrics()["admitted"] == {"low": 1, "normal": 2, "high": 1}
+
+
+def test_low_priority_requests_are_shed_when_queueing():
+    """
+    Tests that once the oldest queued request waited longer than the
+    target delay, low priority requests are rejected at once, while
+    normal priority ones keep queueing until their longer deadline.
+    """
+    now = [0.0]
+    controller = AdmissionController(
+        max_in_flight=1, target_delay=0.1, max_delay=0.05, clock=lambda: now[0]
+    )
+
+    async def scenario():
+        await controller.acquire(Priority.NORMAL)
+        waiting = asyncio.create_task(controller.acquire(Priority.NORMAL))
+        await asyncio.sleep(0)
+        now[0] = 0.5
+
+        assert controller.queueing_delay() == 0.5
+        assert not await controller.acquire(Priority.LOW)
+        assert not await waiting
+
+    asyncio.run(scenario())
+
+    assert controller.metrics()["shed"] == {"low": 1, "normal": 1, "high": 0}
+    assert controller.queued == 0
+    assert controller.retry_after() == 1
+
+
+def test_middleware_rejects_with_retry_after(
+    client: TestClient, monkeypatch, metrics_headers: dict
+):
+    """
+    Tests that a shed request gets a 503 with a Retry-After, without
+    reaching the endpoint, and that it shows in the metrics.
+
+    Endpoint: GET /movements/export
+    """
+    controller = admission.admission_controller
+
+    async def reject(priority: Priority) -> bool:
+        controller.shed[priority.name.lower()] += 1
+        return False
+
+    before = client.get("/metrics", headers=metrics_headers).json()["admission"][
+        "shed"
+    ]["low"]
+    with monkeypatch.context() as patch:
+        patch.setattr(controller, "acquire", reject)
+        response = client.get("/movements/export")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    metrics = client.get("/metrics", headers=metrics_headers).json()["admission"]
+    assert metrics["shed"]["low"] == before + 1
+    assert metrics["in_flight"] == 1
+    assert metrics["db_pool_wait_seconds"] >= 0
+
+
+def test_batch_operations_run_in_the_batch_slot(
+    auth_client: TestClient, test_auth_user: User, monkeypatch
+):
+    """
+    Tests that the operations of a batch are not admitted again, so a
+    batch holding the last free slot does not wait for itself.
+
+    Endpoint: POST /batch
+    """
+    controller = admission.admission_controller
+    monkeypatch.setattr(controller, "max_in_flight", 1)
+    operations = {"operations": [{"path": "/users/me"}, {"path": "/categories/"}]}
+
+    response = auth_client.post("/batch", json=operations)
+
+    assert response.status_code == 200
+    statuses = [result["status_code"] for result in response.json()["results"]]
+    assert statuses == [200, 200]
+    assert controller.in_flight == 0
+
+
+def test_pool_wait_is_timed(tmp_path):
+    """
+    Tests that a checkout waiting for the only connection of the pool
+    is timed.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    held = engine.connect()
+
+    def release_later():
+        time.sleep(0.2)
+        held.close()
+
+    releaser = threading.Thread(target=release_later)
+    releaser.start()
+    with engine.connect():
+        pass
+    releaser.join()
+
+    metrics = engine.pool.wait_metrics()
+    assert metrics["db_pool_checkouts"] == 2
+    assert metrics["db_pool_max_wait_seconds"] >= 0.15
+    assert metrics["db_pool_wait_seconds"] >= metrics["db_pool_max_wait_seconds"]
+    engine.dispose()
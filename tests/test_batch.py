@@ -0,0 +1,121 @@
+"""
+Focus: Several API reads executed in one batch request.
+Key Tests:
+test_batch_returns_every_result()
+test_batch_authenticates_once()
+test_batch_rejects_invalid_operations()
+test_batch_operation_error_is_returned()
+"""
+
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from auth.auth import create_access_token
+from main import app
+from schema.user import User
+from services.etag import etag_guard
+
+
+def test_batch_returns_every_result(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that each operation gets the response its path returns
+    on its own, in order, and that failing operations do not fail
+    the batch.
+
+    Endpoint: POST /batch
+    """
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "Cafe"}
+    ).json()
+
+    response = auth_client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"id": "me", "path": "/users/me"},
+                {"id": "dashboard", "path": "/users/me/dashboard/"},
+                {"path": f"/categories/batch?ids={category['id']},999"},
+                {"id": "missing", "path": "/categories/999"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    me, dashboard, categories, missing = response.json()["results"]
+    assert me["id"] == "me"
+    assert me["status_code"] == 200
+    assert me["body"]["email"] == test_auth_user.email
+    assert me["headers"]["etag"]
+    assert dashboard["body"]["num_categories"] == 1
+    assert categories["id"] is None
+    assert categories["body"] == {"found": [category], "missing": [999]}
+    assert missing["status_code"] == 404
+
+
+def test_batch_authenticates_once(
+    client: TestClient, test_auth_user: User, monkeypatch
+):
+    """
+    Tests that operations run as the user the batch was authenticated
+    with, and that an unauthenticated batch is rejected as a whole.
+
+    Endpoint: POST /batch
+    """
+    monkeypatch.setenv("SECRET_KEY", "batch-test-secret-key-of-32-bytes")
+    monkeypatch.setenv("ALGORITHM", "HS256")
+    token = create_access_token({"sub": test_auth_user.email})
+    operations = {"operations": [{"path": "/users/me"}, {"path": "/categories/"}]}
+
+    response = client.post(
+        "/batch", json=operations, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    me, categories = response.json()["results"]
+    assert me["body"]["id"] == test_auth_user.id
+    assert categories["body"] == []
+    assert client.post("/batch", json=operations).status_code == 401
+
+
+def test_batch_rejects_invalid_operations(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that nested batches, writes and relative paths are rejected.
+
+    Endpoint: POST /batch
+    """
+    nested = {"operations": [{"path": "/batch"}]}
+    write = {"operations": [{"method": "POST", "path": "/categories/"}]}
+    relative = {"operations": [{"path": "users/me"}]}
+
+    assert auth_client.post("/batch", json=nested).status_code == 400
+    assert auth_client.post("/batch", json=write).status_code == 422
+    assert auth_client.post("/batch", json=relative).status_code == 422
+
+
+def test_batch_operation_error_is_returned(
+    auth_client: TestClient, test_auth_user: User, caplog
+):
+    """
+    Tests that an operation raising an error gets a logged 500 result,
+    without failing the other operations.
+
+    Endpoint: POST /batch
+    """
+
+    def failing_guard(request: Request):
+        if request.url.path == "/users/me":
+            raise RuntimeError("boom")
+
+    app.dependency_overrides[etag_guard] = failing_guard
+    operations = {"operations": [{"path": "/users/me"}, {"path": "/categories/"}]}
+
+    response = auth_client.post("/batch", json=operations)
+
+    assert response.status_code == 200
+    me, categories = response.json()["results"]
+    assert me["status_code"] == 500
+    assert me["body"] == {"detail": "Batch operation failed: RuntimeError"}
+    assert categories["status_code"] == 200
+    assert "Error in batch operation /users/me" in caplog.text
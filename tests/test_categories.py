@@ -12,4 +12,263 @@ test_update_category_success(): Valid update, HTTP 200.
 test_update_category_not_found_or_not_owned(): HTTP 404.
 test_delete_category_success(): HTTP 204.
 test_delete_category_not_found_or_not_owned(): HTTP 404.
+test_get_categories_batch(): Found categories in order, missing ids listed.
 """
+
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import Session
+
+from schema.category import Category
+from schema.user import User
+from services import counterparty_suggest
+from services.counterparty_suggest import suggestion_cache
+
+COUNTERPARTIES = ["Bakery Schmidt", "bakery mueller", "Bank fees", "Cafe Central"]
+
+
+def create_categories(auth_client: TestClient, counterparties: list[str]):
+    """
+    Helper creating one Expenses category per counterparty.
+    """
+    return [
+        auth_client.post(
+            "/categories/",
+            json={"category_type": "Expenses", "counterparty": counterparty},
+        ).json()
+        for counterparty in counterparties
+    ]
+
+
+def test_suggest_categories(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests the counterparty autocomplete.
+    * Matches are prefix based, case insensitive and sorted alphabetically.
+    * `limit` caps the number of suggestions.
+
+    Endpoint: GET /categories/suggest
+    """
+    suggestion_cache.clear()
+    create_categories(auth_client, COUNTERPARTIES)
+
+    response = auth_client.get("/categories/suggest", params={"q": "BAK"})
+
+    assert response.status_code == 200
+    assert [category["counterparty"] for category in response.json()] == [
+        "bakery mueller",
+        "Bakery Schmidt",
+    ]
+
+    response = auth_client.get("/categories/suggest", params={"q": "ba", "limit": 1})
+    assert [category["counterparty"] for category in response.json()] == [
+        "bakery mueller"
+    ]
+
+    response = auth_client.get("/categories/suggest", params={"q": "zoo"})
+    assert response.json() == []
+
+
+def test_suggest_categories_follows_writes(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that the cached suggestions are invalidated by category writes.
+    * Created, renamed and deleted categories are reflected immediately.
+
+    Endpoints: POST /categories/, PATCH, DELETE /categories/{category_id}
+    """
+    suggestion_cache.clear()
+    (bakery,) = create_categories(auth_client, ["Bakery Schmidt"])
+    assert len(auth_client.get("/categories/suggest", params={"q": "b"}).json()) == 1
+
+    create_categories(auth_client, ["Bank fees"])
+    assert len(auth_client.get("/categories/suggest", params={"q": "b"}).json()) == 2
+
+    auth_client.patch(f"/categories/{bakery['id']}", json={"counterparty": "Cafe"})
+    response = auth_client.get("/categories/suggest", params={"q": "c"})
+    assert [category["id"] for category in response.json()] == [bakery["id"]]
+
+    auth_client.delete(f"/categories/{bakery['id']}")
+    assert auth_client.get("/categories/suggest", params={"q": "c"}).json() == []
+
+
+def test_suggest_categories_sql_fallback(
+    auth_client: TestClient, test_auth_user: User, monkeypatch
+):
+    """
+    Tests the SQL prefix query used for users with too many categories
+    to be cached in memory.
+    * Same results as the trie, LIKE wildcards in the prefix are literal.
+
+    Endpoint: GET /categories/suggest
+    """
+    suggestion_cache.clear()
+    monkeypatch.setattr(counterparty_suggest, "SUGGEST_TRIE_MAX_CATEGORIES", 1)
+    create_categories(auth_client, COUNTERPARTIES + ["100% Organic"])
+
+    response = auth_client.get("/categories/suggest", params={"q": "BAK"})
+    assert [category["counterparty"] for category in response.json()] == [
+        "bakery mueller",
+        "Bakery Schmidt",
+    ]
+
+    response = auth_client.get("/categories/suggest", params={"q": "100%"})
+    assert [category["counterparty"] for category in response.json()] == [
+        "100% Organic"
+    ]
+    response = auth_client.get("/categories/suggest", params={"q": "b%"})
+    assert response.json() == []
+    # The size check is cached, categories are not loaded on every keystroke
+    assert suggestion_cache.get(test_auth_user.id) is counterparty_suggest.USE_SQL
+
+
+def test_counterparty_index_is_byte_ordered_on_postgresql():
+    """
+    Tests that the prefix index of the SQL fallback compares in byte
+    order on PostgreSQL (C collation), like its range queries.
+    """
+    indexes = [
+        str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        for index in Category.__table__.indexes
+        if index.name == "ix_category_user_id_counterparty_lower"
+        and index._ddl_if.dialect == "postgresql"
+    ]
+    assert indexes == [
+        "CREATE INDEX ix_category_user_id_counterparty_lower ON category "
+        '(user_id, (lower(counterparty) COLLATE "C"))'
+    ]
+
+
+def test_merge_categories(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests merging duplicate categories.
+    * Movements of the source categories are moved to the target.
+    * The source categories are deleted.
+
+    Endpoint: POST /categories/merge
+    """
+    target, duplicate, other = create_categories(
+        auth_client, ["Bakery Schmidt", "bakery schmidt", "Bank fees"]
+    )
+    movement_data = {
+        "movement_date": "2025-07-01",
+        "value": -4.5,
+        "currency": "EURO",
+        "payment_method": "Cash",
+    }
+    for category in (target, duplicate, duplicate, other):
+        auth_client.post(f"/categories/{category['id']}/movements", json=movement_data)
+
+    response = auth_client.post(
+        "/categories/merge",
+        json={"source_ids": [duplicate["id"]], "target_id": target["id"]},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "target": target,
+        "merged_category_ids": [duplicate["id"]],
+        "moved_movements": 2,
+    }
+    assert auth_client.get(f"/categories/{duplicate['id']}").status_code == 404
+    movements = auth_client.get(f"/categories/{target['id']}/movements").json()
+    assert len(movements) == 3
+    movements = auth_client.get(f"/categories/{other['id']}/movements").json()
+    assert len(movements) == 1
+
+
+def test_merge_categories_invalid(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that invalid merges are rejected without changes.
+    * Merging a category into itself gives a 400.
+    * Unknown source categories give a 404.
+    * Categories of another category type give a 400.
+
+    Endpoint: POST /categories/merge
+    """
+    (target,) = create_categories(auth_client, ["Bakery Schmidt"])
+    freelance = auth_client.post(
+        "/categories/",
+        json={"category_type": "Freelance", "counterparty": "Bakery Schmidt"},
+    ).json()
+
+    response = auth_client.post(
+        "/categories/merge",
+        json={"source_ids": [target["id"]], "target_id": target["id"]},
+    )
+    assert response.status_code == 400
+
+    response = auth_client.post(
+        "/categories/merge", json={"source_ids": [9999], "target_id": target["id"]}
+    )
+    assert response.status_code == 404
+
+    response = auth_client.post(
+        "/categories/merge",
+        json={"source_ids": [freelance["id"]], "target_id": target["id"]},
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Only categories of the same category type can be merged."
+    }
+    assert auth_client.get(f"/categories/{target['id']}").status_code == 200
+    assert auth_client.get(f"/categories/{freelance['id']}").status_code == 200
+
+
+def test_delete_category_with_movements(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that a category with movements cannot be deleted.
+
+    Endpoint: DELETE /categories/{category_id}
+    """
+    (category,) = create_categories(auth_client, ["Bakery Schmidt"])
+    auth_client.post(
+        f"/categories/{category['id']}/movements",
+        json={
+            "movement_date": "2025-07-01",
+            "value": -4.5,
+            "currency": "EURO",
+            "payment_method": "Cash",
+        },
+    )
+
+    response = auth_client.delete(f"/categories/{category['id']}")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Cannot delete category with associated movements."
+    }
+    assert auth_client.get(f"/categories/{category['id']}").status_code == 200
+
+
+def test_get_categories_batch(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    Tests reading several categories at once.
+    * Found categories come back in request order, without duplicates.
+    * Unknown ids and ids of other users are listed as missing.
+    * Invalid id lists give a 400.
+
+    Endpoint: GET /categories/batch
+    """
+    first, second = create_categories(auth_client, ["Bakery Schmidt", "Bank fees"])
+    other_user = User(name="other", email="other@example.com", password="x")
+    session.add(other_user)
+    session.commit()
+    foreign = Category(
+        category_type="Expenses", counterparty="Cafe", user_id=other_user.id
+    )
+    session.add(foreign)
+    session.commit()
+
+    response = auth_client.get(
+        "/categories/batch",
+        params={"ids": f"{second['id']},999,{first['id']},{foreign.id},{second['id']}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"found": [second, first], "missing": [999, foreign.id]}
+    assert auth_client.get("/categories/batch?ids=1,a").status_code == 400
+    assert auth_client.get("/categories/batch?ids=,").status_code == 400
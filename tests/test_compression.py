@@ -0,0 +1,111 @@
+"""
+Focus: Negotiated compression of the responses.
+Key Tests:
+test_negotiate_encoding()
+test_large_responses_are_gzipped()
+test_small_responses_are_not_compressed()
+test_streamed_export_is_gzipped()
+"""
+
+import gzip
+
+from fastapi.testclient import TestClient
+
+from schema.user import User
+from services import compression
+from services.compression import negotiate_encoding
+
+
+def test_negotiate_encoding(monkeypatch):
+    """
+    Tests the choice of the encoding from Accept-Encoding, brotli
+    being preferred when it is installed and accepted.
+    """
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("br") is None
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("") is None
+
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def create_movements(auth_client: TestClient, count: int):
+    """
+    Helper creating `count` movements in a new category.
+    """
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Expenses", "counterparty": "Bakery"}
+    ).json()
+    for _ in range(count):
+        auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={
+                "movement_date": "2025-07-01",
+                "value": -4.5,
+                "currency": "EURO",
+                "payment_method": "Cash",
+            },
+        )
+
+
+def test_large_responses_are_gzipped(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that a listing above the size threshold is gzipped, and
+    that clients not accepting gzip get it uncompressed.
+
+    Endpoint: GET /movements/list
+    """
+    create_movements(auth_client, 20)
+    params = {"time_filter": "all"}
+
+    response = auth_client.get(
+        "/movements/list", params=params, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.json()) == 20
+
+    response = auth_client.get(
+        "/movements/list", params=params, headers={"Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert len(response.json()) == 20
+
+
+def test_small_responses_are_not_compressed(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that bodies below the size threshold are sent as they are.
+
+    Endpoint: GET /users/me
+    """
+    response = auth_client.get("/users/me", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streamed_export_is_gzipped(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that a streamed response is compressed chunk by chunk into
+    a single valid gzip stream.
+
+    Endpoint: GET /movements/export
+    """
+    create_movements(auth_client, 3)
+
+    with auth_client.stream(
+        "GET", "/movements/export", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(raw).startswith(b'[{"id":1,')
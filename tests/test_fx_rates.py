@@ -0,0 +1,111 @@
+"""
+Tests for the FX rate loader and the per-worker rate cache
+(services/fx_rates.py).
+"""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from schema.enums import CurrencyType
+from schema.fx_rate import FxRate
+from schema.user import User
+from services.fx_rates import load_rates_from_csv, rate_cache
+
+
+def test_load_rates_fills_missing_days(session: Session, tmp_path):
+    """
+    * Loads a CSV with a Friday and a Monday rate.
+    * The weekend in between should be filled with Friday's rate,
+    and EURO rows should be skipped (EURO is the quote currency).
+    """
+    rates_file = tmp_path / "rates.csv"
+    rates_file.write_text(
+        "date,currency,rate\n"
+        "2025-07-04,USD,1.10\n"
+        "2025-07-07,USD,1.20\n"
+        "2025-07-04,EURO,1.00\n"
+    )
+
+    written = load_rates_from_csv(str(rates_file), session)
+
+    assert written == 4
+    rates = session.exec(select(FxRate).order_by(FxRate.rate_date)).all()
+    assert [fx_rate.rate for fx_rate in rates] == [1.10, 1.10, 1.10, 1.20]
+
+
+def test_rate_cache_converts_with_closest_earlier_rate(session: Session):
+    """
+    * Converts USD to EURO for a date after the last loaded rate.
+    * The cache should fall back to the closest earlier rate.
+    """
+    session.add(FxRate(rate_date=date(2025, 7, 1), currency="USD", rate=1.25))
+    session.commit()
+    rate_cache.clear()
+
+    converted = rate_cache.convert(
+        session, 125.0, CurrencyType.usd, date(2025, 7, 3), CurrencyType.euro
+    )
+
+    assert converted == 100.0
+    rate_cache.clear()
+
+
+def test_rate_cache_uses_first_rate_for_older_dates(session: Session):
+    """
+    * Converts USD to EURO for a date before the first loaded rate.
+    * The cache should use the first rate, and give None only for a
+    currency without any rate.
+    """
+    rate_cache.clear()
+    assert rate_cache.rate(session, CurrencyType.usd, date(2025, 6, 1)) is None
+
+    session.add(FxRate(rate_date=date(2025, 7, 1), currency="USD", rate=1.25))
+    session.commit()
+    rate_cache.clear()
+
+    converted = rate_cache.convert(
+        session, 125.0, CurrencyType.usd, date(2025, 6, 1), CurrencyType.euro
+    )
+
+    assert converted == 100.0
+    rate_cache.clear()
+
+
+def test_load_rates_bumps_data_version_of_affected_users(
+    auth_client: TestClient, test_auth_user: User, session: Session, tmp_path
+):
+    """
+    * Loads USD rates while a user has a USD movement and another
+    user only EURO data.
+    * Only the first user's data version should be bumped, so their
+    converted balances are not served from ETags or the response cache.
+    """
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Freelance", "counterparty": "ACME"}
+    ).json()
+    auth_client.post(
+        f"/categories/{category['id']}/movements",
+        json={
+            "movement_date": "2025-07-04",
+            "value": 110.0,
+            "currency": "USD",
+            "payment_method": "Bank Transfer",
+        },
+    )
+    other_user = User(name="other", email="other@example.com", password="hash")
+    session.add(other_user)
+    session.commit()
+    session.refresh(test_auth_user)
+    versions = (test_auth_user.data_version, other_user.data_version)
+    rates_file = tmp_path / "rates.csv"
+    rates_file.write_text("date,currency,rate\n2025-07-04,USD,1.10\n")
+
+    load_rates_from_csv(str(rates_file), session)
+
+    session.refresh(test_auth_user)
+    session.refresh(other_user)
+    assert test_auth_user.data_version == versions[0] + 1
+    assert other_user.data_version == versions[1]
+    rate_cache.clear()
@@ -5,9 +5,571 @@ test_create_movement_success()
 test_create_movement_invalid_category_id() (category does not exist)
 test_create_movement_category_not_owned()
 test_list_movements()
+test_list_movements_fast_json()
+test_export_movements_json_and_packed()
 test_get_movement_by_id()
 test_update_movement_category_change()
 test_create_activity_log_success() (for a specific movement)
 test_create_activity_log_duplicate_for_movement()
 test_delete_movement_cascades_activity_log()
 """
+
+import asyncio
+import json
+import struct
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlmodel import Session, text
+from starlette.requests import Request
+
+from schema.idempotency import IdempotencyRecord
+from schema.movement import MovementFilters
+from schema.user import User
+from services import fast_json
+from services.idempotency import (
+    IDEMPOTENCY_LEASE,
+    IdempotencyContext,
+    IdempotentRoute,
+    response_cache,
+)
+from services.movement_export import PACKED_MAGIC, PACKED_MEDIA_TYPE
+from services.movement_listing import (
+    apply_movement_filters,
+    movement_listing_statement,
+    order_movements,
+)
+
+CATEGORY_DATA = {"category_type": "Freelance", "counterparty": "ACME"}
+
+MOVEMENT_DATA = {
+    "movement_date": "2025-07-01",
+    "value": 120.5,
+    "currency": "EURO",
+    "payment_method": "Bank Transfer",
+}
+
+
+def create_movement(auth_client: TestClient, movement_data: dict = MOVEMENT_DATA):
+    """
+    Helper creating a category and a movement in it,
+    returns the category and movement response data.
+    """
+    category = auth_client.post("/categories/", json=CATEGORY_DATA).json()
+    movement = auth_client.post(
+        f"/categories/{category['id']}/movements", json=movement_data
+    ).json()
+    return category, movement
+
+
+def test_list_movements(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests listing movements without expansion.
+    * Should return the MovementPublic fields only.
+
+    Endpoint: GET /movements/list
+    """
+    create_movement(auth_client)
+
+    response = auth_client.get("/movements/list", params={"time_filter": "all"})
+
+    assert response.status_code == 200
+    movements = response.json()
+    assert len(movements) == 1
+    assert set(movements[0]) == {
+        "id",
+        "movement_date",
+        "value",
+        "currency",
+        "payment_method",
+    }
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "json"])
+def test_list_movements_fast_json(
+    auth_client: TestClient, test_auth_user: User, monkeypatch, encoder: str
+):
+    """
+    Tests that the rows serialized without re-validation match the
+    movement returned by the validated create endpoint, with orjson
+    and with the json fallback, and keep the ETag header.
+
+    Endpoint: GET /movements/list
+    """
+    if encoder == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    _, movement = create_movement(auth_client)
+
+    response = auth_client.get("/movements/list", params={"time_filter": "all"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["ETag"].startswith('W/"')
+    assert response.json() == [movement]
+
+
+def read_packed(body: bytes) -> tuple[dict, list[list]]:
+    """
+    Helper decoding a packed export, returns its header and its
+    columns (each batch appended to the previous ones).
+    """
+    assert body.startswith(PACKED_MAGIC)
+    offset = len(PACKED_MAGIC)
+    (header_size,) = struct.unpack_from("<I", body, offset)
+    offset += 4
+    header = json.loads(body[offset : offset + header_size])
+    offset += header_size
+    typecodes = {"int64": "q", "int32": "i", "uint8": "B"}
+    columns = [[] for _ in header["columns"]]
+    while True:
+        (rows,) = struct.unpack_from("<I", body, offset)
+        offset += 4
+        if rows == 0:
+            break
+        for values, column in zip(columns, header["columns"]):
+            typed = array(typecodes[column["type"]])
+            size = typed.itemsize * rows
+            typed.frombytes(body[offset : offset + size])
+            values.extend(typed)
+            offset += size
+    assert offset == len(body)
+    return header, columns
+
+
+def test_export_movements_json_and_packed(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests the export of all movements in the negotiated format.
+    * JSON by default, with every movement ordered by date.
+    * The packed format holds the same movements, dates as days
+    since 1970-01-01, values as cents and enums as dictionary codes.
+    * Unavailable formats give a 406.
+
+    Endpoint: GET /movements/export
+    """
+    category, first = create_movement(auth_client)
+    second = auth_client.post(
+        f"/categories/{category['id']}/movements",
+        json={**MOVEMENT_DATA, "movement_date": "2025-06-01", "value": -4.5},
+    ).json()
+
+    response = auth_client.get("/movements/export")
+    assert response.status_code == 200
+    assert [movement["id"] for movement in response.json()] == [
+        second["id"],
+        first["id"],
+    ]
+    assert response.json()[0]["value"] == -4.5
+
+    response = auth_client.get(
+        "/movements/export", headers={"Accept": PACKED_MEDIA_TYPE}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == PACKED_MEDIA_TYPE
+    header, columns = read_packed(response.content)
+    ids, days, cents, currencies, payment_methods, category_ids = columns
+    assert ids == [second["id"], first["id"]]
+    assert days == [
+        (date(2025, 6, 1) - date(1970, 1, 1)).days,
+        (date(2025, 7, 1) - date(1970, 1, 1)).days,
+    ]
+    assert cents == [-450, 12050]
+    assert header["columns"][3]["dictionary"][currencies[0]] == "EURO"
+    assert header["columns"][4]["dictionary"][payment_methods[1]] == "Bank Transfer"
+    assert category_ids == [category["id"], category["id"]]
+
+    response = auth_client.get("/movements/export", headers={"Accept": "text/csv"})
+    assert response.status_code == 406
+
+
+def test_list_movements_expanded(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests listing movements with their category and activity log embedded.
+    * Only the first movement has an activity log, the other one
+    should embed `activity_log: null`.
+
+    Endpoint: GET /movements/list?expand=category,activity_log
+    """
+    category, movement = create_movement(auth_client)
+    auth_client.post(
+        f"/categories/{category['id']}/movements",
+        json={**MOVEMENT_DATA, "movement_date": "2025-06-01"},
+    )
+    auth_client.post(
+        f"/movements/{movement['id']}/activity_logs",
+        json={"description": "Invoice 42"},
+    )
+
+    response = auth_client.get(
+        "/movements/list",
+        params={"time_filter": "all", "expand": "category,activity_log"},
+    )
+
+    assert response.status_code == 200
+    first, second = response.json()
+    assert first["category"] == {**CATEGORY_DATA, "id": category["id"]}
+    assert first["activity_log"]["description"] == "Invoice 42"
+    assert second["activity_log"] is None
+
+
+def test_list_movements_expand_unknown_relation(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that expanding an unknown relation is rejected with 400.
+
+    Endpoint: GET /movements/list?expand=user
+    """
+    response = auth_client.get("/movements/list", params={"expand": "user"})
+
+    assert response.status_code == 400
+
+
+def test_list_movements_expand_ignores_blank_entries(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that blank entries of `expand` (trailing comma, spaces)
+    are ignored instead of rejected.
+
+    Endpoint: GET /movements/list?expand=category,%20
+    """
+    create_movement(auth_client)
+
+    response = auth_client.get(
+        "/movements/list", params={"time_filter": "all", "expand": "category, "}
+    )
+
+    assert response.status_code == 200
+    assert "category" in response.json()[0]
+
+
+def test_list_movements_date_range_overrides_time_filter(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that an explicit date range outside the last month returns
+    its movements without also passing time_filter=all.
+
+    Endpoint: GET /movements/list?date_from=...&date_to=...
+    """
+    create_movement(auth_client)
+
+    response = auth_client.get(
+        "/movements/list",
+        params={"date_from": "2025-01-01", "date_to": "2025-12-31"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_list_movements_filters_and_sort(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests filtering movements by value range, currency and
+    counterparty, sorted by value.
+    * Only the two EURO movements between 10 and 200 should be
+    returned, the highest value first.
+
+    Endpoint: GET /movements/list
+    """
+    category, _ = create_movement(auth_client)
+    for value, currency in [(15.0, "EURO"), (500.0, "EURO"), (50.0, "USD")]:
+        auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={**MOVEMENT_DATA, "value": value, "currency": currency},
+        )
+
+    response = auth_client.get(
+        "/movements/list",
+        params={
+            "time_filter": "all",
+            "min_value": 10,
+            "max_value": 200,
+            "currency": "EURO",
+            "counterparty": "acme",
+            "sort_by": "value",
+        },
+    )
+
+    assert response.status_code == 200
+    assert [movement["value"] for movement in response.json()] == [120.5, 15.0]
+
+
+@pytest.mark.parametrize(
+    "filters, sort_by",
+    [
+        ({}, "date"),
+        ({"currency": "USD"}, "date"),
+        ({"payment_method": "Cash"}, "date"),
+        ({"min_value": 10, "max_value": 100}, "value"),
+        ({"category_type": "Freelance"}, "date"),
+        ({"q": "invoice"}, "date"),
+    ],
+)
+def test_movement_filters_use_indexes(session: Session, filters: dict, sort_by: str):
+    """
+    Tests that the common filter combinations are served by indexes.
+    * The SQLite query plan must not contain a full scan of the
+    movement table.
+    """
+    statement = apply_movement_filters(
+        movement_listing_statement(set()), 1, MovementFilters(**filters), "sqlite"
+    )
+    statement = order_movements(statement, sort_by, "desc")
+    compiled = statement.compile(
+        session.get_bind(), compile_kwargs={"literal_binds": True}
+    )
+
+    plan = session.exec(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+
+    details = [row[-1] for row in plan]
+    assert not any(detail.startswith("SCAN movement") for detail in details)
+
+
+def create_bulk_movements(auth_client: TestClient):
+    """
+    Helper creating three movements in one category, the first two
+    in July paid in cash, each with an activity log.
+    """
+    category = auth_client.post("/categories/", json=CATEGORY_DATA).json()
+    movements = []
+    for movement_date, payment_method in (
+        ("2025-07-01", "Cash"),
+        ("2025-07-15", "Cash"),
+        ("2025-08-01", "Bank Transfer"),
+    ):
+        movement = auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={
+                **MOVEMENT_DATA,
+                "movement_date": movement_date,
+                "payment_method": payment_method,
+            },
+        ).json()
+        auth_client.post(
+            f"/movements/{movement['id']}/activity_logs",
+            json={"description": f"Imported on {movement_date}"},
+        )
+        movements.append(movement)
+    return category, movements
+
+
+def test_bulk_update_movements(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests updating the movements matching a filter.
+    * Dry run only counts the matching movements.
+    * Only the matching movements are changed.
+
+    Endpoint: POST /movements/bulk_update
+    """
+    category, movements = create_bulk_movements(auth_client)
+    other = auth_client.post(
+        "/categories/", json={"category_type": "Expenses", "counterparty": "Shop"}
+    ).json()
+    bulk = {
+        "filters": {"date_from": "2025-07-01", "date_to": "2025-07-31"},
+        "changes": {"payment_method": "Paypal", "category_id": other["id"]},
+    }
+
+    response = auth_client.post(
+        "/movements/bulk_update", json={**bulk, "dry_run": True}
+    )
+    assert response.json() == {"movements": 2, "activity_logs": 0, "dry_run": True}
+    assert auth_client.get(f"/movements/{movements[0]['id']}").json() == movements[0]
+
+    response = auth_client.post("/movements/bulk_update", json=bulk)
+
+    assert response.status_code == 200
+    assert response.json()["movements"] == 2
+    updated = auth_client.get(f"/movements/{movements[0]['id']}").json()
+    assert updated["payment_method"] == "Paypal"
+    assert len(auth_client.get(f"/categories/{other['id']}/movements").json()) == 2
+    unchanged = auth_client.get(f"/movements/{movements[2]['id']}").json()
+    assert unchanged == movements[2]
+
+
+def test_bulk_update_movements_invalid(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that bulk updates need a filter and an owned target category.
+
+    Endpoint: POST /movements/bulk_update
+    """
+    response = auth_client.post(
+        "/movements/bulk_update",
+        json={"filters": {}, "changes": {"payment_method": "Paypal"}},
+    )
+    assert response.status_code == 422
+
+    response = auth_client.post(
+        "/movements/bulk_update",
+        json={"filters": {"ids": [1]}, "changes": {"category_id": 9999}},
+    )
+    assert response.status_code == 404
+
+
+def test_bulk_delete_movements(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests deleting the movements matching a filter.
+    * Dry run counts the movements and activity logs to delete.
+    * The activity logs of the deleted movements are deleted too.
+
+    Endpoint: POST /movements/bulk_delete
+    """
+    category, movements = create_bulk_movements(auth_client)
+    bulk = {"filters": {"ids": [movements[0]["id"], movements[2]["id"]]}}
+
+    response = auth_client.post(
+        "/movements/bulk_delete", json={**bulk, "dry_run": True}
+    )
+    assert response.json() == {"movements": 2, "activity_logs": 2, "dry_run": True}
+
+    response = auth_client.post("/movements/bulk_delete", json=bulk)
+
+    assert response.json() == {"movements": 2, "activity_logs": 2, "dry_run": False}
+    remaining = auth_client.get(
+        "/movements/list",
+        params={"time_filter": "all", "expand": "activity_log"},
+    ).json()
+    assert [movement["id"] for movement in remaining] == [movements[1]["id"]]
+    search = auth_client.get("/activity_logs/search", params={"q": "Imported"}).json()
+    assert [log["movement_id"] for log in search] == [movements[1]["id"]]
+
+
+def test_create_movement_idempotency_key(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests that retries with the same Idempotency-Key do not create
+    duplicate movements.
+    * The retry returns the first response, marked as replayed,
+    even once the in-process cache is cleared (stored in the table).
+    * Reusing the key for a different body gives a 422.
+
+    Endpoint: POST /categories/{category_id}/movements
+    """
+    response_cache.clear()
+    category = auth_client.post("/categories/", json=CATEGORY_DATA).json()
+    url = f"/categories/{category['id']}/movements"
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = auth_client.post(url, json=MOVEMENT_DATA, headers=headers)
+    retry = auth_client.post(url, json=MOVEMENT_DATA, headers=headers)
+    response_cache.clear()
+    second_retry = auth_client.post(url, json=MOVEMENT_DATA, headers=headers)
+
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+    for response in (retry, second_retry):
+        assert response.status_code == 201
+        assert response.headers["Idempotent-Replayed"] == "true"
+        assert response.json() == first.json()
+    assert len(auth_client.get(url).json()) == 1
+
+    response = auth_client.post(
+        url, json={**MOVEMENT_DATA, "value": 1.0}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+def test_idempotency_key_released_on_error(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that a failed request does not store its key,
+    so the client can retry it.
+
+    Endpoint: POST /movements/{movement_id}/activity_logs
+    """
+    response_cache.clear()
+    _, movement = create_movement(auth_client)
+    url = f"/movements/{movement['id']}/activity_logs"
+    auth_client.post(url, json={"description": "First"})
+
+    headers = {"Idempotency-Key": "log-1"}
+    response = auth_client.post(url, json={"description": "Second"}, headers=headers)
+    assert response.status_code == 409
+
+    first_log = auth_client.get(
+        "/movements/list", params={"time_filter": "all", "expand": "activity_log"}
+    ).json()[0]["activity_log"]
+    auth_client.delete(f"/activity_logs/{first_log['id']}")
+
+    response = auth_client.post(url, json={"description": "Second"}, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["description"] == "Second"
+
+
+def test_idempotency_reservation_expires_after_lease(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    Tests that a key left in progress by a request that never finished
+    blocks retries only until its lease is over.
+    * Within the lease, the retry is rejected.
+    * Past the lease, the retry runs and stores its response.
+
+    Endpoint: POST /categories/{category_id}/movements
+    """
+    response_cache.clear()
+    category = auth_client.post("/categories/", json=CATEGORY_DATA).json()
+    url = f"/categories/{category['id']}/movements"
+    headers = {"Idempotency-Key": "stuck-1"}
+    record = IdempotencyRecord(
+        user_id=test_auth_user.id,
+        key="stuck-1",
+        request_hash="unfinished",
+        created_at=datetime.now(timezone.utc),
+    )
+    session.add(record)
+    session.commit()
+
+    response = auth_client.post(url, json=MOVEMENT_DATA, headers=headers)
+    assert response.status_code == 422
+
+    record.created_at -= timedelta(seconds=IDEMPOTENCY_LEASE + 1)
+    session.add(record)
+    session.commit()
+
+    response = auth_client.post(url, json=MOVEMENT_DATA, headers=headers)
+    assert response.status_code == 201
+    retry = auth_client.post(url, json=MOVEMENT_DATA, headers=headers)
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def test_idempotency_key_released_on_cancel(session: Session, test_auth_user: User):
+    """
+    Tests that a cancelled request (e.g. the client disconnected)
+    releases its key instead of leaving it in progress.
+    """
+
+    class CancelledRoute(APIRoute):
+        def get_route_handler(self):
+            async def cancelled_handler(request: Request):
+                raise asyncio.CancelledError
+
+            return cancelled_handler
+
+    class Route(IdempotentRoute, CancelledRoute):
+        pass
+
+    session.add(
+        IdempotencyRecord(
+            user_id=test_auth_user.id,
+            key="cancel-1",
+            request_hash="hash",
+            created_at=datetime.now(timezone.utc),
+        )
+    )
+    session.commit()
+    request = Request({"type": "http", "method": "POST", "path": "/", "headers": []})
+    request.state.idempotency = IdempotencyContext(
+        session, test_auth_user.id, "cancel-1", "hash"
+    )
+    handler = Route("/", lambda: None, methods=["POST"]).get_route_handler()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(handler(request))
+    assert session.get(IdempotencyRecord, (test_auth_user.id, "cancel-1")) is None
@@ -7,6 +7,7 @@ updating, and deleting planned expenses (complete CRUD operations).
 """
 
 from fastapi.testclient import TestClient
+from sqlmodel import Session, text
 
 from schema.enums import CurrencyType, FrequencyType
 from schema.user import User
@@ -121,3 +122,23 @@ def test_delete_planned_expense(auth_client: TestClient, test_auth_user: User):
     response = auth_client.get("/planned_expenses/list")
     assert response.status_code == 200
     assert len(response.json()) == 0
+
+
+def test_planned_expense_value_stored_as_cents(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    Tests that amounts are stored as integer cents in the database,
+    while the API keeps returning them as JSON numbers.
+    * Creates a planned expense of 19.99 and reads the raw column.
+
+    Endpoint: POST /planned_expenses/
+    """
+    response = auth_client.post(
+        "/planned_expenses/", json={**PLANNED_EXPENSE_DATA, "value": 19.99}
+    )
+
+    assert response.status_code == 201
+    assert response.json()["value"] == 19.99
+    stored_value = session.exec(text("SELECT value FROM plannedexpense")).one()[0]
+    assert stored_value == 1999
@@ -0,0 +1,156 @@
+"""
+Focus: Token bucket rate limiting shared by the worker processes.
+Key Tests:
+test_token_bucket()
+test_sqlite_buckets_are_shared()
+test_login_is_rate_limited_per_ip()
+test_spoofed_forwarded_for_does_not_reset_bucket()
+test_client_ip_behind_trusted_proxies()
+test_user_endpoints_are_rate_limited_per_user()
+"""
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from auth import rate_limit
+from auth.rate_limit import MemoryBackend, SQLiteBackend, client_ip, parse_rate
+from schema.user import User
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_token_bucket(backend: str, tmp_path: Path):
+    """
+    Tests that a bucket allows `count` requests at once, then one
+    more every `period / count` seconds.
+    """
+    if backend == "memory":
+        limiter = MemoryBackend()
+    else:
+        limiter = SQLiteBackend(str(tmp_path / "rate_limit.db"))
+    rate = parse_rate("3/minute")
+
+    assert all(limiter.hit("login:ip:1", rate, now=100.0).allowed for _ in range(3))
+    hit = limiter.hit("login:ip:1", rate, now=100.0)
+    assert not hit.allowed
+    assert hit.retry_after == pytest.approx(20.0)
+
+    # Other keys have their own bucket
+    assert limiter.hit("login:ip:2", rate, now=100.0).allowed
+
+    assert not limiter.hit("login:ip:1", rate, now=110.0).allowed
+    assert limiter.hit("login:ip:1", rate, now=120.0).allowed
+    assert not limiter.hit("login:ip:1", rate, now=120.0).allowed
+
+
+def test_sqlite_buckets_are_shared(tmp_path: Path):
+    """
+    Tests that limiters on the same file (one per worker) take tokens
+    from the same buckets.
+    """
+    path = str(tmp_path / "rate_limit.db")
+    workers = [SQLiteBackend(path), SQLiteBackend(path)]
+    rate = parse_rate("4/minute")
+
+    hits = [workers[i % 2].hit("login:ip:1", rate, now=100.0) for i in range(6)]
+
+    assert [hit.allowed for hit in hits] == [True] * 4 + [False] * 2
+
+
+def test_login_is_rate_limited_per_ip(client: TestClient, metrics_headers: dict):
+    """
+    Tests that the sixth login attempt of a minute from one IP gets a
+    429 with a Retry-After, and that it is counted in the metrics.
+
+    Endpoint: POST /auth/token
+    """
+    form = {"username": "nobody@example.com", "password": "wrong-password"}
+
+    statuses = [client.post("/auth/token", data=form).status_code for _ in range(5)]
+    response = client.post("/auth/token", data=form)
+
+    assert statuses == [401] * 5
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    metrics = client.get("/metrics", headers=metrics_headers).json()["rate_limit"]
+    assert metrics["login:ip"]["throttled"] >= 1
+
+
+@pytest.mark.parametrize("trusted_proxies", [0, 1])
+def test_spoofed_forwarded_for_does_not_reset_bucket(
+    client: TestClient, monkeypatch, trusted_proxies: int
+):
+    """
+    Tests that a client writing its own X-Forwarded-For addresses still
+    gets the bucket of its address, directly or behind a proxy.
+
+    Endpoint: POST /auth/token
+    """
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_COUNT", trusted_proxies)
+    form = {"username": "nobody@example.com", "password": "wrong-password"}
+    # What the proxy, if any, sends for a client at 198.51.100.1
+    # writing a different address in the header of every request
+    statuses = [
+        client.post(
+            "/auth/token",
+            data=form,
+            headers={"X-Forwarded-For": f"203.0.113.{i}, 198.51.100.1"},
+        ).status_code
+        for i in range(6)
+    ]
+
+    assert statuses == [401] * 5 + [429]
+
+
+def test_client_ip_behind_trusted_proxies(monkeypatch):
+    """
+    Tests that the client IP is the peer, or the address added to
+    X-Forwarded-For by the outermost trusted proxy.
+    """
+
+    def request(forwarded_for: str | None) -> Request:
+        headers = []
+        if forwarded_for is not None:
+            headers.append((b"x-forwarded-for", forwarded_for.encode()))
+        return Request(
+            {"type": "http", "headers": headers, "client": ("10.0.0.2", 4000)}
+        )
+
+    chain = "203.0.113.9, 198.51.100.1, 10.0.0.1"
+    assert client_ip(request(chain)) == "ip:10.0.0.2"
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_COUNT", 1)
+    assert client_ip(request(chain)) == "ip:10.0.0.1"
+    assert client_ip(request(None)) == "ip:10.0.0.2"
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_COUNT", 2)
+    assert client_ip(request(chain)) == "ip:198.51.100.1"
+    assert client_ip(request("198.51.100.1")) == "ip:198.51.100.1"
+
+
+def test_user_endpoints_are_rate_limited_per_user(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that endpoints of an authenticated user are limited per user,
+    whatever the IP the requests come from.
+
+    Endpoint: PATCH /users/me/update_password
+    """
+    body = {
+        "current_password": "not-the-password",
+        "new_password": "a-new-password",
+        "confirm_new_password": "a-new-password",
+    }
+
+    statuses = [
+        auth_client.patch(
+            "/users/me/update_password",
+            json=body,
+            headers={"X-Forwarded-For": f"203.0.113.{i}"},
+        ).status_code
+        for i in range(11)
+    ]
+
+    assert statuses == [403] * 10 + [429]
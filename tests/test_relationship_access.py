@@ -0,0 +1,45 @@
+"""
+Focus: request handlers must not load the collection relationships
+of User and Category (user.categories, user.movements,
+user.planned_expenses, category.movements). Touching them loads
+every related row into memory; use a COUNT, an EXISTS check
+(dependencies.has_dependents) or a filtered query instead.
+Key Tests:
+test_handlers_do_not_touch_collection_relationships()
+"""
+
+import ast
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HANDLER_SOURCES = [
+    *sorted((PROJECT_ROOT / "routers").glob("*.py")),
+    *sorted((PROJECT_ROOT / "services").glob("*.py")),
+    *sorted((PROJECT_ROOT / "auth").glob("*.py")),
+    PROJECT_ROOT / "dependencies.py",
+    PROJECT_ROOT / "main.py",
+]
+COLLECTION_RELATIONSHIPS = {"categories", "movements", "planned_expenses"}
+
+
+@pytest.mark.parametrize(
+    "source", HANDLER_SOURCES, ids=lambda path: str(path.relative_to(PROJECT_ROOT))
+)
+def test_handlers_do_not_touch_collection_relationships(source: Path):
+    """
+    Tests that no attribute named after a collection relationship
+    is read in the routers, services and dependencies.
+    """
+    tree = ast.parse(source.read_text(), filename=str(source))
+    offending = [
+        f"{source.name}:{node.lineno} .{node.attr}"
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Attribute) and node.attr in COLLECTION_RELATIONSHIPS
+    ]
+
+    assert offending == [], (
+        "Collection relationships load every related row, "
+        "use a COUNT/EXISTS query instead: " + ", ".join(offending)
+    )
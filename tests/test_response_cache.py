@@ -0,0 +1,87 @@
+"""
+Focus: Per-user response cache, its backends and its invalidation.
+Key Tests:
+test_memory_backend_lru_and_size_cap()
+test_sqlite_backend_shared_between_instances()
+test_cached_list_invalidated_by_writes()
+"""
+
+from fastapi.testclient import TestClient
+
+from schema.user import User
+from services.response_cache import MemoryBackend, SQLiteBackend
+
+
+def test_memory_backend_lru_and_size_cap():
+    """
+    Tests that the in-process backend evicts the least recently used
+    entries beyond its size cap, and drops a user's entries on demand.
+    """
+    backend = MemoryBackend(max_bytes=10)
+    backend.set(1, "a", b"1234")
+    backend.set(1, "b", b"1234")
+    backend.get("a")
+    backend.set(2, "c", b"1234")
+
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1234"
+    assert backend.get("c") == b"1234"
+    assert backend.size == 8
+
+    backend.invalidate_user(1)
+    assert backend.get("a") is None
+    assert backend.get("c") == b"1234"
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    """
+    Tests that SQLite backends opened on the same file (as gunicorn
+    workers do) share entries and invalidations, and that the size
+    cap is enforced.
+    """
+    path = str(tmp_path / "cache.db")
+    worker_1 = SQLiteBackend(path=path, max_bytes=8)
+    worker_2 = SQLiteBackend(path=path, max_bytes=8)
+
+    worker_1.set(1, "a", b"1234")
+    assert worker_2.get("a") == b"1234"
+
+    worker_2.invalidate_user(1)
+    assert worker_1.get("a") is None
+
+    for index in range(SQLiteBackend.TRIM_EVERY):
+        worker_1.set(1, f"key-{index}", b"1234")
+    last = SQLiteBackend.TRIM_EVERY - 1
+    assert worker_1.get(f"key-{last}") == b"1234"
+    assert worker_1.get(f"key-{last - 1}") == b"1234"
+    assert worker_1.get("key-0") is None
+
+
+def test_cached_list_invalidated_by_writes(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that repeated reads are answered from the cache,
+    and that a write makes the next read run again.
+
+    Endpoint: GET /categories/
+    """
+    auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "A"}
+    )
+
+    first = auth_client.get("/categories/")
+    second = auth_client.get("/categories/")
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "B"}
+    )
+    third = auth_client.get("/categories/")
+
+    assert third.headers["X-Cache"] == "MISS"
+    assert [category["counterparty"] for category in third.json()] == ["A", "B"]
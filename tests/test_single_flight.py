@@ -0,0 +1,138 @@
+"""
+Focus: Coalescing of identical concurrent expensive reads.
+Key Tests:
+test_concurrent_identical_calls_are_coalesced()
+test_errors_are_shared_with_waiters()
+test_waiters_survive_a_cancelled_leader()
+test_metrics_endpoint()
+test_metrics_endpoint_requires_token()
+"""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from schema.user import User
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_are_coalesced():
+    """
+    Tests that concurrent calls with the same key run the function
+    once and all get its result, while other keys run on their own.
+    """
+    flight = SingleFlight("test_coalesced")
+    release = threading.Event()
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async def scenario():
+        tasks = [asyncio.create_task(flight.run("a", compute, 1)) for _ in range(5)]
+        tasks.append(asyncio.create_task(flight.run("b", compute, 2)))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+
+    assert results == [2, 2, 2, 2, 2, 4]
+    assert sorted(calls) == [1, 2]
+    assert flight.metrics() == {"executed": 2, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_are_shared_with_waiters():
+    """
+    Tests that an error of the computation is raised to every waiter,
+    and that the next call with the same key runs again.
+    """
+    flight = SingleFlight("test_errors")
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+
+    async def scenario():
+        tasks = [asyncio.create_task(flight.run("a", fail)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        asyncio.run(flight.run("a", fail))
+    assert flight.metrics()["executed"] == 2
+
+
+def test_waiters_survive_a_cancelled_leader():
+    """
+    Tests that cancelling the call running the computation does not
+    cancel the calls waiting for it, which run it again instead.
+    """
+    flight = SingleFlight("test_cancelled_leader")
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        return "result"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.run("a", compute))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(flight.run("a", compute))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(scenario()) == "result"
+    assert flight.metrics() == {"executed": 2, "coalesced": 1, "in_flight": 0}
+
+
+def test_metrics_endpoint(
+    auth_client: TestClient, test_auth_user: User, metrics_headers: dict
+):
+    """
+    Tests that the dashboard and insights computations are counted.
+    Endpoint: GET /metrics
+    """
+    before = auth_client.get("/metrics", headers=metrics_headers).json()[
+        "single_flight"
+    ]
+    auth_client.get("/users/me/dashboard/")
+
+    response = auth_client.get("/metrics", headers=metrics_headers)
+
+    assert response.status_code == 200
+    metrics = response.json()["single_flight"]
+    assert set(metrics) >= {"dashboard", "insights"}
+    assert metrics["dashboard"]["executed"] == before["dashboard"]["executed"] + 1
+    assert metrics["dashboard"]["in_flight"] == 0
+
+
+def test_metrics_endpoint_requires_token(client: TestClient, monkeypatch):
+    """
+    Tests that the metrics are only served with the metrics token.
+    * Without METRICS_TOKEN the endpoint is disabled (404).
+    * A missing or wrong token gives a 401.
+    Endpoint: GET /metrics
+    """
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setenv("METRICS_TOKEN", "metrics-test-token")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
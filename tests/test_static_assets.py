@@ -0,0 +1,119 @@
+"""
+Focus: Fingerprinted, precompressed and long-lived cacheable static files.
+Key Tests:
+test_build_static_assets()
+test_fingerprinted_files_are_immutable()
+test_precompressed_variants_are_served()
+test_pages_link_static_url()
+"""
+
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.static_assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    StaticAssets,
+    build_static_assets,
+)
+
+STYLES = b"body { color: #333; }\n" * 100
+
+
+@pytest.fixture(name="static_directory")
+def static_directory_fixture(tmp_path: Path) -> Path:
+    """
+    Static directory with one stylesheet, built.
+    """
+    (tmp_path / "styles.css").write_bytes(STYLES)
+    build_static_assets(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(name="static_client")
+def static_client_fixture(static_directory: Path) -> TestClient:
+    """
+    Client of an app serving the built static directory.
+    """
+    app = FastAPI()
+    app.mount("/static", StaticAssets(directory=static_directory), name="static")
+    return TestClient(app)
+
+
+def test_build_static_assets(static_directory: Path):
+    """
+    Tests that the build writes a fingerprinted copy, its gzip variant
+    and the manifest, and that a rebuild after a change replaces the
+    previous copy.
+    """
+    assets = StaticAssets(directory=static_directory)
+    fingerprinted = assets.manifest["styles.css"]
+
+    assert fingerprinted.startswith("styles.") and fingerprinted.endswith(".css")
+    assert (static_directory / fingerprinted).read_bytes() == STYLES
+    assert (static_directory / f"{fingerprinted}.gz").exists()
+    assert assets.url("styles.css") == f"/static/{fingerprinted}"
+    assert assets.url("missing.js") == "/static/missing.js"
+
+    (static_directory / "styles.css").write_bytes(b"body { color: red; }\n" * 100)
+    manifest = build_static_assets(static_directory)
+
+    assert manifest["styles.css"] != fingerprinted
+    assert not (static_directory / fingerprinted).exists()
+    assert not (static_directory / f"{fingerprinted}.gz").exists()
+
+
+def test_fingerprinted_files_are_immutable(
+    static_client: TestClient, static_directory: Path
+):
+    """
+    Tests the Cache-Control of fingerprinted and plain static files.
+    """
+    fingerprinted = StaticAssets(directory=static_directory).url("styles.css")
+
+    response = static_client.get(fingerprinted)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    response = static_client.get("/static/styles.css")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+
+def test_precompressed_variants_are_served(
+    static_client: TestClient, static_directory: Path
+):
+    """
+    Tests that the gzip variant is sent to clients accepting gzip, and
+    the file itself to the others.
+    """
+    fingerprinted = StaticAssets(directory=static_directory).url("styles.css")
+
+    response = static_client.get(fingerprinted, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Type"].startswith("text/css")
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(STYLES)
+    assert response.content == STYLES
+
+    response = static_client.get(fingerprinted, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.content == STYLES
+
+
+def test_pages_link_static_url(client: TestClient):
+    """
+    Tests that pages link the stylesheet through the static_url helper.
+
+    Endpoint: GET /dashboard
+    """
+    from main import static_assets
+
+    response = client.get("/dashboard")
+
+    assert response.status_code == 200
+    assert f'href="{static_assets.url("styles.css")}"' in response.text
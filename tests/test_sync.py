@@ -0,0 +1,161 @@
+"""
+Focus: Delta sync through the per-user change log.
+Key Tests:
+test_sync_full_then_incremental(): since=0 returns everything, the next
+sync only what changed.
+test_sync_collapses_changes_and_deletions(): several changes of an entity
+give its current state once, deletions are listed.
+test_sync_pagination(): `limit` pages through the changes with `has_more`.
+test_change_log_seq_is_assigned_under_user_lock(): the user's row is
+locked before a seq is assigned, so seqs commit in order.
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from schema.enums import ChangeEntity, ChangeOperation
+from schema.user import User
+from services.change_log import record_change
+
+CATEGORY_DATA = {"category_type": "Freelance", "counterparty": "ACME"}
+
+MOVEMENT_DATA = {
+    "movement_date": "2025-07-01",
+    "value": 120.5,
+    "currency": "EURO",
+    "payment_method": "Bank Transfer",
+}
+
+
+def test_sync_full_then_incremental(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests a first full sync followed by an incremental one.
+    * since=0 returns every entity created so far.
+    * Syncing again from the returned seq only returns the changes
+    made in between.
+
+    Endpoint: GET /sync
+    """
+    category = auth_client.post("/categories/", json=CATEGORY_DATA).json()
+    movement = auth_client.post(
+        f"/categories/{category['id']}/movements", json=MOVEMENT_DATA
+    ).json()
+
+    response = auth_client.get("/sync", params={"since": 0})
+
+    assert response.status_code == 200
+    full_sync = response.json()
+    assert full_sync["categories"] == [category]
+    assert full_sync["movements"] == [movement]
+    assert full_sync["has_more"] is False
+
+    log = auth_client.post(
+        f"/movements/{movement['id']}/activity_logs", json={"description": "Invoice"}
+    ).json()
+    response = auth_client.get("/sync", params={"since": full_sync["seq"]})
+
+    delta = response.json()
+    assert delta["activity_logs"] == [log]
+    assert delta["categories"] == []
+    assert delta["movements"] == []
+    assert delta["seq"] > full_sync["seq"]
+
+    response = auth_client.get("/sync", params={"since": delta["seq"]})
+    assert response.json()["seq"] == delta["seq"]
+    assert response.json()["movements"] == []
+
+
+def test_sync_collapses_changes_and_deletions(
+    auth_client: TestClient, test_auth_user: User
+):
+    """
+    Tests that updates and deletions are reported once per entity.
+    * An entity updated twice appears once, in its current state.
+    * Deleting a movement reports it and its activity log as deleted.
+    * Bulk operations are logged too.
+
+    Endpoint: GET /sync
+    """
+    category = auth_client.post("/categories/", json=CATEGORY_DATA).json()
+    kept, deleted = [
+        auth_client.post(
+            f"/categories/{category['id']}/movements", json=MOVEMENT_DATA
+        ).json()
+        for _ in range(2)
+    ]
+    log = auth_client.post(
+        f"/movements/{deleted['id']}/activity_logs", json={"description": "Typo"}
+    ).json()
+    since = auth_client.get("/sync").json()["seq"]
+
+    auth_client.patch(f"/categories/{category['id']}", json={"counterparty": "A"})
+    auth_client.patch(f"/categories/{category['id']}", json={"counterparty": "B"})
+    auth_client.post(
+        "/movements/bulk_update",
+        json={"filters": {"ids": [kept["id"]]}, "changes": {"currency": "USD"}},
+    )
+    auth_client.delete(f"/movements/{deleted['id']}")
+
+    delta = auth_client.get("/sync", params={"since": since}).json()
+
+    assert [item["counterparty"] for item in delta["categories"]] == ["B"]
+    assert [(item["id"], item["currency"]) for item in delta["movements"]] == [
+        (kept["id"], "USD")
+    ]
+    assert sorted(delta["deleted"], key=lambda item: item["entity"]) == [
+        {"entity": "activity_log", "id": log["id"]},
+        {"entity": "movement", "id": deleted["id"]},
+    ]
+
+
+def test_sync_pagination(auth_client: TestClient, test_auth_user: User):
+    """
+    Tests paging through the changes with `limit`.
+
+    Endpoint: GET /sync
+    """
+    for counterparty in ("A", "B", "C"):
+        auth_client.post(
+            "/categories/", json={**CATEGORY_DATA, "counterparty": counterparty}
+        )
+
+    first_page = auth_client.get("/sync", params={"limit": 2}).json()
+    second_page = auth_client.get(
+        "/sync", params={"since": first_page["seq"], "limit": 2}
+    ).json()
+
+    assert first_page["has_more"] is True
+    assert [item["counterparty"] for item in first_page["categories"]] == ["A", "B"]
+    assert second_page["has_more"] is False
+    assert [item["counterparty"] for item in second_page["categories"]] == ["C"]
+
+
+def test_change_log_seq_is_assigned_under_user_lock(
+    session: Session, test_auth_user: User
+):
+    """
+    Tests that recording a change updates the user's row (taking its
+    lock) before inserting the change_log row that assigns the seq.
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0:3])
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        record_change(
+            session,
+            test_auth_user.id,
+            ChangeEntity.category,
+            1,
+            ChangeOperation.create,
+        )
+        session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    writes = [words[:3] for words in statements if words[0] in ("UPDATE", "INSERT")]
+    assert writes == [["UPDATE", "user", "SET"], ["INSERT", "INTO", "change_log"]]
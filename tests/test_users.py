@@ -1,4 +1,13 @@
+from datetime import date
+
 from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from auth.auth import ACCESS_TOKEN_COOKIE, create_access_token
+from schema.activity_log import ActivityLog
+from schema.category import Category
+from schema.fx_rate import FxRate
+from schema.movement import Movement
 from schema.user import User
 
 TEST_AUTH_USER_PLAIN_PASSWORD = "admin123supersecure"
@@ -23,6 +32,79 @@ def test_home_route(client: TestClient):
     assert "text/html" in response.headers["content-type"]
 
 
+def test_dashboard_page_embeds_overview(
+    client: TestClient, test_auth_user: User, monkeypatch
+):
+    """
+    * Tests the server-rendered dashboard page.
+    * Without credentials, the page is served without data.
+    * With the access token cookie set at login, the page is rendered
+    with the user's overview, also embedded as JSON.
+    """
+    monkeypatch.setenv("SECRET_KEY", "dashboard-test-secret-key-32-bytes")
+    monkeypatch.setenv("ALGORITHM", "HS256")
+
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    assert '<script id="overview-data" type="application/json">null' in response.text
+
+    client.cookies.set(
+        ACCESS_TOKEN_COOKIE, create_access_token({"sub": test_auth_user.email})
+    )
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    assert '"num_movements": 0' in response.text
+    assert 'id="num-categories">0</p>' in response.text
+
+
+def test_profile_and_movements_pages_embed_their_data(
+    client: TestClient, test_auth_user: User, session: Session, monkeypatch
+):
+    """
+    * Tests the server-rendered profile and movements pages.
+    * Without credentials, the pages are served without data.
+    * With the access token cookie, the profile page is rendered with
+    the user's details and the movements page with this month's
+    movements, both also embedded as JSON.
+    """
+    monkeypatch.setenv("SECRET_KEY", "dashboard-test-secret-key-32-bytes")
+    monkeypatch.setenv("ALGORITHM", "HS256")
+    category = Category(
+        category_type="Expenses",
+        counterparty="<b>Bakery</b>",
+        user_id=test_auth_user.id,
+    )
+    session.add(category)
+    session.flush()
+    session.add(
+        Movement(
+            movement_date=date.today(),
+            value=-4.5,
+            currency="EURO",
+            payment_method="Cash",
+            category_id=category.id,
+            user_id=test_auth_user.id,
+        )
+    )
+    session.commit()
+
+    response = client.get("/profile")
+    assert '<script id="user-data" type="application/json">null' in response.text
+    response = client.get("/movements_page")
+    assert '<script id="movements-data" type="application/json">null' in response.text
+
+    client.cookies.set(
+        ACCESS_TOKEN_COOKIE, create_access_token({"sub": test_auth_user.email})
+    )
+    response = client.get("/profile")
+    assert response.status_code == 200
+    assert f'<span id="user-email">{test_auth_user.email}</span>' in response.text
+    response = client.get("/movements_page")
+    assert response.status_code == 200
+    assert "<td>&lt;b&gt;Bakery&lt;/b&gt;</td>" in response.text
+    assert '"payment_method": "Cash"' in response.text
+
+
 ## Tests user registration endpoints (no authentication required)
 # Uses the `client` fixture to provide a non-authenticated client.
 # Uses the `get_response_register_test_user` helper function
@@ -298,6 +380,44 @@ def test_delete_user_success(
     assert response.json() == {"detail": "Incorrect username or password"}
 
 
+def test_delete_user_purges_data(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    * Tests that deleting the account purges all of its data.
+    * The user row, categories, movements and activity logs are
+    deleted by the background purge run after the response.
+
+    Endpoint: DELETE /users/me
+    """
+    user_id = test_auth_user.id
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "Cafe"}
+    ).json()
+    for _ in range(3):
+        movement = auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={
+                "movement_date": "2025-07-01",
+                "value": 80.0,
+                "currency": "EURO",
+                "payment_method": "Cash",
+            },
+        ).json()
+        auth_client.post(
+            f"/movements/{movement['id']}/activity_logs", json={"description": "Shift"}
+        )
+
+    delete_headers = {"X-Confirm-Password": TEST_AUTH_USER_PLAIN_PASSWORD}
+    response = auth_client.delete("/users/me", headers=delete_headers)
+
+    assert response.status_code == 204
+    session.expire_all()
+    assert session.get(User, user_id) is None
+    for model in (Category, Movement, ActivityLog):
+        assert session.exec(select(func.count(model.id))).one() == 0
+
+
 def test_delete_user_failure(client: TestClient):
     """
     * Tests deletion of the user's account without authentication.
@@ -312,6 +432,33 @@ def test_delete_user_failure(client: TestClient):
     assert response.json() == {"detail": "Not authenticated"}
 
 
+def test_dashboard_conditional_get(auth_client: TestClient, test_auth_user: User):
+    """
+    * Tests conditional GETs of the dashboard.
+    * The response carries a weak ETag, sending it back in If-None-Match
+    gives an empty 304.
+    * After a write, the ETag changes and the full response is returned.
+
+    Endpoint: GET /users/me/dashboard/
+    """
+    response = auth_client.get("/users/me/dashboard/")
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = auth_client.get("/users/me/dashboard/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "Cafe"}
+    )
+    response = auth_client.get("/users/me/dashboard/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["num_categories"] == 1
+    assert response.headers["ETag"] != etag
+
+
 def test_dashboard_summary_initial(auth_client: TestClient, test_auth_user: User):
     """
     * Tests the initial dashboard summary for a newly created user.
@@ -349,3 +496,202 @@ def test_minijobs_balance_initial(auth_client: TestClient, test_auth_user: User)
     assert minijobs_balance["max_earnings"] == "556€"
     assert "current_month" in minijobs_balance
     assert "current_year" in minijobs_balance
+
+
+def test_dashboard_balance_converts_currencies(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    * Tests that the dashboard balance adds up movements recorded in
+    different currencies, converted to the user's reporting currency
+    (EURO by default) with the rate of each movement date.
+    * A 110 USD income with a rate of 1.10 USD per EURO counts as 100€.
+
+    Endpoint: GET /users/me/dashboard/
+    """
+    session.add(FxRate(rate_date=date(2025, 7, 1), currency="USD", rate=1.10))
+    session.commit()
+
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Freelance", "counterparty": "ACME"}
+    ).json()
+    for value, currency in [(50.0, "EURO"), (110.0, "USD")]:
+        auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={
+                "movement_date": "2025-07-01",
+                "value": value,
+                "currency": currency,
+                "payment_method": "Bank Transfer",
+            },
+        )
+
+    response = auth_client.get("/users/me/dashboard/")
+
+    assert response.status_code == 200
+    dashboard_summary = response.json()
+    assert dashboard_summary["balance"] == 150.0
+    assert dashboard_summary["currency"] == "EURO"
+    assert dashboard_summary["num_movements"] == 2
+
+
+def test_dashboard_balance_uses_closest_earlier_rate(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    * Tests that a movement dated after the last loaded rate is
+    converted with the closest earlier rate, in the dashboard balance
+    and in the overview, instead of being left out.
+
+    Endpoints: GET /users/me/dashboard/, GET /users/me/overview
+    """
+    session.add(FxRate(rate_date=date(2025, 7, 1), currency="USD", rate=1.10))
+    session.add(FxRate(rate_date=date(2025, 7, 2), currency="USD", rate=1.25))
+    session.commit()
+
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Freelance", "counterparty": "ACME"}
+    ).json()
+    auth_client.post(
+        f"/categories/{category['id']}/movements",
+        json={
+            "movement_date": "2025-07-09",
+            "value": 125.0,
+            "currency": "USD",
+            "payment_method": "Bank Transfer",
+        },
+    )
+
+    dashboard = auth_client.get("/users/me/dashboard/").json()
+    overview = auth_client.get("/users/me/overview").json()
+
+    assert dashboard["balance"] == 100.0
+    assert float(overview["balance"]) == 100.0
+
+
+def test_dashboard_balance_rate_fallbacks(
+    auth_client: TestClient, test_auth_user: User, session: Session
+):
+    """
+    * Tests that a movement dated before the first loaded rate is
+    converted with that first rate.
+    * Without any rate of its currency, the balance is not computed
+    without the movement, the request fails with a 503 instead.
+
+    Endpoints: GET /users/me/dashboard/, GET /users/me/overview
+    """
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Freelance", "counterparty": "ACME"}
+    ).json()
+    auth_client.post(
+        f"/categories/{category['id']}/movements",
+        json={
+            "movement_date": "2025-06-01",
+            "value": 125.0,
+            "currency": "USD",
+            "payment_method": "Bank Transfer",
+        },
+    )
+
+    for url in ("/users/me/dashboard/", "/users/me/overview"):
+        response = auth_client.get(url)
+        assert response.status_code == 503
+        assert "exchange rate" in response.json()["detail"]
+
+    session.add(FxRate(rate_date=date(2025, 7, 1), currency="USD", rate=1.25))
+    session.commit()
+
+    dashboard = auth_client.get("/users/me/dashboard/").json()
+    overview = auth_client.get("/users/me/overview").json()
+
+    assert dashboard["balance"] == 100.0
+    assert float(overview["balance"]) == 100.0
+
+
+def test_dashboard_balance_is_exact(auth_client: TestClient, test_auth_user: User):
+    """
+    * Tests that the balance is summed exactly in the database,
+    as amounts are stored as integer cents.
+    * 0.10 + 0.20 should be exactly 0.30 (not 0.30000000000000004).
+
+    Endpoint: GET /users/me/dashboard/
+    """
+    category = auth_client.post(
+        "/categories/", json={"category_type": "Commission", "counterparty": "Shop"}
+    ).json()
+    for value in [0.1, 0.2]:
+        auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={
+                "movement_date": "2025-07-01",
+                "value": value,
+                "currency": "EURO",
+                "payment_method": "Cash",
+            },
+        )
+
+    response = auth_client.get("/users/me/dashboard/")
+
+    assert response.status_code == 200
+    assert response.json()["balance"] == 0.3
+
+
+def test_overview(auth_client: TestClient, test_auth_user: User):
+    """
+    * Tests the dashboard overview of a user with movements this
+    month and in the past.
+    * Counts and balances are split by category type, every type
+    being listed even without categories.
+    * The minijob headroom is the monthly limit minus this month's
+    minijob earnings.
+    * The latest movements come first, with their category.
+
+    Endpoint: GET /users/me/overview
+    """
+    today = date.today()
+    minijob = auth_client.post(
+        "/categories/", json={"category_type": "Minijob", "counterparty": "Cafe"}
+    ).json()
+    expenses = auth_client.post(
+        "/categories/", json={"category_type": "Expenses", "counterparty": "Bakery"}
+    ).json()
+    for category, movement_date, value in [
+        (minijob, "2020-01-15", 300.0),
+        (minijob, today.isoformat(), 200.0),
+        (expenses, today.isoformat(), -4.5),
+    ]:
+        auth_client.post(
+            f"/categories/{category['id']}/movements",
+            json={
+                "movement_date": movement_date,
+                "value": value,
+                "currency": "EURO",
+                "payment_method": "Cash",
+            },
+        )
+
+    response = auth_client.get("/users/me/overview", params={"latest": 2})
+
+    assert response.status_code == 200
+    overview = response.json()
+    assert overview["balance"] == 495.5
+    assert overview["num_categories"] == 2
+    assert overview["num_movements"] == 3
+    category_types = {
+        item["category_type"]: item for item in overview["category_types"]
+    }
+    assert category_types["Minijob"]["balance"] == 500.0
+    assert category_types["Minijob"]["month_balance"] == 200.0
+    assert category_types["Expenses"]["month_balance"] == -4.5
+    assert category_types["Freelance"]["num_categories"] == 0
+    assert overview["minijob"]["earnings"] == 200.0
+    assert overview["minijob"]["headroom"] == 356.0
+    assert len(overview["latest_movements"]) == 2
+    assert all(
+        movement["movement_date"] == today.isoformat()
+        for movement in overview["latest_movements"]
+    )
+    assert overview["latest_movements"][0]["category"]["counterparty"] in (
+        "Cafe",
+        "Bakery",
+    )